@@ -1,9 +1,13 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
 from backend import config
 from backend.api.middlewares.auth import AuthMiddleware
 from backend.api.middlewares.tech import TechWorksMiddleware
+from backend.api.routes.blackjack import blackjack_lobby, blackjack_matchmaker
 from backend.api.routes.blackjack import router as blackjack_router
+from backend.api.routes.dice import dice_lobby, dice_matchmaker
 from backend.api.routes.dice import router as dice_router
 from backend.api.routes.game import router as game_router
 from backend.api.routes.guess import router as guess_router
@@ -12,8 +16,42 @@ from backend.api.routes.misc import router as misc_router
 from backend.api.routes.player import router as player_router
 from backend.api.routes.transaction import router as transaction_router
 from backend.api.routes.wallet import router as wallet_router
+from backend.db.prices import price_history
+from backend.db.pubsub import pubsub
+from backend.db.rooms import room_manager
+from backend.db.settlement import settlement_engine
+from backend.db.state import state_store
+from backend.services.prices import price_feed
+from backend.services.room_hub import room_hub
+
+config.init()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    room_hub.start()
+    await pubsub.start()
+    await state_store.start()
+    await blackjack_lobby.start()
+    await dice_lobby.start()
+    # Rooms won while no worker was running
+    await settlement_engine.sweep()
+    room_manager.start()
+    blackjack_matchmaker.start()
+    dice_matchmaker.start()
+    await price_history.load()
+    price_feed.on_refresh(price_history.record)
+    price_feed.start()
+    yield
+    await price_feed.stop()
+    await dice_matchmaker.stop()
+    await blackjack_matchmaker.stop()
+    await settlement_engine.stop()
+    await room_manager.stop()
+    await pubsub.stop()
+
 
-app = FastAPI(on_startup=config.init())
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(AuthMiddleware)
 app.add_middleware(TechWorksMiddleware)
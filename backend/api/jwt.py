@@ -1,11 +1,23 @@
+import time
 from datetime import UTC, datetime, timedelta
 from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 import jwt
 
+from backend.core.token_cache import VerifiedTokenCache
 from backend.db.actions import RefreshTokenActions
+from backend.db.state import state_store
 from backend.config import settings
 
+# State store keys of revocation epochs, followed by the user id
+REVOCATION_PREFIX = "revoked_tokens:"
+
+token_cache = VerifiedTokenCache(settings.token_cache_size, settings.refresh_token_ttl)
+state_store.watch_prefix(
+    REVOCATION_PREFIX,
+    lambda key, at: token_cache.revoke(int(key.removeprefix(REVOCATION_PREFIX)), at),
+)
+
 
 async def create_refresh_token(
     session: AsyncSession, user_id: int, delta: timedelta
@@ -21,7 +33,12 @@ async def create_refresh_token(
 
     try:
         token = jwt.encode(
-            {"jti": jti, "iat": now, "exp": valid_till, "sub": user_id},
+            {
+                "jti": str(jti),
+                "iat": now.timestamp(),
+                "exp": valid_till,
+                "sub": str(user_id),
+            },
             key=settings.jwt_secret,
             algorithm="HS256",
         )
@@ -39,23 +56,49 @@ async def create_access_token(user_id: int, delta: timedelta) -> Optional[str]:
 
     try:
         token = jwt.encode(
-            {"sub": user_id, "iat": now, "exp": valid_till},
+            {"sub": str(user_id), "iat": now.timestamp(), "exp": valid_till},
             key=settings.jwt_secret,
             algorithm="HS256",
         )
     except jwt.PyJWTError:
         return
 
+    token_cache.put(token, user_id, now.timestamp(), valid_till.timestamp())
     return token
 
 
 async def verify_refresh_token(session: AsyncSession, token: str) -> Optional[int]:
-    payload = jwt.decode(token, key=settings.jwt_secret, algorithms=["HS256"])
+    try:
+        payload = jwt.decode(token, key=settings.jwt_secret, algorithms=["HS256"])
+    except jwt.PyJWTError:
+        return
+
+    sub = payload.get("sub")
+    if (
+        sub
+        and sub.isdigit()
+        and token_cache.is_revoked(int(sub), payload.get("iat", 0))
+    ):
+        return
+
     return await RefreshTokenActions(session).verify_refresh_token(payload)
 
 
 async def verify_access_token(token: str) -> Optional[int]:
-    payload = jwt.decode(token, key=settings.jwt_secret, algorithms=["HS256"])
+    """
+    Verify access token without touching the database
+
+    Tokens that were already verified are answered from the in-process cache,
+    the rest are decoded once and cached until their expiration.
+    """
+    if (user_id := token_cache.get(token)) is not None:
+        return user_id
+
+    try:
+        payload = jwt.decode(token, key=settings.jwt_secret, algorithms=["HS256"])
+    except jwt.PyJWTError:
+        return
+
     sub = payload.get("sub")
     if not sub:
         return
@@ -69,16 +112,17 @@ async def verify_access_token(token: str) -> Optional[int]:
     if not iat:
         return
 
-    iat = datetime.fromtimestamp(iat, tz=UTC)
-
     exp = payload.get("exp")
     if not exp:
         return
-    exp = datetime.fromtimestamp(exp, tz=UTC)
 
-    if exp < datetime.now(UTC):
+    if datetime.fromtimestamp(exp, tz=UTC) < datetime.now(UTC):
         return
 
+    if token_cache.is_revoked(sub, iat):
+        return
+
+    token_cache.put(token, sub, iat, exp)
     return sub
 
 
@@ -89,3 +133,34 @@ async def refresh_token(
         return None, None
 
     return await create_access_token(user_id, delta=timedelta(days=1)), user_id
+
+
+async def revoke_tokens(session: AsyncSession, user_id: int) -> None:
+    """
+    Reject every access and refresh token of the user issued until now
+
+    The revocation epoch is kept in the shared state store, so every worker
+    rejects the tokens and the revocation survives restarts. Token ``iat`` is
+    issued with sub-second precision, so tokens issued right after the
+    revocation stay valid.
+    """
+    at = time.time()
+    token_cache.revoke(user_id, at)
+    await state_store.set(f"{REVOCATION_PREFIX}{user_id}", at)
+    await RefreshTokenActions(session).revoke_refresh_tokens(user_id)
+
+
+async def prune_revocations() -> int:
+    """
+    Delete revocation epochs older than the refresh token lifetime
+
+    Every token issued before such an epoch has already expired, so the epoch
+    no longer rejects anything.
+
+    Returns:
+        int: Number of deleted epochs
+    """
+    cutoff = time.time() - settings.refresh_token_ttl
+    token_cache.prune()
+    keys = [key for key, at in state_store.items(REVOCATION_PREFIX) if at < cutoff]
+    return await state_store.delete(keys)
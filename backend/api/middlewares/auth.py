@@ -1,48 +1,81 @@
-from typing import Awaitable, Callable
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
 from starlette.responses import RedirectResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from starlette.websockets import WebSocketClose
 
 from backend.api.jwt import refresh_token, verify_access_token
 from backend.db.session import get_session
 
+# Close code of WebSocket connections without valid tokens
+WS_UNAUTHORIZED = 4401
 
-class AuthMiddleware(BaseHTTPMiddleware):
-    async def dispatch(
-        self, request: Request, call_next: Callable[[Request], Awaitable[Response]]
-    ) -> Response:
-        if "login" in request.scope.get("path"):
-            return await call_next(request)
 
-        access_token = request.cookies.get("access_token")
-        _refresh_token = request.cookies.get("refresh_token")
+class AuthMiddleware:
+    """
+    Pure ASGI authentication layer.
 
-        leave = RedirectResponse("/reg")
+    Valid access tokens are resolved statelessly (see ``verify_access_token``),
+    the database is only touched when the access token is missing or stale and
+    a new one has to be issued from the refresh token. WebSocket handshakes
+    are authenticated the same way and closed with ``WS_UNAUTHORIZED``
+    instead of the redirect.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    @staticmethod
+    async def reject(scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "websocket":
+            await WebSocketClose(WS_UNAUTHORIZED)(scope, receive, send)
+            return
+        await RedirectResponse("/reg")(scope, receive, send)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] not in ("http", "websocket") or "login" in scope["path"]:
+            await self.app(scope, receive, send)
+            return
+
+        cookies = HTTPConnection(scope).cookies
+        access_token = cookies.get("access_token")
+        _refresh_token = cookies.get("refresh_token")
 
         if not access_token and not _refresh_token:
-            return leave
+            await self.reject(scope, receive, send)
+            return
 
-        user_id = verify_access_token(access_token)
+        user_id = await verify_access_token(access_token) if access_token else None
 
         if user_id:
-            request.state.user_id = user_id
-            return await call_next(request)
+            scope.setdefault("state", {})["user_id"] = user_id
+            await self.app(scope, receive, send)
+            return
 
         if not _refresh_token:
-            return leave
+            await self.reject(scope, receive, send)
+            return
 
         token = ""
         async for session in get_session():
             token, user_id = await refresh_token(session, _refresh_token)
 
         if not token:
-            return leave
+            await self.reject(scope, receive, send)
+            return
 
-        request.state.user_id = user_id
+        scope.setdefault("state", {})["user_id"] = user_id
 
-        response = await call_next(request)
-
-        response.set_cookie(
+        cookie = Response()
+        cookie.set_cookie(
             "access_token", token, httponly=True, secure=True, samesite="strict"
         )
-        return response
+        set_cookie = cookie.headers["set-cookie"]
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] in ("http.response.start", "websocket.accept"):
+                message.setdefault("headers", [])
+                MutableHeaders(scope=message).append("set-cookie", set_cookie)
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
@@ -1,20 +1,33 @@
-from typing import Awaitable, Callable
-
 from starlette import status
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import JSONResponse, Response
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+from starlette.websockets import WebSocketClose
 
 from backend.db.actions import TechActions
 
 
-class TechWorksMiddleware(BaseHTTPMiddleware):
-    async def dispatch(
-        self, request: Request, call_next: Callable[[Request], Awaitable[Response]]
-    ) -> Response:
-        if not TechActions().is_tech_works():
-            return await call_next(request)
+class TechWorksMiddleware:
+    """
+    Pure ASGI layer answering 503 while technical works are going.
+
+    The check is a single comparison of the monotonic clock against the
+    cached deadline of technical works. WebSocket handshakes are closed with
+    1013 (try again later) instead.
+    """
 
-        return JSONResponse(
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self.tech = TechActions()
+        self.unavailable = JSONResponse(
             {"detail": "Технические работы"}, status.HTTP_503_SERVICE_UNAVAILABLE
         )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan" or not self.tech.is_tech_works():
+            await self.app(scope, receive, send)
+            return
+
+        if scope["type"] == "websocket":
+            await WebSocketClose(1013)(scope, receive, send)
+            return
+        await self.unavailable(scope, receive, send)
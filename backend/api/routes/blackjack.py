@@ -1,60 +1,43 @@
-from random import choice, randint
+from typing import List, Optional, Tuple
 
-from fastapi import APIRouter, HTTPException, Request, status
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, HTTPException, Request, WebSocket, status
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from loguru import logger
 
-from backend.core.blackjack import calculate_hand_value, generate_room_id
-from backend.domain.games import CreateRoomRequest, RoomRequest
-
-blackjack_rooms = dict()
-
-cards_52: list[str] = [
-    "2_h",
-    "2_d",
-    "2_c",
-    "2_s",
-    "3_h",
-    "3_d",
-    "3_c",
-    "3_s",
-    "4_h",
-    "4_d",
-    "4_c",
-    "4_s",
-    "5_h",
-    "5_d",
-    "5_c",
-    "5_s",
-    "6_h",
-    "6_d",
-    "6_c",
-    "6_s",
-    "7_h",
-    "7_d",
-    "7_c",
-    "7_s",
-    "8_h",
-    "8_d",
-    "8_c",
-    "8_s",
-    "9_h",
-    "9_d",
-    "9_c",
-    "9_s",
-    "j_h",
-    "j_d",
-    "j_c",
-    "j_s",
-    "q_h",
-    "q_d",
-    "q_c",
-    "q_s",
-    "k_h",
-    "k_d",
-    "k_c",
-    "k_s",
-]
+from backend.config import settings
+from backend.core.blackjack import BlackjackRoom, generate_room_id
+from backend.core.rooms import room_not_found
+from backend.core.shoe import Shoe
+from backend.db.matchmaking import create_matchmaker
+from backend.db.rooms import create_room_store
+from backend.db.settlement import BLACKJACK_GAME_TYPE, settlement_engine
+from backend.domain.games import CreateRoomRequest, MatchRequest, RoomRequest
+from backend.services.lobby import create_lobby
+from backend.services.room_hub import room_hub, serve_events, serve_websocket
+
+blackjack_rooms = create_room_store(BlackjackRoom, "blackjack")
+settlement_engine.register(blackjack_rooms, BLACKJACK_GAME_TYPE)
+blackjack_rooms.on_change(room_hub.publish)
+blackjack_lobby = create_lobby(blackjack_rooms)
+
+
+def create_matched_room(stake: int, user_id: int, opponent_id: int) -> BlackjackRoom:
+    room = BlackjackRoom(
+        "Подбор соперника", stake, user_id, Shoe(settings.blackjack_decks)
+    )
+    room.join(opponent_id)
+    return room
+
+
+def check_not_finished(current_room: BlackjackRoom) -> None:
+    # Moves after the end would also deal more cards than a game may use
+    if current_room.finished:
+        raise HTTPException(status.HTTP_403_FORBIDDEN, detail="Игра окончена.")
+
+
+blackjack_matchmaker = create_matchmaker(
+    blackjack_rooms, create_matched_room, "blackjack"
+)
 
 
 router = APIRouter(prefix="/blackjack")
@@ -67,18 +50,10 @@ async def create_blackjack_room(
     name = data.name
     reward = data.reward
     new_room_id = generate_room_id()
-    blackjack_rooms[new_room_id] = {
-        "name": name,
-        "reward": reward,
-        "going": False,
-        "active_player": randint(0, 1),
-        "players": [request.state.user_id],
-        "hands": {
-            0: [choice(cards_52), choice(cards_52)],
-        },
-        "count": {0: 0},
-        "results": {0: 0},
-    }
+    room = BlackjackRoom(
+        name, reward, request.state.user_id, Shoe(settings.blackjack_decks)
+    )
+    await blackjack_rooms.create(new_room_id, room)
     logger.info(
         f"Пользователь {request.state.user_id} создал комнату блэкджека с наградой {reward}$"
     )
@@ -86,24 +61,55 @@ async def create_blackjack_room(
         {
             "msg": "Комната успешно создана!",
             "room_id": new_room_id,
+            "game_hash": room.shoe.commitment,
         },
         status.HTTP_201_CREATED,
     )
 
 
+@router.post("/match", response_class=JSONResponse)
+async def match_blackjack(request: Request, data: MatchRequest) -> JSONResponse:
+    room_id = await blackjack_matchmaker.match(
+        request.state.user_id, data.stake, settings.match_timeout
+    )
+    if room_id is None:
+        raise HTTPException(
+            status.HTTP_408_REQUEST_TIMEOUT, detail="Соперник не найден."
+        )
+    current_room = await blackjack_rooms.get(room_id)
+    if current_room is None:
+        raise room_not_found(room_id)
+    logger.info(f"Пользователь {request.state.user_id} подобран в комнату {room_id}")
+    return JSONResponse(
+        {
+            "msg": "Соперник найден!",
+            "room_id": room_id,
+            "reward": current_room.reward,
+            "game_hash": current_room.shoe.commitment,
+        }
+    )
+
+
+@router.delete("/match", response_class=JSONResponse)
+async def cancel_blackjack_match(request: Request) -> JSONResponse:
+    if not await blackjack_matchmaker.cancel(request.state.user_id):
+        raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Вы не в очереди.")
+    logger.info(f"Пользователь {request.state.user_id} отменил подбор соперника")
+    return JSONResponse({"msg": "Подбор соперника отменён."})
+
+
 @router.post("/join", response_class=JSONResponse)
 async def join_blackjack_room(request: Request, data: RoomRequest) -> JSONResponse:
-    current_room = blackjack_rooms[data.room_id]
-    if len(current_room["players"]) > 1:
-        logger.info(
-            f"Пользователь {request.state.user_id} попытался присоединиться к заполненной комнате {data.room_id}"
-        )
-        raise HTTPException(status.HTTP_403_FORBIDDEN, detail="Комната заполнена.")
-    current_room["going"] = True
-    current_room["players"].append(request.state.user_id)
-    current_room["hands"][1] = [choice(cards_52), choice(cards_52)]
-    current_room["count"][1] = 0
-    current_room["results"][1] = 0
+    def join(current_room: BlackjackRoom) -> BlackjackRoom:
+        if len(current_room.players) > 1:
+            logger.info(
+                f"Пользователь {request.state.user_id} попытался присоединиться к заполненной комнате {data.room_id}"
+            )
+            raise HTTPException(status.HTTP_403_FORBIDDEN, detail="Комната заполнена.")
+        current_room.join(request.state.user_id)
+        return current_room
+
+    current_room = await blackjack_rooms.update(data.room_id, join)
     logger.info(
         f"Пользователь {request.state.user_id} присоединился к комнате {data.room_id}"
     )
@@ -111,28 +117,27 @@ async def join_blackjack_room(request: Request, data: RoomRequest) -> JSONRespon
         {
             "msg": "Вы успешно присоединились к комнате!",
             "room_id": data.room_id,
-            "name": current_room["name"],
-            "reward": current_room["reward"],
+            "name": current_room.name,
+            "reward": current_room.reward,
+            "game_hash": current_room.shoe.commitment,
         }
     )
 
 
 @router.post("/pass", response_class=JSONResponse)
 async def pass_card(request: Request, data: RoomRequest) -> JSONResponse:
-    if data.room_id not in blackjack_rooms:
-        logger.info(
-            f"Пользователь {request.state.user_id} попытался оставить карту в несуществующей комнате {data.room_id}"
-        )
-        raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Комната не найдена.")
-    current_room = blackjack_rooms[data.room_id]
-    player_idx = current_room["players"].index(request.state.user_id)
-    if current_room["active_player"] != player_idx:
-        logger.info(
-            f"Пользователь {request.state.user_id} пытался оставить карту, но не его ход в комнате {data.room_id}"
-        )
-        raise HTTPException(status.HTTP_401_UNAUTHORIZED, detail="Не ваш ход.")
-    current_room["active_player"] = int(not player_idx)  # Reverse active player
-    current_room["count"][player_idx] += 1
+    def pass_turn(current_room: BlackjackRoom) -> None:
+        check_not_finished(current_room)
+        player_idx = current_room.players.index(request.state.user_id)
+        if current_room.active_player != player_idx:
+            logger.info(
+                f"Пользователь {request.state.user_id} пытался оставить карту, но не его ход в комнате {data.room_id}"
+            )
+            raise HTTPException(status.HTTP_401_UNAUTHORIZED, detail="Не ваш ход.")
+        current_room.active_player = int(not player_idx)  # Reverse active player
+        current_room.count[player_idx] += 1
+
+    await blackjack_rooms.update(data.room_id, pass_turn)
     logger.info(
         f"Пользователь {request.state.user_id} оставил карту в комнате {data.room_id}"
     )
@@ -141,28 +146,27 @@ async def pass_card(request: Request, data: RoomRequest) -> JSONResponse:
 
 @router.post("/take", response_class=JSONResponse)
 async def take_card(request: Request, data: RoomRequest) -> JSONResponse:
-    if data.room_id not in blackjack_rooms:
-        logger.info(
-            f"Пользователь {request.state.user_id} попытался взять карту в несуществующей комнате {data.room_id}"
-        )
-        raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Комната не найдена.")
-    current_room = blackjack_rooms[data.room_id]
-    player_idx = current_room["players"].index(request.state.user_id)
-    if current_room["active_player"] != player_idx:
-        logger.info(
-            f"Пользователь {request.state.user_id} пытался взять карту, но не его ход в комнате {data.room_id}"
-        )
-        raise HTTPException(status.HTTP_401_UNAUTHORIZED, detail="Не ваш ход.")
-    current_room["hands"][player_idx].append(choice(cards_52))
-    player_hand = current_room["hands"][player_idx]
-    if calculate_hand_value(player_hand) > 21:
+    def take(current_room: BlackjackRoom) -> Tuple[List[str], Optional[bool]]:
+        check_not_finished(current_room)
+        player_idx = current_room.players.index(request.state.user_id)
+        if current_room.active_player != player_idx:
+            logger.info(
+                f"Пользователь {request.state.user_id} пытался взять карту, но не его ход в комнате {data.room_id}"
+            )
+            raise HTTPException(status.HTTP_401_UNAUTHORIZED, detail="Не ваш ход.")
+        hand_value = current_room.draw(player_idx)
+        player_hand = current_room.hand(player_idx)
+        if hand_value <= 21:
+            return player_hand, None
         opponent_idx = int(not player_idx)
-        current_room[player_idx] += 1
-        if current_room["count"][player_idx] > current_room["count"][opponent_idx]:
-            current_room["count"][opponent_idx] += 1
-            opponent = True
-        else:
-            opponent = False
+        current_room.results[opponent_idx] += 1
+        if current_room.count[player_idx] > current_room.count[opponent_idx]:
+            current_room.count[opponent_idx] += 1
+            return player_hand, True
+        return player_hand, False
+
+    player_hand, opponent = await blackjack_rooms.update(data.room_id, take)
+    if opponent is not None:
         logger.info(
             f"У пользователя {request.state.user_id} перебор в комнате {data.room_id}"
         )
@@ -182,94 +186,86 @@ async def take_card(request: Request, data: RoomRequest) -> JSONResponse:
 
 @router.get("/updates", response_class=JSONResponse)
 async def get_blackjack_updates(request: Request, data: RoomRequest) -> JSONResponse:
-    if data.room_id not in blackjack_rooms:
+    current_room = await blackjack_rooms.get(data.room_id)
+    if current_room is None:
         logger.info(
             f"Пользователь {request.state.user_id} запросил обновления в несуществующей комнате {data.room_id}"
         )
         raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Комната не найдена.")
-    current_room = blackjack_rooms[data.room_id]
-    if any(item == 3 for item in current_room["results"].values()):
-        self_idx = current_room["players"].index(request.state.user_id)
-        self = current_room["results"][self_idx]
-        opponent = current_room["results"][int(not self_idx)]
-        if self > opponent:
-            logger.info(
-                f"Пользователь {request.state.user_id} выиграл в комнате {data.room_id}"
-            )
-            return JSONResponse({"msg": "Вы выиграли!"})
-        elif self < opponent:
-            logger.info(
-                f"Пользователь {request.state.user_id} проиграл в комнате {data.room_id}"
-            )
-            return JSONResponse({"msg": "Вы проиграли!"})
-        else:
-            logger.info(f"Ничья в комнате {data.room_id}")
-            return JSONResponse({"msg": "Ничья!"})
-    if len(current_room["players"]) < 2:
-        logger.info(
-            f"Противник пользователя {request.state.user_id} вышел из комнаты {data.room_id}"
-        )
-        return JSONResponse(
-            {
-                "msg": "Противник вышел из игры! Вы выиграли!",
-            }
-        )
-    self_idx = current_room["players"].index(request.state.user_id)
-    opponent_idx = int(not self_idx)
+    if request.state.user_id not in current_room.players:
+        raise HTTPException(status.HTTP_401_UNAUTHORIZED, detail="Вы не в игре.")
     logger.info(
         f"Пользователь {request.state.user_id} успешно получил обновления в комнате {data.room_id}"
     )
-    return JSONResponse(
-        {
-            "msg": "Обновления успешно получены.",
-            "active_player": current_room["active_player"] == self_idx,
-            "self": {
-                "hands": current_room["hands"][self_idx],
-                "count": current_room["count"][self_idx],
-                "results": current_room["results"][self_idx],
-            },
-            "opponent": {
-                "hands": current_room["hands"][opponent_idx],
-                "count": current_room["count"][opponent_idx],
-                "results": current_room["results"][opponent_idx],
-            },
-        }
+    return JSONResponse(current_room.view(request.state.user_id))
+
+
+@router.websocket("/ws/{room_id}")
+async def blackjack_room_socket(websocket: WebSocket, room_id: str) -> None:
+    user_id = websocket.state.user_id
+    await serve_websocket(
+        websocket, blackjack_rooms, room_id, lambda room: room.view(user_id)
     )
 
 
+@router.get("/events/{room_id}")
+async def blackjack_room_events(request: Request, room_id: str) -> StreamingResponse:
+    user_id = request.state.user_id
+    return await serve_events(blackjack_rooms, room_id, lambda room: room.view(user_id))
+
+
 @router.get("/rooms", response_class=JSONResponse)
-async def get_blackjack_rooms() -> JSONResponse:
-    available_rooms = [
-        {"room_id": room_id, "name": details["name"], "reward": details["reward"]}
-        for room_id, details in blackjack_rooms.items()
-        if not details["going"]
-    ]
-    return JSONResponse({"rooms": available_rooms})
+async def get_blackjack_rooms(
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    min_reward: Optional[int] = None,
+    max_reward: Optional[int] = None,
+) -> Response:
+    try:
+        body = blackjack_lobby.page(cursor, limit, min_reward, max_reward)
+    except ValueError:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, detail="Неверный курсор.")
+    return Response(body, media_type="application/json")
 
 
 @router.post("/leave", response_class=JSONResponse)
 async def leave_blackjack_room(request: Request, data: RoomRequest) -> JSONResponse:
-    if data.room_id not in blackjack_rooms:
-        logger.info(
-            f"Пользователь {request.state.user_id} пытался выйти из несуществующей комнаты {data.room_id}"
-        )
-        raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Комната не найдена.")
-    current_room = blackjack_rooms[data.room_id]
-    if request.state.user_id not in current_room["players"]:
-        raise HTTPException(status.HTTP_401_UNAUTHORIZED, detail="Вы не в игре.")
-    current_room["players"].remove(request.state.user_id)
+    def leave(current_room: BlackjackRoom) -> int:
+        if request.state.user_id not in current_room.players:
+            raise HTTPException(status.HTTP_401_UNAUTHORIZED, detail="Вы не в игре.")
+        current_room.players.remove(request.state.user_id)
+        return len(current_room.players)
+
+    await blackjack_rooms.update(
+        data.room_id, leave, discard=lambda room: not room.players
+    )
     logger.info(f"Пользователь {request.state.user_id} вышел из комнаты {data.room_id}")
     return JSONResponse({"msg": "Вы вышли из игры!"})
 
 
 @router.get("/reward", response_class=JSONResponse)
 async def get_blackjack_reward(room_id: str) -> JSONResponse:
-    if room_id not in blackjack_rooms:
-        raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Комната не найдена.")
-    current_room = blackjack_rooms[room_id]
+    current_room = await blackjack_rooms.get(room_id)
+    if current_room is None:
+        raise room_not_found(room_id)
     return JSONResponse(
         {
             "msg": "Награда забрана.",
-            "reward": current_room["reward"],
+            "reward": current_room.reward,
+        }
+    )
+
+
+@router.get("/verify", response_class=JSONResponse)
+async def verify_blackjack_shoe(room_id: str) -> JSONResponse:
+    current_room = await blackjack_rooms.get(room_id)
+    if current_room is None:
+        raise room_not_found(room_id)
+    if not current_room.finished:
+        raise HTTPException(status.HTTP_403_FORBIDDEN, detail="Игра ещё не окончена.")
+    return JSONResponse(
+        {
+            "game_hash": current_room.shoe.commitment,
+            **current_room.shoe.reveal(),
         }
     )
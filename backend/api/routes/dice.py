@@ -1,26 +1,51 @@
 from random import randint
+from typing import Optional
 
-from fastapi import APIRouter, HTTPException, Request, status
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, HTTPException, Request, WebSocket, status
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from loguru import logger
 
+from backend.config import settings
 from backend.core.blackjack import generate_room_id
-from backend.domain.games import CreateRoomRequest, RoomRequest
+from backend.core.dice import DiceRoom
+from backend.core.rooms import room_not_found
+from backend.db.matchmaking import create_matchmaker
+from backend.db.rooms import create_room_store
+from backend.db.settlement import DICE_GAME_TYPE, settlement_engine
+from backend.domain.games import CreateRoomRequest, MatchRequest, RoomRequest
+from backend.services.lobby import create_lobby
+from backend.services.room_hub import room_hub, serve_events, serve_websocket
 
-dice_rooms = dict()
+dice_rooms = create_room_store(DiceRoom, "dice")
+settlement_engine.register(dice_rooms, DICE_GAME_TYPE)
+dice_rooms.on_change(room_hub.publish)
+dice_lobby = create_lobby(dice_rooms)
+
+
+def create_matched_room(stake: int, user_id: int, opponent_id: int) -> DiceRoom:
+    room = DiceRoom("Подбор соперника", stake, user_id)
+    room.join(opponent_id)
+    return room
+
+
+dice_matchmaker = create_matchmaker(dice_rooms, create_matched_room, "dice")
 
 
 router = APIRouter(prefix="/dice", tags=["dice"])
 
 
 @router.get("/rooms", response_class=JSONResponse)
-async def get_dice_rooms() -> JSONResponse:
-    available_rooms = [
-        {"room_id": room_id, "name": details["name"], "reward": details["reward"]}
-        for room_id, details in dice_rooms.items()
-        if not details["going"]
-    ]
-    return JSONResponse({"rooms": available_rooms})
+async def get_dice_rooms(
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    min_reward: Optional[int] = None,
+    max_reward: Optional[int] = None,
+) -> Response:
+    try:
+        body = dice_lobby.page(cursor, limit, min_reward, max_reward)
+    except ValueError:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, detail="Неверный курсор.")
+    return Response(body, media_type="application/json")
 
 
 @router.post("/create", response_class=JSONResponse)
@@ -28,18 +53,7 @@ async def create_dice_room(request: Request, data: CreateRoomRequest) -> JSONRes
     new_room_id = generate_room_id()
     name = data.name
     reward = data.reward
-    dice_rooms[new_room_id] = {
-        "name": name,
-        "reward": reward,
-        "going": False,
-        "active_player": randint(0, 1),
-        "players": [request.state.user_id],
-        "hands": {
-            0: 0,
-        },
-        "count": {0: 0},
-        "results": {0: 0},
-    }
+    await dice_rooms.create(new_room_id, DiceRoom(name, reward, request.state.user_id))
     logger.info(
         f"Пользователь {request.state.user_id} создал комнату кубиков с наградой {reward}$"
     )
@@ -51,19 +65,48 @@ async def create_dice_room(request: Request, data: CreateRoomRequest) -> JSONRes
     )
 
 
+@router.post("/match", response_class=JSONResponse)
+async def match_dice(request: Request, data: MatchRequest) -> JSONResponse:
+    room_id = await dice_matchmaker.match(
+        request.state.user_id, data.stake, settings.match_timeout
+    )
+    if room_id is None:
+        raise HTTPException(
+            status.HTTP_408_REQUEST_TIMEOUT, detail="Соперник не найден."
+        )
+    current_room = await dice_rooms.get(room_id)
+    if current_room is None:
+        raise room_not_found(room_id)
+    logger.info(f"Пользователь {request.state.user_id} подобран в комнату {room_id}")
+    return JSONResponse(
+        {
+            "msg": "Соперник найден!",
+            "room_id": room_id,
+            "reward": current_room.reward,
+        }
+    )
+
+
+@router.delete("/match", response_class=JSONResponse)
+async def cancel_dice_match(request: Request) -> JSONResponse:
+    if not await dice_matchmaker.cancel(request.state.user_id):
+        raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Вы не в очереди.")
+    logger.info(f"Пользователь {request.state.user_id} отменил подбор соперника")
+    return JSONResponse({"msg": "Подбор соперника отменён."})
+
+
 @router.post("/join", response_class=JSONResponse)
 async def join_dice_room(request: Request, data: RoomRequest) -> JSONResponse:
-    current_room = dice_rooms[data.room_id]
-    if len(current_room["players"]) > 1:
-        logger.info(
-            f"Пользователь {request.state.user_id} попытался присоединиться к заполненной комнате {data.room_id}"
-        )
-        raise HTTPException(status.HTTP_403_FORBIDDEN, detail="Комната заполнена.")
-    current_room["going"] = True
-    current_room["players"].append(request.state.user_id)
-    current_room["hands"][1] = 0
-    current_room["count"][1] = 0
-    current_room["results"][1] = 0
+    def join(current_room: DiceRoom) -> DiceRoom:
+        if len(current_room.players) > 1:
+            logger.info(
+                f"Пользователь {request.state.user_id} попытался присоединиться к заполненной комнате {data.room_id}"
+            )
+            raise HTTPException(status.HTTP_403_FORBIDDEN, detail="Комната заполнена.")
+        current_room.join(request.state.user_id)
+        return current_room
+
+    current_room = await dice_rooms.update(data.room_id, join)
     logger.info(
         f"Пользователь {request.state.user_id} присоединился к комнате {data.room_id}"
     )
@@ -71,32 +114,29 @@ async def join_dice_room(request: Request, data: RoomRequest) -> JSONResponse:
         {
             "msg": "Вы успешно присоединились к комнате!",
             "room_id": data.room_id,
-            "name": current_room["name"],
-            "reward": current_room["reward"],
+            "name": current_room.name,
+            "reward": current_room.reward,
         }
     )
 
 
 @router.post("/roll", response_class=JSONResponse)
 async def roll_dice(request: Request, data: RoomRequest) -> JSONResponse:
-    current_room = dice_rooms[data.room_id]
-    if current_room["active_player"] != 0:
-        logger.info(
-            f"Пользователь {request.state.user_id} попытался бросить кубики, но не его ход в комнате {data.room_id}"
-        )
-        raise HTTPException(status.HTTP_401_UNAUTHORIZED, detail="Не ваш ход.")
-    player_id = current_room["players"].index(request.state.user_id)
-    current_room["count"][player_id] += 1
-    dice_value = randint(1, 6)
-    current_room["hands"][player_id] = dice_value
-    current_room["active_player"] = int(not player_id)
-    if current_room["count"][0] == current_room["count"][1]:
-        first = current_room["hands"][0]
-        second = current_room["hands"][1]
-        if first > second:
-            current_room["results"][0] += 1
-        elif first < second:
-            current_room["results"][1] += 1
+    def roll(current_room: DiceRoom) -> int:
+        # Rolls after the end would keep counting wins past the last round
+        if current_room.finished:
+            raise HTTPException(status.HTTP_403_FORBIDDEN, detail="Игра окончена.")
+        player_id = current_room.players.index(request.state.user_id)
+        if current_room.active_player != player_id:
+            logger.info(
+                f"Пользователь {request.state.user_id} попытался бросить кубики, но не его ход в комнате {data.room_id}"
+            )
+            raise HTTPException(status.HTTP_401_UNAUTHORIZED, detail="Не ваш ход.")
+        dice_value = randint(1, 6)
+        current_room.roll(player_id, dice_value)
+        return dice_value
+
+    dice_value = await dice_rooms.update(data.room_id, roll)
     logger.info(
         f"Пользователь {request.state.user_id} бросил кубики в комнате {request.state.user_id}"
     )
@@ -105,69 +145,42 @@ async def roll_dice(request: Request, data: RoomRequest) -> JSONResponse:
 
 @router.get("/reward", response_class=JSONResponse)
 async def get_dice_reward(data: RoomRequest) -> JSONResponse:
-    if data.room_id not in dice_rooms:
-        raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Комната не найдена")
-    current_room = dice_rooms[data.room_id]
+    current_room = await dice_rooms.get(data.room_id)
+    if current_room is None:
+        raise room_not_found(data.room_id)
     return JSONResponse(
         {
             "msg": "Награда забрана.",
-            "reward": current_room["reward"],
+            "reward": current_room.reward,
         }
     )
 
 
 @router.get("/updates", response_class=JSONResponse)
 async def get_dice_updates(request: Request, data: RoomRequest) -> JSONResponse:
-    if data.room_id not in dice_rooms:
+    current_room = await dice_rooms.get(data.room_id)
+    if current_room is None:
         logger.info(
             f"Пользователь {request.state.user_id} запросил обновления в несуществующей комнате {data.room_id}"
         )
         raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Комната не найдена")
-    current_room = dice_rooms[data.room_id]
-    if any(item == 3 for item in current_room["results"].values()):
-        self_idx = current_room["players"].index(request.state.user_id)
-        self = current_room["results"][self_idx]
-        opponent = current_room["results"][int(not self_idx)]
-        if self > opponent:
-            logger.info(
-                f"Пользователь {request.state.user_id} выиграл в комнате {data.room_id}"
-            )
-            return JSONResponse({"msg": "Вы выиграли!"})
-        elif self < opponent:
-            logger.info(
-                f"Пользователь {request.state.user_id} проиграл в комнате {data.room_id}"
-            )
-            return JSONResponse({"msg": "Вы проиграли!"})
-        else:
-            logger.info(f"Ничья в комнате {data.room_id}")
-            return JSONResponse({"msg": "Ничья!"})
-    if len(current_room["players"]) < 2:
-        logger.info(
-            f"Противник пользователя {request.state.user_id} вышел из комнаты {data.room_id}"
-        )
-        return JSONResponse(
-            {
-                "msg": "Противник вышел из игры! Вы выиграли!",
-            }
-        )
-    self_idx = current_room["players"].index(request.state.user_id)
-    opponent_idx = int(not self_idx)
+    if request.state.user_id not in current_room.players:
+        raise HTTPException(status.HTTP_401_UNAUTHORIZED, detail="Вы не в игре.")
     logger.info(
         f"Пользователь {request.state.user_id} успешно получил обновления в комнате {data.room_id}"
     )
-    return JSONResponse(
-        {
-            "msg": "Обновления успешно получены.",
-            "active_player": current_room["active_player"] == self_idx,
-            "self": {
-                "hands": current_room["hands"][self_idx],
-                "count": current_room["count"][self_idx],
-                "results": current_room["results"][self_idx],
-            },
-            "opponent": {
-                "hands": current_room["hands"][opponent_idx],
-                "count": current_room["count"][opponent_idx],
-                "results": current_room["results"][opponent_idx],
-            },
-        }
+    return JSONResponse(current_room.view(request.state.user_id))
+
+
+@router.websocket("/ws/{room_id}")
+async def dice_room_socket(websocket: WebSocket, room_id: str) -> None:
+    user_id = websocket.state.user_id
+    await serve_websocket(
+        websocket, dice_rooms, room_id, lambda room: room.view(user_id)
     )
+
+
+@router.get("/events/{room_id}")
+async def dice_room_events(request: Request, room_id: str) -> StreamingResponse:
+    user_id = request.state.user_id
+    return await serve_events(dice_rooms, room_id, lambda room: room.view(user_id))
@@ -7,6 +7,7 @@ from loguru import logger
 from backend.core.blackjack import generate_room_id
 from backend.db.actions import Actions
 from backend.db.session import AsyncSession, get_session
+from backend.db.settlement import BLACKJACK_GAME_TYPE, DICE_GAME_TYPE
 from backend.domain.games import FinishedGameRequest
 from backend.domain.transactions import AmountRequest, MoneyRequest
 
@@ -26,7 +27,7 @@ async def make_game_params(
             "params": {
                 "money": money,
                 "bonus": 1 if all(bonus) else -1,
-                "last_visit": last_visit,
+                "last_visit": last_visit.isoformat(),
             },
         }
     )
@@ -62,6 +63,12 @@ async def create_finished_game(
     session: Annotated[AsyncSession, Depends(get_session)],
 ) -> JSONResponse:
     game_type = data.game_type
+    if game_type in (BLACKJACK_GAME_TYPE, DICE_GAME_TYPE):
+        # Games in rooms are recorded once by the settlement engine
+        raise HTTPException(
+            status.HTTP_400_BAD_REQUEST,
+            detail="Игры в комнатах завершаются автоматически",
+        )
     amount = data.amount
     first_user_id = request.state.user_id
     second_user_id = data.second_user_id
@@ -4,7 +4,7 @@ from fastapi import APIRouter, Depends, Request
 from fastapi.responses import JSONResponse
 
 from backend.db.actions import Actions
-from backend.db.session import AsyncSession, get_session
+from backend.db.session import AsyncSession, get_read_session, get_session
 from backend.domain.games import LotteryBetRequest
 
 router = APIRouter(prefix="/lottery", tags=["lottery"])
@@ -12,7 +12,7 @@ router = APIRouter(prefix="/lottery", tags=["lottery"])
 
 @router.post("/topwinners", response_class=JSONResponse)
 async def get_top_lottery_winners(
-    session: Annotated[AsyncSession, Depends(get_session)],
+    session: Annotated[AsyncSession, Depends(get_read_session)],
 ) -> JSONResponse:
     winners = await Actions(session).get_top_winners()
     return JSONResponse(
@@ -35,7 +35,7 @@ async def make_lottery_deposit(
 
 @router.post("/", response_class=JSONResponse)
 async def get_lottery(
-    session: Annotated[AsyncSession, Depends(get_session)],
+    session: Annotated[AsyncSession, Depends(get_read_session)],
 ) -> JSONResponse:
     end_time, amount = await Actions(session).get_current_lottery()
     return JSONResponse(
@@ -4,9 +4,11 @@ from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.responses import JSONResponse
 from loguru import logger
 
+from backend.api.jwt import token_cache
 from backend.db.actions import Actions
-from backend.db.session import AsyncSession, get_session
+from backend.db.session import AsyncSession, get_pool_stats, get_session
 from backend.domain.transactions import AmountRequest
+from backend.services.scheduler import scheduler
 from backend.services.telegram import get_invitation_link
 
 router = APIRouter(tags=["misc"])
@@ -90,3 +92,21 @@ async def get_invite_link(request: Request) -> JSONResponse:
             "invite_link": invite_link,
         }
     )
+
+
+@router.get("/metrics", response_class=JSONResponse)
+async def get_metrics(
+    request: Request, session: Annotated[AsyncSession, Depends(get_session)]
+) -> JSONResponse:
+    """
+    Get runtime metrics of this worker, admins only
+    """
+    if not await Actions(session).check_admin(request.state.user_id):
+        raise HTTPException(status.HTTP_403_FORBIDDEN, detail="Доступ запрещён")
+    return JSONResponse(
+        {
+            "db_pool": get_pool_stats(),
+            "token_cache": token_cache.stats(),
+            "scheduler": scheduler.stats(),
+        }
+    )
@@ -3,10 +3,11 @@ from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.responses import JSONResponse
-from backend.api.jwt import create_refresh_token, create_access_token
+from backend.api.jwt import create_refresh_token, create_access_token, revoke_tokens
 from loguru import logger
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from backend.config import settings
 from backend.db.actions import Actions
 from backend.db.session import get_session
 from backend.domain.user import CreateUserRequest
@@ -24,7 +25,9 @@ async def login_player(
     if not telegram_id:
         raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    refresh_token = await create_refresh_token(session, telegram_id, timedelta(days=7))
+    refresh_token = await create_refresh_token(
+        session, telegram_id, timedelta(seconds=settings.refresh_token_ttl)
+    )
     access_token = await create_access_token(telegram_id, timedelta(days=1))
     if not refresh_token or not access_token:
         raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -39,6 +42,25 @@ async def login_player(
     return response
 
 
+@router.post("/logout", response_class=JSONResponse)
+async def logout_player(
+    request: Request, session: Annotated[AsyncSession, Depends(get_session)]
+) -> JSONResponse:
+    """
+    Log the player out on every device
+    """
+    await revoke_tokens(session, request.state.user_id)
+    logger.info(f"Пользователь {request.state.user_id} вышел из аккаунта")
+    response = JSONResponse({"msg": "Выход выполнен"})
+    response.delete_cookie(
+        "refresh_token", httponly=True, secure=True, samesite="strict"
+    )
+    response.delete_cookie(
+        "access_token", httponly=True, secure=True, samesite="strict"
+    )
+    return response
+
+
 @router.post("/get", response_class=JSONResponse)
 async def get_player_by_id(
     request: Request, session: Annotated[AsyncSession, Depends(get_session)]
@@ -29,8 +29,60 @@ class Settings(BaseSettings):
     db_host: str = "localhost"
     db_port: int = 5432
     db_name: str
+    db_replica_urls: list[str] = []
+    db_replica_max_lag: float = 5  # seconds
+    db_replica_check_interval: float = 10  # seconds
+
+    # Connection pool
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: float = 5
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    db_statement_cache_size: int = 500
+    db_application_name: str = "kickthedoll"
+    db_statement_timeout: int = 5000  # ms
+
+    # "postgres" shares state between workers over LISTEN/NOTIFY,
+    # "local" keeps it in memory of a single process
+    state_backend: str = "postgres"
+    # "postgres" shares game rooms and the matchmaking queue between workers,
+    # "memory" keeps them in a single process
+    room_backend: str = "postgres"
+    # Rooms unchanged for room_idle_ttl seconds are deleted, at most
+    # room_max_count rooms of each game are kept
+    room_idle_ttl: int = 1800
+    room_max_count: int = 10_000
+    room_reap_interval: int = 60
+    # Decks in the shoe of a blackjack room
+    blackjack_decks: int = 2
+    # Matchmaking pairs stakes differing by at most match_stake_tolerance,
+    # collecting tickets for match_batch_interval seconds before a round
+    match_stake_tolerance: float = 0.1
+    match_batch_interval: float = 0.2
+    match_timeout: int = 30
+    # "coinmarketcap" scrapes coinmarketcap.com, "fixture" reads a saved page
+    # from price_fixture_path
+    price_source: str = "coinmarketcap"
+    price_fixture_path: str = ""
+    price_refresh_interval: int = 60
+    # "auto" picks the fastest installed of selectolax, lxml and html.parser
+    price_parser: str = "auto"
+    # Samples of every coin kept in memory, older ones are read from the table
+    price_history_size: int = 10_080
+    # Guess bets settled per transaction
+    bet_settlement_chunk: int = 5_000
+    # Bets still without a price this many seconds after their time are no
+    # longer scanned; no money is held for an open bet
+    bet_price_grace: int = 86_400
+    # Levels of referrers above a user who get a share of his deposits
+    referral_max_depth: int = 10
 
     jwt_secret: str = ""
+    # Lifetime of refresh tokens, the longest living ones; revocations older
+    # than this are forgotten
+    refresh_token_ttl: int = 604_800
+    token_cache_size: int = 10_000
 
     # TON
     ton_api_key: str = ""
@@ -39,11 +91,11 @@ class Settings(BaseSettings):
 
     @property
     def db_url(self) -> str:
-        return f"postgresql+asyncpg://{settings.db_user}:{settings.db_password}@{settings.db_host}:{settings.db_port}/{settings.db_name}"
+        return f"postgresql+asyncpg://{self.db_user}:{self.db_password}@{self.db_host}:{self.db_port}/{self.db_name}"
 
     @property
     def sync_db_url(self) -> str:
-        return f"postgresql+psycopg2://{settings.db_user}:{settings.db_password}@{settings.db_host}:{settings.db_port}/{settings.db_name}"
+        return f"postgresql+psycopg2://{self.db_user}:{self.db_password}@{self.db_host}:{self.db_port}/{self.db_name}"
 
 
 settings = Settings()
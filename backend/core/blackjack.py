@@ -1,29 +1,108 @@
-from typing import List
+from typing import Any, Dict, List
 from uuid import uuid4
 
+from backend.core.rooms import GameRoom
+from backend.core.shoe import Shoe
 
-def calculate_hand_value(hand: List[str]) -> int:
-    hand_value = sum(parse_card(card) for card in hand)
-    hand_value = adjust_for_ace(hand, hand_value)
-    return hand_value
+# Cards are ints: rank index * 4 + suit index
+RANKS = ("2", "3", "4", "5", "6", "7", "8", "9", "10", "j", "q", "k", "a")
+SUITS = ("h", "d", "c", "s")
+ACE = RANKS.index("a")
 
+CARD_NAMES = tuple(f"{rank}_{suit}" for rank in RANKS for suit in SUITS)
+CARD_VALUES = tuple(
+    11 if rank == "a" else 10 if rank in ("j", "q", "k") else int(rank)
+    for rank in RANKS
+    for _ in SUITS
+)
 
-def parse_card(card: str) -> int:
-    rank = card.split("_")[0]
-    if rank == "a":
-        return 11
-    elif rank in ["k", "q", "j"]:
-        return 10
-    else:
-        return int(rank)
 
+# Most cards a game can deal: a hand is bust after at most 22 cards (every
+# card counts at least 1) and a game ends after 5 busts, so both first busts
+# and 3 more busting draws
+MAX_GAME_CARDS = 22 * 2 + 3
 
-def adjust_for_ace(hand: List[str], hand_value: int) -> int:
-    aces = [card for card in hand if card.startswith("a")]
-    while hand_value > 21 and aces:
-        hand_value -= 10
-        aces.pop()
-    return hand_value
+
+def card_name(card: int) -> str:
+    return CARD_NAMES[card]
+
+
+class BlackjackRoom(GameRoom):
+    """
+    Blackjack room dealing from its own shoe and keeping a running value
+    and count of soft aces per hand, so scoring a drawn card is O(1)
+    """
+
+    __slots__ = ("shoe", "hands", "totals", "aces")
+
+    def __init__(self, name: str, reward: int, user_id: int, shoe: Shoe):
+        if shoe.remaining < MAX_GAME_CARDS:
+            raise ValueError(f"Shoe must hold at least {MAX_GAME_CARDS} cards")
+        super().__init__(name, reward, user_id)
+        self.shoe = shoe
+        self.hands: List[List[int]] = [[]]
+        self.totals: List[int] = [0]
+        self.aces: List[int] = [0]
+        self.deal(0)
+
+    def join(self, user_id: int) -> None:
+        super().join(user_id)
+        self.hands.append([])
+        self.totals.append(0)
+        self.aces.append(0)
+        self.deal(len(self.players) - 1)
+
+    def deal(self, player_idx: int) -> None:
+        self.add_card(player_idx, self.shoe.draw())
+        self.add_card(player_idx, self.shoe.draw())
+
+    def draw(self, player_idx: int) -> int:
+        """
+        Draw card from the shoe to the hand of the player
+
+        Args:
+            player_idx (int): Player index
+
+        Returns:
+            int: Value of the hand
+        """
+        return self.add_card(player_idx, self.shoe.draw())
+
+    def add_card(self, player_idx: int, card: int) -> int:
+        """
+        Add card to the hand of the player
+
+        Args:
+            player_idx (int): Player index
+            card (int): Card
+
+        Returns:
+            int: Value of the hand
+        """
+        self.hands[player_idx].append(card)
+        total = self.totals[player_idx] + CARD_VALUES[card]
+        aces = self.aces[player_idx] + (card >> 2 == ACE)
+        # Soft aces count as 1 instead of 11 while the hand is over 21
+        while total > 21 and aces:
+            total -= 10
+            aces -= 1
+        self.totals[player_idx] = total
+        self.aces[player_idx] = aces
+        return total
+
+    def hand(self, player_idx: int) -> List[str]:
+        return [CARD_NAMES[card] for card in self.hands[player_idx]]
+
+    def to_state(self) -> Dict[str, Any]:
+        state = super().to_state()
+        state["shoe"] = self.shoe.to_state()
+        return state
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]):
+        room = super().from_state(state)
+        room.shoe = Shoe.from_state(state["shoe"])
+        return room
 
 
 def generate_room_id() -> str:
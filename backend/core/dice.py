@@ -0,0 +1,40 @@
+from typing import List
+
+from backend.core.rooms import GameRoom
+
+
+class DiceRoom(GameRoom):
+    """
+    Dice room, the hand of a player is the value of the last roll
+    """
+
+    __slots__ = ("hands",)
+
+    def __init__(self, name: str, reward: int, user_id: int):
+        super().__init__(name, reward, user_id)
+        self.hands: List[int] = [0]
+
+    def join(self, user_id: int) -> None:
+        super().join(user_id)
+        self.hands.append(0)
+
+    def roll(self, player_idx: int, dice_value: int) -> None:
+        """
+        Record roll of the player, a round is scored once both have rolled
+
+        Args:
+            player_idx (int): Player index
+            dice_value (int): Value of the dice
+        """
+        self.count[player_idx] += 1
+        self.hands[player_idx] = dice_value
+        self.active_player = int(not player_idx)
+        if self.count[0] == self.count[1]:
+            first, second = self.hands
+            if first > second:
+                self.results[0] += 1
+            elif first < second:
+                self.results[1] += 1
+
+    def hand(self, player_idx: int) -> int:
+        return self.hands[player_idx]
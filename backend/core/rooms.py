@@ -0,0 +1,400 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from random import randint
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Generic,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+)
+
+from fastapi import HTTPException, status
+from loguru import logger
+
+
+def room_not_found(room_id: str) -> HTTPException:
+    logger.info(f"Комната {room_id} не найдена")
+    return HTTPException(status.HTTP_404_NOT_FOUND, detail="Комната не найдена.")
+
+
+class GameRoom(ABC):
+    """
+    Room of a two-player game, player 0 is the one who created it.
+
+    Per-player fields are lists indexed by the player. Subclasses add the
+    fields of their game to ``__slots__``; ``to_state``/``from_state``
+    convert every slot to and from plain JSON-serializable values.
+    """
+
+    __slots__ = (
+        "name",
+        "reward",
+        "going",
+        "active_player",
+        "players",
+        "count",
+        "results",
+        "created_at",
+    )
+
+    def __init__(self, name: str, reward: int, user_id: int):
+        self.name = name
+        self.reward = reward
+        self.going = False
+        self.created_at = time.time()
+        self.active_player = randint(0, 1)
+        self.players: List[int] = [user_id]
+        self.count: List[int] = [0]
+        self.results: List[int] = [0]
+
+    def join(self, user_id: int) -> None:
+        self.going = True
+        self.players.append(user_id)
+        self.count.append(0)
+        self.results.append(0)
+
+    @property
+    def finished(self) -> bool:
+        return any(item == 3 for item in self.results) or (
+            self.going and len(self.players) < 2
+        )
+
+    @abstractmethod
+    def hand(self, player_idx: int) -> Any:
+        """
+        Hand of the player as it is sent to clients
+        """
+
+    @classmethod
+    def fields(cls) -> Tuple[str, ...]:
+        return tuple(
+            field
+            for klass in reversed(cls.__mro__)
+            for field in klass.__dict__.get("__slots__", ())
+        )
+
+    def to_state(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in self.fields()}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]):
+        room = cls.__new__(cls)
+        for field in cls.fields():
+            setattr(room, field, state[field])
+        return room
+
+    def view(self, user_id: int) -> Dict[str, Any]:
+        """
+        Room as seen by the player, shared by polling and subscriptions
+
+        Args:
+            user_id (int): Telegram id of the player
+
+        Returns:
+            Dict[str, Any]: Result of the game or state of both players
+        """
+        if user_id not in self.players:
+            return {"msg": "Вы не в игре."}
+        self_idx = self.players.index(user_id)
+        if any(item == 3 for item in self.results):
+            own = self.results[self_idx]
+            opponent = self.results[int(not self_idx)]
+            if own > opponent:
+                return {"msg": "Вы выиграли!"}
+            elif own < opponent:
+                return {"msg": "Вы проиграли!"}
+            return {"msg": "Ничья!"}
+        if not self.going:
+            return {"msg": "Ожидание противника."}
+        if len(self.players) < 2:
+            return {"msg": "Противник вышел из игры! Вы выиграли!"}
+        opponent_idx = int(not self_idx)
+        return {
+            "msg": "Обновления успешно получены.",
+            "active_player": self.active_player == self_idx,
+            "self": {
+                "hands": self.hand(self_idx),
+                "count": self.count[self_idx],
+                "results": self.results[self_idx],
+            },
+            "opponent": {
+                "hands": self.hand(opponent_idx),
+                "count": self.count[opponent_idx],
+                "results": self.results[opponent_idx],
+            },
+        }
+
+
+R = TypeVar("R", bound=GameRoom)
+T = TypeVar("T")
+# Called with room id, its new version and the room, None once it is deleted
+RoomListener = Callable[[str, int, Optional[GameRoom]], Awaitable[None]]
+
+
+class RoomStore(ABC, Generic[R]):
+    """
+    Storage of game rooms.
+
+    Every change goes through ``update``, which applies ``mutate`` to the
+    room and stores it only if nobody else changed the room in between
+    (compare-and-set on the room's version), retrying otherwise. ``mutate``
+    may raise to abort the change, so it has to check everything before it
+    changes the room. Stored changes are passed to listeners registered
+    with ``on_change``.
+
+    Creating or changing a room counts as using it; ``reap`` deletes rooms
+    unused for too long and keeps at most ``max_rooms`` most recently used.
+    Backends implement every abstract method.
+    """
+
+    def __init__(self, room_type: Type[R]):
+        self.room_type = room_type
+        self.max_rooms: Optional[int] = None
+        self._listeners: List[RoomListener] = []
+
+    def on_change(self, listener: RoomListener) -> None:
+        self._listeners.append(listener)
+
+    async def _changed(
+        self, room_id: str, version: int, room: Optional[GameRoom]
+    ) -> None:
+        for listener in self._listeners:
+            try:
+                await listener(room_id, version, room)
+            except Exception as e:
+                logger.error(
+                    f"Ошибка оповещения о комнате {room_id}: {e.__class__.__name__}: {e}"
+                )
+
+    @abstractmethod
+    async def create(self, room_id: str, room: R) -> None:
+        """
+        Store new room
+
+        Args:
+            room_id (str): Room id
+            room (R): Room
+        """
+
+    @abstractmethod
+    async def get(self, room_id: str) -> Optional[R]:
+        """
+        Get room for reading, changes to it are not stored
+
+        Args:
+            room_id (str): Room id
+
+        Returns:
+            Optional[R]: Room or None if it does not exist
+        """
+
+    @abstractmethod
+    async def update(
+        self,
+        room_id: str,
+        mutate: Callable[[R], T],
+        discard: Optional[Callable[[R], bool]] = None,
+    ) -> T:
+        """
+        Atomically change room
+
+        Args:
+            room_id (str): Room id
+            mutate (Callable[[R], T]): Changes the room in place, may be
+                called several times on conflicts
+            discard (Optional[Callable[[R], bool]]): Delete the room instead
+                of storing it when true for the changed room, as part of the
+                same compare-and-set
+
+        Raises:
+            HTTPException: 404 if the room does not exist
+
+        Returns:
+            T: Result of ``mutate``
+        """
+
+    @abstractmethod
+    async def delete(self, room_id: str) -> None:
+        """
+        Delete room if it exists
+
+        Args:
+            room_id (str): Room id
+        """
+
+    @abstractmethod
+    async def open_rooms(self) -> List[Tuple[str, R]]:
+        """
+        Get rooms waiting for the second player
+
+        Returns:
+            List[Tuple[str, R]]: Room ids and rooms
+        """
+
+    @abstractmethod
+    async def finished_rooms(self) -> List[Tuple[str, R]]:
+        """
+        Get rooms whose game is over
+
+        Returns:
+            List[Tuple[str, R]]: Room ids and rooms
+        """
+
+    @abstractmethod
+    async def reap(self, idle_ttl: float) -> int:
+        """
+        Delete rooms unused for ``idle_ttl`` seconds and least recently used
+        rooms above ``max_rooms``
+
+        Args:
+            idle_ttl (float): Seconds since the last change
+
+        Returns:
+            int: Number of deleted rooms
+        """
+
+
+class MemoryRoomStore(RoomStore):
+    """
+    Rooms in memory of a single process, changed in place.
+
+    Rooms are kept in order of last use, so both idle and over-the-cap rooms
+    are evicted from the front, and rooms waiting for the second player are
+    indexed separately so listing them does not scan running games.
+    """
+
+    def __init__(self, room_type: Type[R]):
+        super().__init__(room_type)
+        # room_id -> (version, room, last use), least recently used first
+        self._rooms: OrderedDict[str, Tuple[int, R, float]] = OrderedDict()
+        self._open: Dict[str, R] = {}
+
+    async def create(self, room_id: str, room: R) -> None:
+        self._rooms[room_id] = (1, room, time.monotonic())
+        self._index(room_id, room)
+        await self._changed(room_id, 1, room)
+        if self.max_rooms is not None:
+            while len(self._rooms) > self.max_rooms:
+                await self.delete(next(iter(self._rooms)))
+
+    async def get(self, room_id: str) -> Optional[R]:
+        entry = self._rooms.get(room_id)
+        return entry[1] if entry else None
+
+    async def update(
+        self,
+        room_id: str,
+        mutate: Callable[[R], T],
+        discard: Optional[Callable[[R], bool]] = None,
+    ) -> T:
+        entry = self._rooms.get(room_id)
+        if entry is None:
+            raise room_not_found(room_id)
+        version, room, _ = entry
+        result = mutate(room)
+        if discard is not None and discard(room):
+            await self.delete(room_id)
+            return result
+        self._rooms[room_id] = (version + 1, room, time.monotonic())
+        self._rooms.move_to_end(room_id)
+        self._index(room_id, room)
+        await self._changed(room_id, version + 1, room)
+        return result
+
+    async def delete(self, room_id: str) -> None:
+        self._open.pop(room_id, None)
+        if self._rooms.pop(room_id, None):
+            await self._changed(room_id, 0, None)
+
+    async def open_rooms(self) -> List[Tuple[str, R]]:
+        return list(self._open.items())
+
+    async def finished_rooms(self) -> List[Tuple[str, R]]:
+        return [
+            (room_id, room)
+            for room_id, (_, room, _) in self._rooms.items()
+            if room.finished
+        ]
+
+    async def reap(self, idle_ttl: float) -> int:
+        deadline = time.monotonic() - idle_ttl
+        reaped = 0
+        for room_id, (_, _, used_at) in list(self._rooms.items()):
+            over_cap = self.max_rooms is not None and len(self._rooms) > self.max_rooms
+            if used_at >= deadline and not over_cap:
+                break
+            await self.delete(room_id)
+            reaped += 1
+        return reaped
+
+    def _index(self, room_id: str, room: R) -> None:
+        if room.going:
+            self._open.pop(room_id, None)
+        else:
+            self._open[room_id] = room
+
+
+class RoomManager:
+    """
+    Lifecycle of rooms of all registered stores: a background task reaps
+    rooms idle for ``idle_ttl`` seconds every ``interval`` seconds and every
+    store is capped at ``max_rooms`` rooms. Callbacks registered with
+    ``on_reap`` run before every reap; if one fails nothing is reaped.
+    """
+
+    def __init__(self, idle_ttl: float, max_rooms: int, interval: float = 60):
+        self.idle_ttl = idle_ttl
+        self.max_rooms = max_rooms
+        self.interval = interval
+        self._stores: List[RoomStore] = []
+        self._before_reap: List[Callable[[], Awaitable[Any]]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def register(self, store: RoomStore) -> None:
+        store.max_rooms = self.max_rooms
+        self._stores.append(store)
+
+    def on_reap(self, callback: Callable[[], Awaitable[Any]]) -> None:
+        self._before_reap.append(callback)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def reap(self) -> int:
+        for callback in self._before_reap:
+            try:
+                await callback()
+            except Exception as e:
+                logger.error(
+                    f"Удаление старых комнат отложено: {e.__class__.__name__}: {e}"
+                )
+                return 0
+        reaped = 0
+        for store in self._stores:
+            try:
+                reaped += await store.reap(self.idle_ttl)
+            except Exception as e:
+                logger.error(
+                    f"Не удалось удалить старые комнаты: {e.__class__.__name__}: {e}"
+                )
+        return reaped
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            if reaped := await self.reap():
+                logger.info(f"Удалено неактивных комнат: {reaped}")
@@ -0,0 +1,68 @@
+from hashlib import sha256
+from random import Random, SystemRandom
+from typing import Any, Dict, Optional
+
+# Used by shoes created without an explicit RNG, replace with a seeded
+# random.Random for tests and simulations
+default_rng: Random = SystemRandom()
+
+
+def set_default_rng(rng: Random) -> None:
+    global default_rng
+    default_rng = rng
+
+
+class Shoe:
+    """
+    Several 52-card decks shuffled once and dealt by advancing an index.
+
+    Cards are kept as ``bytes`` so a draw is an index increment without any
+    allocation. The commitment is sha256 of a random salt and the whole card
+    order, published before the first card is dealt; once the game is over
+    ``reveal`` gives the salt and the order so players can check that the
+    cards were not changed on the way. The shoe is never reshuffled, as that
+    would replace the published commitment: it has to hold every card of a
+    game, and drawing from an exhausted shoe raises ``IndexError``.
+    """
+
+    __slots__ = ("cards", "position", "salt", "commitment")
+
+    def __init__(self, decks: int = 1, rng: Optional[Random] = None):
+        rng = rng or default_rng
+        cards = list(range(52)) * decks
+        rng.shuffle(cards)
+        self.cards = bytes(cards)
+        self.position = 0
+        self.salt = f"{rng.getrandbits(128):032x}"
+        self.commitment = sha256(self.salt.encode() + self.cards).hexdigest()
+
+    @property
+    def remaining(self) -> int:
+        return len(self.cards) - self.position
+
+    def draw(self) -> int:
+        if not self.remaining:
+            raise IndexError("Shoe is exhausted")
+        card = self.cards[self.position]
+        self.position += 1
+        return card
+
+    def reveal(self) -> Dict[str, Any]:
+        return {"salt": self.salt, "cards": list(self.cards)}
+
+    def to_state(self) -> Dict[str, Any]:
+        return {
+            "cards": self.cards.hex(),
+            "position": self.position,
+            "salt": self.salt,
+            "commitment": self.commitment,
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "Shoe":
+        shoe = cls.__new__(cls)
+        shoe.cards = bytes.fromhex(state["cards"])
+        shoe.position = state["position"]
+        shoe.salt = state["salt"]
+        shoe.commitment = state["commitment"]
+        return shoe
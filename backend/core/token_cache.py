@@ -0,0 +1,126 @@
+import time
+from collections import OrderedDict
+from hashlib import sha256
+from typing import Dict, Optional, Tuple
+
+
+class VerifiedTokenCache:
+    """
+    In-process LRU of already verified access tokens.
+
+    Entries are keyed by the SHA-256 digest of the raw token, so the token
+    itself is never kept in memory, and live no longer than the token's own
+    ``exp``. A per-user revocation epoch invalidates every cached token that
+    was issued before the user's tokens were revoked. Epochs are kept for
+    ``revocation_ttl`` seconds, the longest token lifetime: every token
+    issued before an older epoch has already expired.
+    """
+
+    def __init__(self, max_size: int = 10_000, revocation_ttl: float = 604_800):
+        self.max_size = max_size
+        self.revocation_ttl = revocation_ttl
+        self._entries: OrderedDict[bytes, Tuple[int, float, float]] = OrderedDict()
+        self._revoked_after: Dict[int, float] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def digest(token: str) -> bytes:
+        return sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[int]:
+        """
+        Get user id of a cached token
+
+        Args:
+            token (str): Raw access token
+
+        Returns:
+            Optional[int]: User id if token is cached and still valid, None otherwise
+        """
+        key = self.digest(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        user_id, iat, exp = entry
+        if exp <= time.time() or iat < self._revoked_after.get(user_id, 0):
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return user_id
+
+    def put(self, token: str, user_id: int, iat: float, exp: float) -> None:
+        """
+        Remember a verified token until its expiration
+
+        Args:
+            token (str): Raw access token
+            user_id (int): Owner of the token
+            iat (float): Issued-at unix timestamp
+            exp (float): Expiration unix timestamp
+        """
+        if iat < self._revoked_after.get(user_id, 0):
+            return
+        key = self.digest(token)
+        self._entries[key] = (user_id, iat, exp)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def revoke(self, user_id: int, at: Optional[float] = None) -> None:
+        """
+        Bump revocation epoch of the user, so every token issued before is rejected
+
+        Args:
+            user_id (int): User id
+            at (Optional[float]): Unix timestamp of revocation, now by default
+        """
+        at = time.time() if at is None else at
+        # Epochs are kept in the order of revocation, so expired ones are in front
+        self._revoked_after.pop(user_id, None)
+        if at >= time.time() - self.revocation_ttl:
+            self._revoked_after[user_id] = at
+        self.prune()
+
+    def prune(self) -> int:
+        """
+        Forget revocation epochs older than ``revocation_ttl``
+
+        Returns:
+            int: Number of forgotten epochs
+        """
+        cutoff = time.time() - self.revocation_ttl
+        pruned = 0
+        while self._revoked_after:
+            user_id, at = next(iter(self._revoked_after.items()))
+            if at >= cutoff:
+                break
+            del self._revoked_after[user_id]
+            pruned += 1
+        return pruned
+
+    def is_revoked(self, user_id: int, iat: float) -> bool:
+        return iat < self._revoked_after.get(user_id, 0)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "revocations": len(self._revoked_after),
+        }
@@ -1,22 +1,42 @@
+import time
 from datetime import UTC, datetime, timedelta
 from typing import List, Optional, Tuple, cast
-from uuid import uuid4
 
-import aiohttp
-from bs4 import BeautifulSoup
 from fastapi import HTTPException
 from backend.services.telegram import get_telegram_vars
 from loguru import logger
-from sqlalchemy import delete, exists, func, insert, select, update
+from sqlalchemy import (
+    BIGINT,
+    case,
+    delete,
+    exists,
+    func,
+    insert,
+    literal,
+    or_,
+    select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from backend.db.session import get_session
+from backend.config import settings
+from backend.db.bets import settle_due_bets
+from backend.db.counts import row_counts
+from backend.db.leaderboard import leaderboard
+from backend.db.pots import pot_cache
+from backend.db.prices import price_history
+from backend.db.pagination import Page, seek
+from backend.db.state import state_store
 
 from .models import (
     Bets,
     FinishedGame,
+    LotteryPots,
     LotteryTransactions,
+    ReferralClosure,
     Referrals,
+    ReferralStats,
     RefreshToken,
     Transactions,
     Users,
@@ -24,71 +44,124 @@ from .models import (
 
 end_time = datetime.now(UTC)
 
+# Id of the current lottery round, its pot is kept in lottery_pots
+round_id = 0
+
 works_time = datetime.now(UTC)
 
+# Monotonic deadline of technical works, checked on every request
+works_deadline = time.monotonic()
+
+# Keys of the shared state, see backend/db/state.py
+WORKS_TIME_KEY = "works_time"
+LOTTERY_KEY = "lottery"
+BONUS_RESET_KEY = "bonus_reset"
+
+BONUSES_PER_DAY = 3
+
+
+def parse_date(date: str) -> datetime:
+    return datetime.strptime(date, "%d:%m:%Y.%H:%M:%S").astimezone(UTC)
+
+
+def set_works_time(date: datetime) -> None:
+    global works_time, works_deadline
+    works_time = date
+    works_deadline = time.monotonic() + (date - datetime.now(UTC)).total_seconds()
+
+
+def set_lottery(value: dict) -> None:
+    global end_time, round_id
+    end_time = datetime.fromisoformat(value["end_time"])
+    round_id = value["round_id"]
+
+
+def bonus_reset_at() -> datetime:
+    """
+    Start of the current day of bot bonuses, naive UTC
+    """
+    value = state_store.get(BONUS_RESET_KEY)
+    if value is not None:
+        return datetime.fromisoformat(value).astimezone(UTC).replace(tzinfo=None)
+    return datetime.now(UTC).replace(
+        hour=0, minute=0, second=0, microsecond=0, tzinfo=None
+    )
+
+
+state_store.watch(
+    WORKS_TIME_KEY, lambda value: set_works_time(datetime.fromisoformat(value))
+)
+state_store.watch(LOTTERY_KEY, set_lottery)
+
 
 class TechActions:
-    def start_works(self, date: str) -> bool:
-        global works_time
+    """
+    Technical works. The deadline is shared by all workers through the state
+    store while ``is_tech_works`` reads only the local copy.
+    """
+
+    async def save_works_time(self, date: datetime) -> None:
+        await state_store.set(WORKS_TIME_KEY, date.isoformat())
+
+    async def start_works(self, date: str) -> bool:
         try:
-            works_time = datetime.strptime(date, "%d:%m:%Y.%H:%M:%S").astimezone(UTC)
+            works_until = parse_date(date)
         except ValueError:
-            works_time = datetime.now(UTC)
+            await self.save_works_time(datetime.now(UTC))
             return False
+        await self.save_works_time(works_until)
         return True
 
     def is_tech_works(self) -> bool:
-        return works_time > datetime.now(UTC)
+        return works_deadline > time.monotonic()
 
-    def create_tech_works(self, date: str) -> bool:
-        global works_time
+    async def create_tech_works(self, date: str) -> bool:
         try:
-            works_time = datetime.strptime(date, "%d:%m:%Y.%H:%M:%S").astimezone(UTC)
+            works_until = parse_date(date)
         except ValueError:
             return False
+        await self.save_works_time(works_until)
         return True
 
-    def change_date_tech_works(self, date: str) -> bool:
-        global works_time
-        save_time = works_time
-        try:
-            works_time = datetime.strptime(date, "%d:%m:%Y.%H:%M:%S").astimezone(UTC)
-        except ValueError:
-            works_time = save_time
-            return False
-        return True
+    async def change_date_tech_works(self, date: str) -> bool:
+        return await self.create_tech_works(date)
 
-    def end_tech_works(self) -> bool:
-        global works_time
-        works_time = datetime.now(UTC)
+    async def end_tech_works(self) -> bool:
+        await self.save_works_time(datetime.now(UTC))
         return True
 
 
 class LotteryActions:
+    """
+    Lottery end time and round, shared by all workers through the state store
+    """
+
+    async def save_lottery(self, date: datetime, round_id: int) -> None:
+        await state_store.set(
+            LOTTERY_KEY, {"end_time": date.isoformat(), "round_id": round_id}
+        )
+
     def is_current_lottery(self) -> bool:
         return end_time > datetime.now(UTC)
 
-    def create_lottery(self, date: str) -> bool:
-        global end_time
+    async def create_lottery(self, date: str) -> bool:
         try:
-            end_time = datetime.strptime(date, "%d:%m:%Y.%H:%M:%S").astimezone(UTC)
+            lottery_end = parse_date(date)
         except ValueError:
             return False
+        await self.save_lottery(lottery_end, int(time.time()))
         return True
 
-    def close_lottery(self) -> bool:
-        global end_time
-        end_time = datetime.now(UTC)
+    async def close_lottery(self) -> bool:
+        await self.save_lottery(datetime.now(UTC), round_id)
         return True
 
-    def change_date_lottery(self, date: str) -> bool:
-        global end_time
-        save_time = end_time
+    async def change_date_lottery(self, date: str) -> bool:
         try:
-            end_time = datetime.strptime(date, "%d:%m:%Y.%H:%M:%S").astimezone(UTC)
+            lottery_end = parse_date(date)
         except ValueError:
-            end_time = save_time
             return False
+        await self.save_lottery(lottery_end, round_id)
         return True
 
 
@@ -128,21 +201,30 @@ class Actions:
 
         return telegram_id
 
-    async def get_top_winners(self) -> List[Tuple[str, float, int]]:
+    async def get_top_winners(self) -> List[Tuple[str, float, float]]:
         return await self.get_top_lottery_transactions()
 
     async def make_deposit(self, user_id: int, multiplier: float, amount: float):
-        await self.insert_lottery_transaction(user_id, multiplier, amount)
+        transaction_id = await self.insert_lottery_transaction(
+            user_id, multiplier, amount
+        )
+        await self.session.commit()
+        if transaction_id:
+            row_counts.add(LotteryTransactions)
+            pot_cache.invalidate(round_id)
+        if transaction_id and leaderboard.could_enter(amount):
+            leaderboard.offer(
+                transaction_id, await self.get_username(user_id), multiplier, amount
+            )
 
     async def get_current_lottery(self) -> Tuple[datetime, float]:
-        global end_time
         if LotteryActions().is_current_lottery():
             return end_time, await self.get_lottery_transactions_sum()
         return datetime.now(UTC), 0
 
     async def insert_lottery_transaction(
         self, user_id: int, multiplier: float, amount: float
-    ) -> None:
+    ) -> Optional[int]:
         """
         Insert lottery transaction
 
@@ -150,22 +232,29 @@ class Actions:
             user_id (int): User id
             multiplier (float): Multiplier
             amount (float): Amount
+
+        Returns:
+            Optional[int]: Id of the lottery transaction if it was inserted
         """
-        new_id = str(uuid4())
         if multiplier > 1:
             got = (amount * multiplier) - amount
             await self.add_user_money(user_id, got)
-            await self.session.execute(
-                insert(LotteryTransactions).values(
-                    transaction_id=new_id,
+            result = await self.session.execute(
+                insert(LotteryTransactions)
+                .values(
+                    round_id=round_id,
                     telegram_id=user_id,
                     multiplier=multiplier,
                     amount=amount,
                     created_at=datetime.now(UTC),
                 )
+                .returning(LotteryTransactions.id)
             )
+            await pot_cache.add(self.session, round_id, got, amount)
+            return result.scalar_one()
         else:
             await self.minus_user_money(user_id, amount)
+            return None
 
     async def get_username(self, user_id: int) -> str:
         """
@@ -211,45 +300,22 @@ class Actions:
 
     async def get_lottery_transactions_sum(self) -> float:
         """
-        Get sum of all lottery transactions
+        Get pot of the current lottery round
 
         Returns:
-            float: Sum of all lottery transactions
+            float: Sum of winnings of the current round
         """
-        query = select(
-            func.sum(
-                (LotteryTransactions.amount * LotteryTransactions.multiplier)
-                - LotteryTransactions.amount
-            )
-        ).select_from(LotteryTransactions)
-        result = await self.session.execute(query)
-        total = result.scalar()
-        return total or 0
+        pot, _ = await pot_cache.get(self.session, round_id)
+        return pot
 
-    async def get_top_lottery_transactions(self) -> List[Tuple[str, float, int]]:
+    async def get_top_lottery_transactions(self) -> List[Tuple[str, float, float]]:
         """
-        Get top lottery transactions
+        Get top lottery transactions, served from the in-memory leaderboard
 
         Returns:
-            List[Tuple[str, float, int]]: List of tuples with username, multiplier and bet
+            List[Tuple[str, float, float]]: List of tuples with username, multiplier and bet
         """
-        query = (
-            select(
-                LotteryTransactions.telegram_id,
-                LotteryTransactions.multiplier,
-                LotteryTransactions.amount,
-            )
-            .order_by(LotteryTransactions.amount.desc())
-            .limit(10)
-        )
-        result = await self.session.execute(query)
-        rows = result.all()
-        top_transactions = [
-            (await self.get_username(user_id), multiplier, amount)
-            for user_id, multiplier, amount in rows
-        ]
-
-        return top_transactions
+        return await leaderboard.get(self.session)
 
     async def add_user_wallet(self, telegram_id: int, wallet_address: str) -> bool:
         """
@@ -304,10 +370,8 @@ class Actions:
         Returns:
             int: Count of referrals
         """
-        query = (
-            select(func.count())
-            .select_from(Referrals)
-            .where(Referrals.referrer_id == user_id)
+        query = select(ReferralStats.referrals).where(
+            ReferralStats.referrer_id == user_id
         )
         result = await self.session.execute(query)
         count = result.scalar()
@@ -324,18 +388,26 @@ class Actions:
             float: Amount of reward
         """
         query = (
-            select(func.sum(Referrals.bonus))
-            .select_from(Referrals)
-            .where(Referrals.referrer_id == user_id)
+            select(ReferralStats.pending_bonus)
+            .where(ReferralStats.referrer_id == user_id)
+            .with_for_update()
         )
         result = await self.session.execute(query)
-        count = result.scalar() or 0
+        reward = result.scalar() or 0
+        if not reward:
+            return 0
+        await self.session.execute(
+            update(ReferralStats)
+            .where(ReferralStats.referrer_id == user_id)
+            .values(pending_bonus=0)
+        )
         query = (
             update(Referrals).where(Referrals.referrer_id == user_id).values(bonus=0)
         )
         # TODO: money to user
         await self.session.execute(query)
-        return count
+        await self.session.commit()
+        return reward
 
     async def get_referral_reward(self, user_id: int) -> float:
         """
@@ -347,10 +419,8 @@ class Actions:
         Returns:
             float: Amount of reward
         """
-        query = (
-            select(func.sum(Referrals.bonus))
-            .select_from(Referrals)
-            .where(Referrals.referrer_id == user_id)
+        query = select(ReferralStats.pending_bonus).where(
+            ReferralStats.referrer_id == user_id
         )
         result = await self.session.execute(query)
         reward = result.scalar()
@@ -390,6 +460,7 @@ class Actions:
             await self.session.commit()
         except:
             return False
+        row_counts.add(Users)
         return True
 
     async def get_user(self, telegram_id: int) -> Users:
@@ -428,9 +499,18 @@ class Actions:
             >>> await clear_user("1234567890")
             True
         """
-        logger.info(f"Пользователь {telegram_id} был удален")
         statement = delete(Users).where(Users.telegram_id == telegram_id)
-        result = await self.session.execute(statement)
+        try:
+            result = await self.session.execute(statement)
+            await self.session.commit()
+        except Exception as e:
+            logger.error(
+                f"Не удалось удалить пользователя {telegram_id}: {e.__class__.__name__}: {e}"
+            )
+            await self.session.rollback()
+            return False
+        row_counts.add(Users, -result.rowcount)
+        logger.info(f"Пользователь {telegram_id} был удален")
         return result.rowcount > 0
 
     async def add_user_money(self, telegram_id: int, money: float) -> bool:
@@ -501,9 +581,18 @@ class Actions:
         Returns:
             bool: True if the user was deleted, False otherwise
         """
-        logger.info(f"Удалён пользователь: {telegram_id}")
         statement = delete(Users).where(Users.telegram_id == telegram_id)
-        result = await self.session.execute(statement)
+        try:
+            result = await self.session.execute(statement)
+            await self.session.commit()
+        except Exception as e:
+            logger.error(
+                f"Не удалось удалить пользователя {telegram_id}: {e.__class__.__name__}: {e}"
+            )
+            await self.session.rollback()
+            return False
+        row_counts.add(Users, -result.rowcount)
+        logger.info(f"Удалён пользователь: {telegram_id}")
         return result.rowcount > 0  # True if deletion was successful, False otherwise.
 
     async def create_transaction(
@@ -532,6 +621,7 @@ class Actions:
             )
             self.session.add(model)
             await self.session.commit()
+            row_counts.add(Transactions)
             return True
         except Exception as e:
             print(f"Error creating transaction: {e.__class__.__name__}: {e}")
@@ -543,14 +633,19 @@ class Actions:
         logger.info(
             f"Сделана ставка: Пользователь: {user_id}, Сумма: {amount}, На время: {shift_hours} д вперёд"
         )
+        start_value = price_history.latest(coin)
+        if start_value is None:
+            logger.info(f"Ставка не создана: нет курса монеты {coin}")
+            return False
         try:
             created_at = datetime.now(UTC)
             supposed_at = created_at + timedelta(hours=shift_hours)
-            start_value = ...  # TODO
             model = Bets(
                 user_id=user_id,
                 amount=amount,
                 coin=coin,
+                # Up is 1, down is -1
+                way=1 if way > 0 else -1,
                 supposed_at=supposed_at,
                 start_value=start_value,
             )
@@ -639,27 +734,22 @@ class Actions:
 
     async def get_count_users(self) -> int:
         """
-        Get count of all users
+        Get count of all users (cached, may be approximate)
         """
-        query = select(func.count()).select_from(Users)
-        result = await self.session.execute(query)
-        count = result.scalar()
-        return count or 0
+        return await row_counts.get(self.session, Users)
 
-    async def get_users(self, page: int = 1) -> List[Users]:
+    async def get_users(self, cursor: Optional[str] = None, position: int = 0) -> Page:
         """
-        Get list of users
+        Get page of users
 
         Args:
-            page (int): Page number
+            cursor (Optional[str]): Keyset cursor of the page
+            position (int): Index of the first user of the page
 
         Returns:
-            List[Users]: List of users
+            Page: Page of users
         """
-        query = select(Users).offset((page - 1) * 10).limit(10)
-        result = await self.session.execute(query)
-        users = result.scalars().all()
-        return cast(List[Users], users)
+        return await seek(self.session, select(Users), Users.user_id, cursor, position)
 
     async def edit_money_balance(self, telegram_id: int, money_balance: float) -> bool:
         logger.info(
@@ -694,7 +784,14 @@ class Actions:
         self, referred_telegram_id: int, bonus_amount: float
     ) -> None:
         """
-        Recursively updates the balance for all referrers of a referred user.
+        Updates the balance for all referrers of a referred user.
+
+        The referrer ``level`` levels above the user gets
+        ``bonus_amount * 0.025 ** level`` while it is at least 5, up to
+        ``referral_max_depth`` levels and up to the first inactive referral.
+        Ancestors come from ``referral_closure``; the referrals and the
+        ``referral_stats`` of their referrers are updated by a single
+        statement.
 
         Args:
             referred_telegram_id (int): Telegram ID of the referred user.
@@ -702,27 +799,132 @@ class Actions:
         """
         if bonus_amount < 5:
             return
-        # Find the referral relationship where the referred user matches
-        query = select(Referrals).where(
-            Referrals.referrer_id == referred_telegram_id, Referrals.status.is_(True)
+        # The user and every referrer above him, by level
+        levels = (
+            select(
+                ReferralClosure.ancestor_id.label("user_id"),
+                ReferralClosure.depth.label("level"),
+            )
+            .where(
+                ReferralClosure.descendant_id == referred_telegram_id,
+                ReferralClosure.depth < settings.referral_max_depth,
+            )
+            .union_all(
+                select(
+                    literal(referred_telegram_id, BIGINT).label("user_id"),
+                    literal(0).label("level"),
+                )
+            )
+            .subquery("levels")
+        )
+        # Referral of every level, active while no referral below is inactive
+        chain = (
+            select(
+                Referrals.referral_id,
+                levels.c.level,
+                func.bool_and(func.coalesce(Referrals.status, False))
+                .over(order_by=levels.c.level)
+                .label("active"),
+            )
+            .join(levels, Referrals.referred_id == levels.c.user_id)
+            .subquery("chain")
+        )
+        share = bonus_amount * func.power(0.025, chain.c.level)
+        credited = (
+            update(Referrals)
+            .where(Referrals.referral_id == chain.c.referral_id, chain.c.active)
+            .where(share >= 5)
+            .values(bonus=Referrals.bonus + share)
+            .returning(Referrals.referrer_id, share.label("share"))
+            .cte("credited")
+        )
+        statement = pg_insert(ReferralStats).from_select(
+            ["referrer_id", "pending_bonus", "lifetime_bonus"],
+            select(credited.c.referrer_id, credited.c.share, credited.c.share),
+        )
+        await self.session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[ReferralStats.referrer_id],
+                set_={
+                    "pending_bonus": ReferralStats.pending_bonus
+                    + statement.excluded.pending_bonus,
+                    "lifetime_bonus": ReferralStats.lifetime_bonus
+                    + statement.excluded.lifetime_bonus,
+                },
+            )
         )
-        result = await self.session.execute(query)
-        referral = result.scalar()
 
-        # If no referral relationship exists, exit the recursion
-        if not referral:
-            return
+    async def add_referral(self, referrer_id: int, referred_id: int) -> bool:
+        """
+        Make a user the referral of another one and record his ancestry
 
-        # Find the referrer (the user who referred the current user)
-        referral.bonus += bonus_amount
-        query = select(Referrals).where(Referrals.referred_id == referral.referrer_id)
-        result = await self.session.execute(query)
-        referrer = result.scalar()
-        if referrer:
-            # Recursively update the balance of the next referrer up the chain
-            await self.update_referrers_balance(
-                referrer.referred_id, bonus_amount * 0.025
+        Args:
+            referrer_id (int): Telegram ID of the referrer
+            referred_id (int): Telegram ID of the new referral
+
+        Returns:
+            bool: False if the user already has a referrer or the referral
+                would make a cycle
+        """
+        if referrer_id == referred_id:
+            return False
+        taken = await self.session.execute(
+            select(
+                exists().where(Referrals.referred_id == referred_id)
+                | exists().where(
+                    ReferralClosure.descendant_id == referrer_id,
+                    ReferralClosure.ancestor_id == referred_id,
+                )
+            )
+        )
+        if taken.scalar():
+            return False
+        logger.info(f"Пользователь {referred_id} стал рефералом {referrer_id}")
+        # Referrers above the referrer and referrals below the new referral,
+        # each with itself at depth 0
+        ancestors = (
+            select(ReferralClosure.ancestor_id, ReferralClosure.depth)
+            .where(ReferralClosure.descendant_id == referrer_id)
+            .union_all(select(literal(referrer_id, BIGINT), literal(0)))
+            .subquery("ancestors")
+        )
+        descendants = (
+            select(ReferralClosure.descendant_id, ReferralClosure.depth)
+            .where(ReferralClosure.ancestor_id == referred_id)
+            .union_all(select(literal(referred_id, BIGINT), literal(0)))
+            .subquery("descendants")
+        )
+        try:
+            await self.session.execute(
+                insert(Referrals).values(
+                    referrer_id=referrer_id, referred_id=referred_id
+                )
+            )
+            await self.session.execute(
+                insert(ReferralClosure).from_select(
+                    ["ancestor_id", "descendant_id", "depth"],
+                    select(
+                        ancestors.c.ancestor_id,
+                        descendants.c.descendant_id,
+                        ancestors.c.depth + descendants.c.depth + 1,
+                    ),
+                )
+            )
+            await self.session.execute(
+                pg_insert(ReferralStats)
+                .values(referrer_id=referrer_id, referrals=1)
+                .on_conflict_do_update(
+                    index_elements=[ReferralStats.referrer_id],
+                    set_={"referrals": ReferralStats.referrals + 1},
+                )
             )
+            await self.session.commit()
+        except Exception as e:
+            logger.error(f"Error adding referral: {e.__class__.__name__}: {e}")
+            await self.session.rollback()
+            return False
+        row_counts.add(Referrals)
+        return True
 
     async def edit_dollar_balance(
         self, telegram_id: int, dollar_balance: float
@@ -741,27 +943,30 @@ class Actions:
 
     async def get_count_transactions(self) -> int:
         """
-        Get count of all transactions
+        Get count of all transactions (cached, may be approximate)
         """
-        query = select(func.count()).select_from(Transactions)
-        result = await self.session.execute(query)
-        count = result.scalar()
-        return count or 0
+        return await row_counts.get(self.session, Transactions)
 
-    async def get_transactions(self, page: int = 1) -> List[Transactions]:
+    async def get_transactions(
+        self, cursor: Optional[str] = None, position: int = 0
+    ) -> Page:
         """
-        Get list of transactions
+        Get page of transactions
 
         Args:
-            page (int): Page number
+            cursor (Optional[str]): Keyset cursor of the page
+            position (int): Index of the first transaction of the page
 
         Returns:
-            List[Transactions]: List of transactions
+            Page: Page of transactions
         """
-        query = select(Transactions).offset((page - 0) * 10).limit(10)
-        result = await self.session.execute(query)
-        transactions = result.scalars().all()
-        return cast(List[Transactions], transactions)
+        return await seek(
+            self.session,
+            select(Transactions),
+            Transactions.transaction_id,
+            cursor,
+            position,
+        )
 
     async def get_game_params(
         self, telegram_id: int
@@ -769,20 +974,31 @@ class Actions:
         """
         Get game params (money balance and available bonus)
 
+        Bonuses are reset lazily: a user who has not visited the bot since
+        the last reset has the full daily bonuses, whatever is stored.
+
         Args:
             telegram_id (str | int): Telegram id
 
         Returns:
             tuple: Money balance and available bonus
         """
+        reset_at = bonus_reset_at()
+        stale = or_(
+            Users.last_visit_to_bot.is_(None), Users.last_visit_to_bot < reset_at
+        )
+        bonuses = case((stale, BONUSES_PER_DAY), else_=Users.bonuses_to_bot)
+        last_visit = case(
+            (stale, reset_at - timedelta(hours=5)), else_=Users.last_visit_to_bot
+        )
         query = select(
             Users.money_balance,
-            Users.bonuses_to_bot > 0,
-            (Users.last_visit_to_bot < datetime.now(UTC) - timedelta(hours=4)),
-            Users.last_visit_to_bot,
+            bonuses > 0,
+            last_visit < datetime.now(UTC).replace(tzinfo=None) - timedelta(hours=4),
+            last_visit,
         ).where(Users.telegram_id == telegram_id)
         result = await self.session.execute(query)
-        user = result.scalars().first()
+        user = result.first()
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         return user
@@ -825,12 +1041,9 @@ class Actions:
 
     async def get_count_referrals(self) -> int:
         """
-        Get count of all referalls
+        Get count of all referalls (cached, may be approximate)
         """
-        query = select(func.count()).select_from(Referrals)
-        result = await self.session.execute(query)
-        count = result.scalar()
-        return count or 0
+        return await row_counts.get(self.session, Referrals)
 
     async def get_referral(self, id: int) -> Optional[Referrals]:
         """
@@ -847,52 +1060,67 @@ class Actions:
         referral = result.scalars().first()
         return referral
 
-    async def get_referrals(self, page: int = 1) -> List[Referrals]:
+    async def get_referrals(
+        self, cursor: Optional[str] = None, position: int = 0
+    ) -> Page:
         """
-        Get list of referrals
+        Get page of referrals
 
         Args:
-            page (int): Page number
+            cursor (Optional[str]): Keyset cursor of the page
+            position (int): Index of the first referral of the page
 
         Returns:
-            List[Referrals]: List of referrals
+            Page: Page of referrals
         """
-        # TODO: REMADE
-        query = select(Referrals).offset((page - 1) * 10).limit(10)
-        result = await self.session.execute(query)
-        referrals = result.scalars().all()
-        return cast(List[Referrals], referrals)
+        return await seek(
+            self.session, select(Referrals), Referrals.referral_id, cursor, position
+        )
 
     async def get_sum_lottery_transactions(self) -> float:
-        query = select(func.sum(LotteryTransactions.amount)).select_from(
-            LotteryTransactions
-        )
-        result = await self.session.execute(query)
-        sum = result.scalar()
-        return sum or 0
+        """
+        Get sum of all lottery deposits of all rounds
+
+        Returns:
+            float: Sum of deposits
+        """
+        # One row per round, round 0 holds the history before rounds
+        result = await self.session.execute(select(func.sum(LotteryPots.deposited)))
+        return result.scalar() or 0
+
+    async def get_lottery_round_deposits(self) -> float:
+        """
+        Get sum of deposits of the current lottery round
+
+        Returns:
+            float: Sum of deposits of the current round
+        """
+        _, deposited = await pot_cache.get(self.session, round_id)
+        return deposited
 
     async def get_count_lottery_transactions(self) -> int:
-        query = select(func.count()).select_from(LotteryTransactions)
-        result = await self.session.execute(query)
-        count = result.scalar()
-        return count or 0
+        return await row_counts.get(self.session, LotteryTransactions)
 
     async def get_lottery_transactions(
-        self, page: int = 1
-    ) -> List[LotteryTransactions]:
+        self, cursor: Optional[str] = None, position: int = 0
+    ) -> Page:
         """
-        Get list of lottery transactions
+        Get page of lottery transactions
 
         Args:
-            page (int): Page number
+            cursor (Optional[str]): Keyset cursor of the page
+            position (int): Index of the first lottery transaction of the page
 
         Returns:
-            List[LotteryTransactions]: List of lottery transactions
+            Page: Page of lottery transactions
         """
-        query = select(LotteryTransactions).offset((page - 1) * 10).limit(10)
-        result = await self.session.execute(query)
-        transactions = result.scalars().all()
-        return cast(List[LotteryTransactions], transactions)
+        return await seek(
+            self.session,
+            select(LotteryTransactions),
+            LotteryTransactions.id,
+            cursor,
+            position,
+        )
 
     async def check_admin(self, telegram_id: int) -> bool:
         query = (
@@ -910,7 +1138,35 @@ class Actions:
         result = await self.session.execute(query)
         referral = result.scalars().first()
         await self.session.delete(referral)
+        await self.session.execute(
+            update(ReferralStats)
+            .where(ReferralStats.referrer_id == referral.referrer_id)
+            .values(
+                referrals=ReferralStats.referrals - 1,
+                pending_bonus=ReferralStats.pending_bonus - referral.bonus,
+            )
+        )
+        # Detach the referred user's subtree from the referrers above it
+        subtree = select(ReferralClosure.descendant_id).where(
+            ReferralClosure.ancestor_id == referral.referred_id
+        )
+        above = select(ReferralClosure.ancestor_id).where(
+            ReferralClosure.descendant_id == referral.referred_id
+        )
+        await self.session.execute(
+            delete(ReferralClosure).where(
+                or_(
+                    ReferralClosure.descendant_id == referral.referred_id,
+                    ReferralClosure.descendant_id.in_(subtree),
+                ),
+                or_(
+                    ReferralClosure.ancestor_id == referral.referrer_id,
+                    ReferralClosure.ancestor_id.in_(above),
+                ),
+            )
+        )
         await self.session.commit()
+        row_counts.add(Referrals, -1)
         return True
 
 
@@ -946,9 +1202,11 @@ class RefreshTokenActions(Actions):
         sub = int(sub)
 
         jti = payload.get("jti")
-        if not jti:
+        if not jti or not str(jti).isdigit():
             return
 
+        jti = int(jti)
+
         iat = payload.get("iat")
         if not iat:
             return
@@ -982,53 +1240,36 @@ class RefreshTokenActions(Actions):
 
         return sub
 
+    async def revoke_refresh_tokens(self, telegram_id: int) -> bool:
+        """
+        Delete all refresh tokens of the user
 
-async def fetch(session: aiohttp.ClientSession, url: str) -> str:
-    async with session.get(url) as response:
-        return await response.text()
+        Args:
+            telegram_id (int): Telegram ID of the user
+
+        Returns:
+            bool: True if any token was deleted, False otherwise
+        """
+        logger.info(f"Отозваны токены пользователя {telegram_id}")
+        result = await self.session.execute(
+            delete(RefreshToken).where(RefreshToken.user_id == telegram_id)
+        )
+        await self.session.commit()
+        return result.rowcount > 0
 
 
 async def mark_guess_games():
-    async with aiohttp.ClientSession(
-        headers={
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.9"
-        }
-    ) as session:
-        html = await fetch(session, "https://coinmarketcap.com")
-        soup = BeautifulSoup(html, "html.parser")
-        table = soup.find("tbody")
-        trs = table.find_all("tr", limit=20)
-        coins = dict()
-        for tr in trs:
-            tds = tr.find_all("td")
-            price = tds[3].get_text()
-            value, _ = tds[2].get_text(" ", strip=True).rsplit(" ", maxsplit=1)
-            coins[value] = price
-    async for session in get_session():
-        query = select(Bets).where(Bets.supposed_at <= datetime.now(UTC))
-        result = await session.execute(query)
-        bets = result.scalars().all()
-        actions = Actions(session)
-        for bet in bets:
-            if coins[bet.coin] < bet.start_value:
-                if bet.way == -1:
-                    await actions.add_user_money(bet.user_id, bet.amount)
-                else:
-                    await actions.minus_user_money(bet.user_id, bet.amount)
-            else:
-                if bet.way == -1:
-                    await actions.minus_user_money(bet.user_id, bet.amount)
-                else:
-                    await actions.add_user_money(bet.user_id, bet.amount)
+    """
+    Settle guess bets whose time has come
+    """
+    await settle_due_bets()
 
 
 async def clear_game_sessions():
     """
     Clear all game sessions
+
+    Only moves the reset epoch, ``get_game_params`` treats everyone who has
+    not visited since then as reset, so no user row is written.
     """
-    async for session in get_session():
-        statement = update(Users).values(
-            last_visit_to_bot=datetime.now(UTC) - timedelta(hours=5),
-            bonuses_to_bot=3,
-        )
-        await session.execute(statement)
+    await state_store.set(BONUS_RESET_KEY, datetime.now(UTC).isoformat())
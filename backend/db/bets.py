@@ -0,0 +1,166 @@
+from datetime import UTC, datetime, timedelta
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+from sqlalchemy import BIGINT, Boolean, Float, column, select, tuple_, update, values
+
+from backend.config import settings
+from backend.db.models import Bets, Users
+from backend.db.prices import price_history, to_timestamp
+from backend.db.session import async_session_maker
+
+# Position of the last claimed bet in (supposed_at, bet_id) order
+Cursor = Tuple[datetime, int]
+
+
+def resolve_bets(
+    prices: np.ndarray, start_values: np.ndarray, ways: np.ndarray
+) -> np.ndarray:
+    """
+    Decide bets: up (1) wins unless the price fell, down (-1) wins if it did
+
+    Args:
+        prices (np.ndarray): Prices at the end of the bets
+        start_values (np.ndarray): Prices when the bets were made
+        ways (np.ndarray): Directions of the bets
+
+    Returns:
+        np.ndarray: True for won bets
+    """
+    fell = prices < start_values
+    return np.where(ways == -1, fell, ~fell)
+
+
+def tally_bets(
+    rows: Sequence, prices: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Decide bets with a known price and net the result of every player
+
+    Args:
+        rows (Sequence): Bets with bet_id, user_id, amount, way and start_value
+        prices (np.ndarray): Prices at the end of the bets, NaN if unknown
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: Ids of the
+            decided bets, whether each of them won, players and the change
+            of the balance of each player
+    """
+    priced = ~np.isnan(prices)
+    won = resolve_bets(
+        prices,
+        np.array([row.start_value for row in rows]),
+        np.array([row.way for row in rows]),
+    )[priced]
+    bet_ids = np.array([row.bet_id for row in rows], dtype=np.int64)[priced]
+    user_ids = np.array([row.user_id for row in rows], dtype=np.int64)[priced]
+    amounts = np.array([row.amount for row in rows], dtype=float)[priced]
+    users, user_idx = np.unique(user_ids, return_inverse=True)
+    deltas = np.bincount(
+        user_idx, weights=np.where(won, amounts, -amounts), minlength=len(users)
+    )
+    return bet_ids, won, users, deltas
+
+
+async def settle_bets_chunk(
+    now: datetime, cursor: Optional[Cursor], size: int, since: Optional[datetime] = None
+) -> Tuple[int, Optional[Cursor]]:
+    """
+    Settle one chunk of due bets in a single transaction
+
+    Bets are claimed with ``FOR UPDATE SKIP LOCKED``, so concurrent runs
+    settle different chunks. Bets without a known price are left open.
+
+    Args:
+        now (datetime): Bets supposed at or before it are due, naive UTC
+        cursor (Optional[Cursor]): Last bet claimed by the previous chunk
+        size (int): Chunk size
+        since (Optional[datetime]): Bets supposed at or before it are no
+            longer scanned, naive UTC
+
+    Returns:
+        Tuple[int, Optional[Cursor]]: Number of settled bets and the cursor
+            of the next chunk, None once there are no due bets left
+    """
+    query = select(
+        Bets.bet_id,
+        Bets.user_id,
+        Bets.amount,
+        Bets.way,
+        Bets.coin,
+        Bets.start_value,
+        Bets.supposed_at,
+    ).where(Bets.status.is_(None), Bets.supposed_at <= now)
+    if since is not None:
+        query = query.where(Bets.supposed_at > since)
+    if cursor is not None:
+        query = query.where(tuple_(Bets.supposed_at, Bets.bet_id) > cursor)
+    query = (
+        query.order_by(Bets.supposed_at, Bets.bet_id)
+        .limit(size)
+        .with_for_update(skip_locked=True)
+    )
+    async with async_session_maker() as session:
+        rows = (await session.execute(query)).all()
+        if not rows:
+            return 0, None
+        coins = np.array([row.coin for row in rows])
+        timestamps = np.array([to_timestamp(row.supposed_at) for row in rows])
+        prices = np.full(len(rows), np.nan)
+        for coin in np.unique(coins):
+            mask = coins == coin
+            prices[mask] = price_history.prices_at(coin, timestamps[mask])
+        # Bets older than the in-memory history
+        for i in np.flatnonzero(np.isnan(prices)):
+            price = await price_history.price_at(
+                session, rows[i].coin, rows[i].supposed_at
+            )
+            if price is not None:
+                prices[i] = price
+
+        bet_ids, won, users, deltas = tally_bets(rows, prices)
+        if len(bet_ids):
+            changes = values(
+                column("telegram_id", BIGINT), column("delta", Float), name="deltas"
+            ).data(list(zip(users.tolist(), deltas.tolist())))
+            await session.execute(
+                update(Users)
+                .where(Users.telegram_id == changes.c.telegram_id)
+                .values(money_balance=Users.money_balance + changes.c.delta)
+            )
+            results = values(
+                column("bet_id", BIGINT), column("won", Boolean), name="results"
+            ).data(list(zip(bet_ids.tolist(), won.tolist())))
+            await session.execute(
+                update(Bets)
+                .where(Bets.bet_id == results.c.bet_id)
+                .values(status=results.c.won)
+            )
+        await session.commit()
+    return len(bet_ids), (rows[-1].supposed_at, rows[-1].bet_id)
+
+
+async def settle_due_bets(size: Optional[int] = None) -> int:
+    """
+    Settle all guess bets whose time has come, chunk by chunk
+
+    Args:
+        size (Optional[int]): Chunk size, ``bet_settlement_chunk`` by default
+
+    Returns:
+        int: Number of settled bets
+    """
+    size = size or settings.bet_settlement_chunk
+    now = datetime.now(UTC).replace(tzinfo=None)
+    # Bets that never got a price are not scanned again forever
+    since = now - timedelta(seconds=settings.bet_price_grace)
+    settled = 0
+    cursor: Optional[Cursor] = None
+    while True:
+        count, cursor = await settle_bets_chunk(now, cursor, size, since)
+        settled += count
+        if cursor is None:
+            break
+    logger.info(f"Рассчитано ставок на курс: {settled}")
+    return settled
@@ -0,0 +1,107 @@
+import asyncio
+import time
+from typing import Dict, Optional, Set, Tuple, Type
+
+from loguru import logger
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.db.models import Model
+from backend.db.session import replica_router
+
+ESTIMATE_QUERY = text(
+    "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)"
+)
+
+
+class RowCounts:
+    """
+    Per-table row counts for admin headers, readable in O(1).
+
+    Counts are kept up to date by ``add`` hooks called from ``Actions`` on
+    inserts and deletes. Writes made by other processes are picked up by an
+    exact ``count(*)`` refreshed in the background once a count is older
+    than ``ttl`` seconds. Until the first exact count is known, the planner
+    estimate from ``pg_class.reltuples`` is served.
+    """
+
+    def __init__(self, ttl: float = 300):
+        self.ttl = ttl
+        self._counts: Dict[str, Tuple[int, float]] = {}
+        self._refreshing: Set[str] = set()
+
+    async def get(self, session: AsyncSession, model: Type[Model]) -> int:
+        """
+        Get count of rows of the model's table
+
+        Args:
+            session (AsyncSession): Session used for the estimate
+            model (Type[Model]): Model
+
+        Returns:
+            int: Maintained, estimated or exact count of rows
+        """
+        table = model.__tablename__
+        cached = self._counts.get(table)
+        if cached:
+            if time.monotonic() - cached[1] >= self.ttl:
+                self._refresh(model)
+            return cached[0]
+
+        estimate = await self._estimate(session, table)
+        if estimate is None:
+            count = await self._exact(session, model)
+            self._counts[table] = (count, time.monotonic())
+            return count
+
+        self._refresh(model)
+        return estimate
+
+    def add(self, model: Type[Model], delta: int = 1) -> None:
+        """
+        Adjust maintained count after rows were inserted (delta > 0) or deleted
+
+        Args:
+            model (Type[Model]): Model
+            delta (int): Number of inserted rows, negative for deleted ones
+        """
+        table = model.__tablename__
+        cached = self._counts.get(table)
+        if cached:
+            self._counts[table] = (max(cached[0] + delta, 0), cached[1])
+
+    async def _estimate(self, session: AsyncSession, table: str) -> Optional[int]:
+        result = await session.execute(ESTIMATE_QUERY, {"table": table})
+        estimate = result.scalar()
+        # reltuples is -1 for tables that were never vacuumed or analyzed
+        if estimate is None or estimate < 0:
+            return None
+        return estimate
+
+    @staticmethod
+    async def _exact(session: AsyncSession, model: Type[Model]) -> int:
+        result = await session.execute(select(func.count()).select_from(model))
+        return result.scalar() or 0
+
+    def _refresh(self, model: Type[Model]) -> None:
+        table = model.__tablename__
+        if table in self._refreshing:
+            return
+        self._refreshing.add(table)
+        asyncio.get_running_loop().create_task(self._refresh_exact(model))
+
+    async def _refresh_exact(self, model: Type[Model]) -> None:
+        table = model.__tablename__
+        try:
+            async with replica_router.session_maker()() as session:
+                count = await self._exact(session, model)
+            self._counts[table] = (count, time.monotonic())
+        except Exception as e:
+            logger.error(
+                f"Не удалось посчитать строки {table}: {e.__class__.__name__}: {e}"
+            )
+        finally:
+            self._refreshing.discard(table)
+
+
+row_counts = RowCounts()
@@ -0,0 +1,89 @@
+import time
+from bisect import insort
+from typing import List, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.db.models import LotteryTransactions, Users
+
+
+class Leaderboard:
+    """
+    In-memory top-N of lottery transactions by amount.
+
+    Loaded with a single JOIN against ``users`` and then updated
+    incrementally by ``offer`` whenever a new transaction could enter the
+    top. It is reloaded every ``ttl`` seconds to pick up transactions made
+    by other processes.
+    """
+
+    def __init__(self, size: int = 10, ttl: float = 30):
+        self.size = size
+        self.ttl = ttl
+        # (-amount, id, username, multiplier, amount), best first
+        self._rows: List[Tuple[float, int, str, float, float]] = []
+        self._snapshot: List[Tuple[str, float, float]] = []
+        self._loaded_at = float("-inf")
+
+    async def get(self, session: AsyncSession) -> List[Tuple[str, float, float]]:
+        """
+        Get top lottery transactions
+
+        Args:
+            session (AsyncSession): Session used when the leaderboard is stale
+
+        Returns:
+            List[Tuple[str, float, float]]: Username, multiplier and bet
+        """
+        if time.monotonic() - self._loaded_at >= self.ttl:
+            await self.load(session)
+        return self._snapshot
+
+    async def load(self, session: AsyncSession) -> None:
+        query = (
+            select(
+                LotteryTransactions.id,
+                Users.username,
+                LotteryTransactions.multiplier,
+                LotteryTransactions.amount,
+            )
+            .join(Users, Users.telegram_id == LotteryTransactions.telegram_id)
+            .order_by(LotteryTransactions.amount.desc(), LotteryTransactions.id)
+            .limit(self.size)
+        )
+        result = await session.execute(query)
+        self._rows = [
+            (-amount, id, username or "", multiplier, amount)
+            for id, username, multiplier, amount in result.all()
+        ]
+        self._loaded_at = time.monotonic()
+        self._rebuild()
+
+    def could_enter(self, amount: float) -> bool:
+        return len(self._rows) < self.size or -amount < self._rows[-1][0]
+
+    def offer(self, id: int, username: str, multiplier: float, amount: float) -> None:
+        """
+        Put a new lottery transaction on the leaderboard if it makes the top
+
+        Args:
+            id (int): Lottery transaction id
+            username (str): Username of the player
+            multiplier (float): Multiplier
+            amount (float): Bet
+        """
+        if not self.could_enter(amount):
+            return
+        insort(self._rows, (-amount, id, username, multiplier, amount))
+        del self._rows[self.size :]
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        self._snapshot = [
+            (username, multiplier, amount)
+            for _, _, username, multiplier, amount in self._rows
+        ]
+
+
+leaderboard = Leaderboard()
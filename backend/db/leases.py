@@ -0,0 +1,96 @@
+import os
+import socket
+from datetime import UTC, datetime, timedelta
+from typing import Dict, Tuple
+from uuid import uuid4
+
+from sqlalchemy import func, update
+from sqlalchemy.dialects.postgresql import insert
+
+from backend.config import settings
+from backend.db.models import JobLeases
+from backend.db.session import async_session_maker
+
+
+class LocalLease:
+    """
+    Leases of scheduled jobs within a single process
+    """
+
+    def __init__(self):
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+        # name -> (fire_at, expires_at)
+        self._leases: Dict[str, Tuple[datetime, datetime]] = {}
+
+    async def acquire(self, name: str, fire_at: datetime, ttl: float) -> bool:
+        """
+        Claim the run of the job scheduled at ``fire_at``
+
+        The run is granted to one owner only, and only when the previous run
+        of the job is released or its lease of ``ttl`` seconds expired.
+
+        Args:
+            name (str): Job name
+            fire_at (datetime): Scheduled time of the run, naive UTC
+            ttl (float): Seconds the lease is held if never released
+
+        Returns:
+            bool: True if this owner has to run the job
+        """
+        now = datetime.now(UTC).replace(tzinfo=None)
+        lease = self._leases.get(name)
+        if lease is not None and (lease[0] >= fire_at or lease[1] > now):
+            return False
+        self._leases[name] = (fire_at, now + timedelta(seconds=ttl))
+        return True
+
+    async def release(self, name: str) -> None:
+        lease = self._leases.get(name)
+        if lease is not None:
+            self._leases[name] = (lease[0], datetime.now(UTC).replace(tzinfo=None))
+
+
+class PostgresLease(LocalLease):
+    """
+    Leases of scheduled jobs shared by all workers and nodes.
+
+    One row per job in ``job_leases`` holds the last claimed run. Claiming
+    is a single upsert that only succeeds for a later run once the previous
+    lease is released or expired, so every run happens on one node and
+    runs never overlap.
+    """
+
+    async def acquire(self, name: str, fire_at: datetime, ttl: float) -> bool:
+        expires_at = func.current_timestamp() + timedelta(seconds=ttl)
+        statement = insert(JobLeases).values(
+            name=name, fire_at=fire_at, owner=self.owner, expires_at=expires_at
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[JobLeases.name],
+            set_={
+                "fire_at": statement.excluded.fire_at,
+                "owner": statement.excluded.owner,
+                "expires_at": statement.excluded.expires_at,
+            },
+            where=(JobLeases.fire_at < statement.excluded.fire_at)
+            & (JobLeases.expires_at < func.current_timestamp()),
+        ).returning(JobLeases.name)
+        async with async_session_maker() as session:
+            claimed = (await session.execute(statement)).scalar()
+            await session.commit()
+        return claimed is not None
+
+    async def release(self, name: str) -> None:
+        async with async_session_maker() as session:
+            await session.execute(
+                update(JobLeases)
+                .where(JobLeases.name == name, JobLeases.owner == self.owner)
+                .values(expires_at=func.current_timestamp())
+            )
+            await session.commit()
+
+
+def create_lease() -> LocalLease:
+    if settings.state_backend == "postgres":
+        return PostgresLease()
+    return LocalLease()
@@ -0,0 +1,174 @@
+import json
+from datetime import timedelta
+from typing import Callable, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from backend.config import settings
+from backend.core.rooms import GameRoom, RoomStore
+from backend.db.models import MatchTickets
+from backend.db.pubsub import LocalPubSub, pubsub
+from backend.db.session import async_session_maker
+from backend.services.matchmaking import Matchmaker, Ticket, pair_stakes
+
+
+class PostgresMatchmaker(Matchmaker):
+    """
+    Matchmaking queue shared by all workers.
+
+    Tickets are rows of ``match_tickets``, while the waiting requests stay
+    in the worker that accepted them. Every new ticket NOTIFYs all workers
+    to run a round. A round locks the tickets with ``SKIP LOCKED``, so
+    concurrent rounds never take the same ticket, deletes the paired ones
+    and announces their rooms to whichever worker holds the requests.
+    Workers with waiting requests keep running rounds every ``interval``,
+    so tickets skipped by a concurrent round are paired on the next one.
+    Tickets older than ``ttl`` were left by a crashed worker and dropped.
+    """
+
+    def __init__(
+        self,
+        store: RoomStore,
+        make_room: Callable[[int, int, int], GameRoom],
+        game: str,
+        pubsub: LocalPubSub,
+        tolerance: float = 0.1,
+        interval: float = 0.2,
+        ttl: float = 30,
+    ):
+        super().__init__(store, make_room, tolerance, interval)
+        self.game = game
+        self.pubsub = pubsub
+        self.ttl = ttl
+        self.channel = f"matchmaking_{game}"
+
+    def start(self) -> None:
+        if self._task is None:
+            self.pubsub.subscribe(self.channel, self._on_notification)
+        super().start()
+
+    async def stop(self) -> None:
+        self.pubsub.unsubscribe(self.channel, self._on_notification)
+        await super().stop()
+
+    async def cancel(self, user_id: int) -> bool:
+        async with async_session_maker() as session:
+            result = await session.execute(
+                delete(MatchTickets)
+                .where(MatchTickets.game == self.game, MatchTickets.user_id == user_id)
+                .returning(MatchTickets.token)
+            )
+            token = result.scalar()
+            await session.commit()
+        if token is None:
+            return False
+        # The request may be waiting on another worker
+        await self._announce(None, [(user_id, token)])
+        return True
+
+    async def _enqueue(self, ticket: Ticket) -> None:
+        statement = insert(MatchTickets).values(
+            game=self.game,
+            user_id=ticket.user_id,
+            stake=ticket.stake,
+            token=ticket.token,
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[MatchTickets.game, MatchTickets.user_id],
+            set_={
+                "stake": statement.excluded.stake,
+                "token": statement.excluded.token,
+                "enqueued_at": func.current_timestamp(),
+            },
+        )
+        async with async_session_maker() as session:
+            await session.execute(statement)
+            await session.commit()
+        await self.pubsub.publish(self.channel, json.dumps({"event": "enqueued"}))
+
+    async def _dequeue(self, ticket: Ticket) -> None:
+        try:
+            async with async_session_maker() as session:
+                await session.execute(
+                    delete(MatchTickets).where(
+                        MatchTickets.game == self.game,
+                        MatchTickets.user_id == ticket.user_id,
+                        MatchTickets.token == ticket.token,
+                    )
+                )
+                await session.commit()
+        except Exception as e:
+            # The ticket expires after ttl anyway
+            logger.error(
+                f"Не удалось убрать {ticket.user_id} из очереди: {e.__class__.__name__}: {e}"
+            )
+
+    async def _round(self) -> None:
+        async with async_session_maker() as session:
+            await session.execute(
+                delete(MatchTickets).where(
+                    MatchTickets.game == self.game,
+                    MatchTickets.enqueued_at
+                    < func.current_timestamp() - timedelta(seconds=self.ttl),
+                )
+            )
+            result = await session.execute(
+                select(MatchTickets.user_id, MatchTickets.stake, MatchTickets.token)
+                .where(MatchTickets.game == self.game)
+                .order_by(MatchTickets.stake, MatchTickets.enqueued_at)
+                .with_for_update(skip_locked=True)
+            )
+            pairs = pair_stakes(result.all(), self.tolerance)
+            if pairs:
+                tokens = [row.token for pair in pairs for row in pair]
+                await session.execute(
+                    delete(MatchTickets).where(
+                        MatchTickets.game == self.game, MatchTickets.token.in_(tokens)
+                    )
+                )
+            await session.commit()
+        for first, second in pairs:
+            room_id = await self._create_room(first, second)
+            await self._announce(
+                room_id,
+                [(first.user_id, first.token), (second.user_id, second.token)],
+            )
+        if self._tickets:
+            self._wakeup.set()
+
+    async def _announce(
+        self, room_id: Optional[str], tickets: List[Tuple[int, str]]
+    ) -> None:
+        payload = {"event": "matched", "room_id": room_id, "tickets": tickets}
+        await self.pubsub.publish(self.channel, json.dumps(payload))
+
+    def _on_notification(self, payload: str) -> None:
+        message = json.loads(payload)
+        if message["event"] == "enqueued":
+            self._wakeup.set()
+            return
+        for user_id, token in message["tickets"]:
+            ticket = self._tickets.get(user_id)
+            if ticket is not None and ticket.token == token:
+                if not ticket.future.done():
+                    ticket.future.set_result(message["room_id"])
+
+
+def create_matchmaker(
+    store: RoomStore, make_room: Callable[[int, int, int], GameRoom], game: str
+) -> Matchmaker:
+    if settings.room_backend == "postgres":
+        return PostgresMatchmaker(
+            store,
+            make_room,
+            game,
+            pubsub,
+            settings.match_stake_tolerance,
+            settings.match_batch_interval,
+            settings.match_timeout,
+        )
+    return Matchmaker(
+        store, make_room, settings.match_stake_tolerance, settings.match_batch_interval
+    )
@@ -1,7 +1,7 @@
 from datetime import UTC, datetime, timedelta
 from uuid import uuid4
 
-from sqlalchemy import ForeignKey, String, func
+from sqlalchemy import JSON, ForeignKey, Index, String, func, text
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 from sqlalchemy.types import BIGINT
 
@@ -52,6 +52,15 @@ class Wallets(Model):
 
 class Bets(Model):
     __tablename__ = "bets"
+    # Open bets by due time, settled ones (status set) drop out of it
+    __table_args__ = (
+        Index(
+            "ix_bets_open",
+            "supposed_at",
+            "bet_id",
+            postgresql_where=text("status IS NULL"),
+        ),
+    )
 
     bet_id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(BIGINT, ForeignKey("users.telegram_id"))
@@ -74,6 +83,8 @@ class FinishedGame(Model):
     )
     amount: Mapped[int] = mapped_column(nullable=False)
     game_hash: Mapped[str] = mapped_column(nullable=False)
+    # Set for games settled from a room, at most one game per room
+    room_id: Mapped[str | None] = mapped_column(String(36), unique=True, nullable=True)
     resolved_at: Mapped[datetime] = mapped_column(
         nullable=False, default=func.current_timestamp()
     )
@@ -81,6 +92,7 @@ class FinishedGame(Model):
 
 class Referrals(Model):
     __tablename__ = "referrals"
+    __table_args__ = (Index("ix_referrals_referrer_id", "referrer_id"),)
 
     referral_id: Mapped[int] = mapped_column(primary_key=True)
     referrer_id: Mapped[int] = mapped_column(
@@ -93,6 +105,36 @@ class Referrals(Model):
     status: Mapped[bool] = mapped_column(nullable=True, default=None)
 
 
+class ReferralStats(Model):
+    """
+    Totals of a referrer's referrals, kept up to date in the transactions
+    that change them
+    """
+
+    __tablename__ = "referral_stats"
+
+    referrer_id: Mapped[int] = mapped_column(BIGINT, primary_key=True)
+    referrals: Mapped[int] = mapped_column(default=0)
+    # Bonus not taken yet
+    pending_bonus: Mapped[float] = mapped_column(default=0)
+    # Bonus ever credited
+    lifetime_bonus: Mapped[float] = mapped_column(default=0)
+
+
+class ReferralClosure(Model):
+    """
+    Ancestry of the referral tree: every referrer above a user, ``depth``
+    levels up (the direct referrer is at depth 1)
+    """
+
+    __tablename__ = "referral_closure"
+    __table_args__ = (Index("ix_referral_closure_ancestor", "ancestor_id"),)
+
+    descendant_id: Mapped[int] = mapped_column(BIGINT, primary_key=True)
+    ancestor_id: Mapped[int] = mapped_column(BIGINT, primary_key=True)
+    depth: Mapped[int] = mapped_column(nullable=False)
+
+
 class Transactions(Model):
     __tablename__ = "transactions"
 
@@ -109,8 +151,73 @@ class LotteryTransactions(Model):
     __tablename__ = "lottery_transactions"
 
     id: Mapped[int] = mapped_column(primary_key=True)
+    round_id: Mapped[int] = mapped_column(BIGINT, default=0, server_default="0")
     telegram_id: Mapped[int] = mapped_column(BIGINT, ForeignKey("users.telegram_id"))
     amount: Mapped[float] = mapped_column(nullable=False)
     multiplier: Mapped[float] = mapped_column(nullable=False)
     created_at: Mapped[datetime] = mapped_column(default=func.current_timestamp())
     confirmed_at: Mapped[datetime] = mapped_column(nullable=True)
+
+
+class LotteryPots(Model):
+    __tablename__ = "lottery_pots"
+
+    round_id: Mapped[int] = mapped_column(BIGINT, primary_key=True)
+    pot: Mapped[float] = mapped_column(default=0)
+    deposited: Mapped[float] = mapped_column(default=0)
+    updated_at: Mapped[datetime] = mapped_column(default=func.current_timestamp())
+
+
+class CoinPrices(Model):
+    __tablename__ = "coin_prices"
+
+    coin: Mapped[str] = mapped_column(String(64), primary_key=True)
+    sampled_at: Mapped[datetime] = mapped_column(primary_key=True)
+    price: Mapped[float] = mapped_column(nullable=False)
+
+
+class JobLeases(Model):
+    __tablename__ = "job_leases"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    # Scheduled time of the last claimed run
+    fire_at: Mapped[datetime] = mapped_column(nullable=False)
+    owner: Mapped[str] = mapped_column(String(128), nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(nullable=False)
+
+
+class AppState(Model):
+    __tablename__ = "app_state"
+
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    value: Mapped[str] = mapped_column(nullable=False)
+    version: Mapped[int] = mapped_column(BIGINT, default=1)
+    updated_at: Mapped[datetime] = mapped_column(default=func.current_timestamp())
+
+
+class Rooms(Model):
+    __tablename__ = "rooms"
+    __table_args__ = (
+        Index("ix_rooms_open", "game", postgresql_where=text("NOT going")),
+        Index("ix_rooms_updated_at", "game", "updated_at"),
+        Index("ix_rooms_finished", "game", postgresql_where=text("finished")),
+    )
+
+    room_id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    game: Mapped[str] = mapped_column(String(16))
+    state: Mapped[dict] = mapped_column(JSON)
+    going: Mapped[bool] = mapped_column(default=False)
+    finished: Mapped[bool] = mapped_column(default=False)
+    version: Mapped[int] = mapped_column(BIGINT, default=1)
+    updated_at: Mapped[datetime] = mapped_column(default=func.current_timestamp())
+
+
+class MatchTickets(Model):
+    __tablename__ = "match_tickets"
+
+    game: Mapped[str] = mapped_column(String(16), primary_key=True)
+    user_id: Mapped[int] = mapped_column(BIGINT, primary_key=True)
+    stake: Mapped[int] = mapped_column(nullable=False)
+    # Request waiting for the ticket, a newer request of the player replaces it
+    token: Mapped[str] = mapped_column(String(32), nullable=False)
+    enqueued_at: Mapped[datetime] = mapped_column(default=func.current_timestamp())
@@ -0,0 +1,69 @@
+from typing import Any, List, NamedTuple, Optional
+
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+PAGE_SIZE = 10
+
+
+class Page(NamedTuple):
+    items: List[Any]
+    position: int  # index of the first item in the whole list
+    first_key: Optional[int]
+    last_key: Optional[int]
+    has_prev: bool
+    has_next: bool
+
+    def next_cursor(self) -> str:
+        return f"a{self.last_key}" if self.has_next else "+"
+
+    def prev_cursor(self) -> str:
+        return f"b{self.first_key}" if self.has_prev else "-"
+
+
+async def seek(
+    session: AsyncSession,
+    query: Select,
+    key: InstrumentedAttribute,
+    cursor: Optional[str] = None,
+    position: int = 0,
+    limit: int = PAGE_SIZE,
+) -> Page:
+    """
+    Keyset (seek) pagination over a unique, indexed key
+
+    Args:
+        session (AsyncSession): Session
+        query (Select): Query selecting the entities to paginate
+        key (InstrumentedAttribute): Unique key to seek on, usually the primary key
+        cursor (Optional[str]): "a<key>" for the page after key, "b<key>" for the page
+            before key, None for the page at ``position``
+        position (int): Index of the first item of the requested page
+        limit (int): Page size
+
+    Returns:
+        Page: Requested page
+    """
+    if cursor and cursor[0] == "a":
+        query = query.where(key > int(cursor[1:])).order_by(key.asc())
+    elif cursor and cursor[0] == "b":
+        query = query.where(key < int(cursor[1:])).order_by(key.desc())
+    else:
+        # Jump to an arbitrary position is the only case still using OFFSET
+        query = query.order_by(key.asc()).offset(position)
+
+    result = await session.execute(query.limit(limit + 1))
+    items = list(result.scalars().all())
+    more = len(items) > limit
+    items = items[:limit]
+
+    if cursor and cursor[0] == "b":
+        items.reverse()
+        has_prev, has_next = more, True
+    else:
+        has_prev, has_next = bool(cursor) or position > 0, more
+
+    first_key = getattr(items[0], key.key) if items else None
+    last_key = getattr(items[-1], key.key) if items else None
+    return Page(items, position, first_key, last_key, has_prev, has_next)
@@ -0,0 +1,85 @@
+import time
+from typing import Dict, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.db.models import LotteryPots
+
+
+class PotCache:
+    """
+    In-process cache of lottery pots, one running-aggregate row per round.
+
+    The cached value of a round is dropped by ``invalidate`` once a local
+    write is committed and expires after ``ttl`` seconds to pick up writes
+    of other processes. A read that raced with an invalidation is not
+    cached, as it may have seen the pot from before the write.
+    """
+
+    def __init__(self, ttl: float = 5):
+        self.ttl = ttl
+        # round_id -> (pot, deposited, cached_at)
+        self._pots: Dict[int, Tuple[float, float, float]] = {}
+        # round_id -> number of invalidations
+        self._generations: Dict[int, int] = {}
+
+    async def get(self, session: AsyncSession, round_id: int) -> Tuple[float, float]:
+        """
+        Get pot of the lottery round
+
+        Args:
+            session (AsyncSession): Session used on cache miss
+            round_id (int): Lottery round id
+
+        Returns:
+            Tuple[float, float]: Pot (sum of winnings) and sum of deposits
+        """
+        cached = self._pots.get(round_id)
+        if cached and time.monotonic() - cached[2] < self.ttl:
+            return cached[0], cached[1]
+
+        generation = self._generations.get(round_id, 0)
+        result = await session.execute(
+            select(LotteryPots.pot, LotteryPots.deposited).where(
+                LotteryPots.round_id == round_id
+            )
+        )
+        pot, deposited = result.first() or (0, 0)
+        if self._generations.get(round_id, 0) == generation:
+            self._pots[round_id] = (pot, deposited, time.monotonic())
+        return pot, deposited
+
+    async def add(
+        self, session: AsyncSession, round_id: int, pot: float, deposited: float
+    ) -> None:
+        """
+        Add to the running aggregate of the round within the caller's
+        transaction, ``invalidate`` the round once it is committed
+
+        Args:
+            session (AsyncSession): Session of the transaction inserting the bet
+            round_id (int): Lottery round id
+            pot (float): Winnings to add to the pot
+            deposited (float): Deposit to add
+        """
+        statement = insert(LotteryPots).values(
+            round_id=round_id, pot=pot, deposited=deposited
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[LotteryPots.round_id],
+            set_={
+                "pot": LotteryPots.pot + statement.excluded.pot,
+                "deposited": LotteryPots.deposited + statement.excluded.deposited,
+                "updated_at": func.current_timestamp(),
+            },
+        )
+        await session.execute(statement)
+
+    def invalidate(self, round_id: int) -> None:
+        self._generations[round_id] = self._generations.get(round_id, 0) + 1
+        self._pots.pop(round_id, None)
+
+
+pot_cache = PotCache()
@@ -0,0 +1,210 @@
+from datetime import UTC, datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+from loguru import logger
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.config import settings
+from backend.db.models import CoinPrices
+from backend.db.session import async_session_maker
+from backend.services.prices import Quote
+
+
+def to_timestamp(moment: datetime) -> float:
+    # Columns are naive UTC
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=UTC)
+    return moment.timestamp()
+
+
+def to_datetime(timestamp: float) -> datetime:
+    return datetime.fromtimestamp(timestamp, tz=UTC).replace(tzinfo=None)
+
+
+class PriceRing:
+    """
+    Last ``capacity`` samples of one coin in time order.
+
+    Every sample is written twice, at ``i`` and ``i + capacity``, so the
+    samples always form one contiguous sorted window of the arrays and a
+    lookup is a single binary search.
+    """
+
+    __slots__ = ("capacity", "times", "prices", "start", "size")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.times = np.zeros(capacity * 2)
+        self.prices = np.zeros(capacity * 2)
+        self.start = 0
+        self.size = 0
+
+    def append(self, timestamp: float, price: float) -> None:
+        if self.size and timestamp <= self.times[self.start + self.size - 1]:
+            return
+        if self.size < self.capacity:
+            i = (self.start + self.size) % self.capacity
+            self.size += 1
+        else:
+            i = self.start
+            self.start = (self.start + 1) % self.capacity
+        self.times[i] = self.times[i + self.capacity] = timestamp
+        self.prices[i] = self.prices[i + self.capacity] = price
+
+    def oldest(self) -> Optional[float]:
+        return float(self.times[self.start]) if self.size else None
+
+    def latest(self) -> Optional[float]:
+        if not self.size:
+            return None
+        return float(self.prices[self.start + self.size - 1])
+
+    def price_at(self, timestamp: float) -> Optional[float]:
+        """
+        Price of the last sample taken at or before ``timestamp``
+        """
+        times = self.times[self.start : self.start + self.size]
+        i = int(np.searchsorted(times, timestamp, side="right"))
+        if i == 0:
+            return None
+        return float(self.prices[self.start + i - 1])
+
+    def prices_at(self, timestamps: np.ndarray) -> np.ndarray:
+        """
+        ``price_at`` of every timestamp, NaN where there is no sample
+        """
+        times = self.times[self.start : self.start + self.size]
+        i = np.searchsorted(times, timestamps, side="right")
+        prices = self.prices[self.start + np.maximum(i, 1) - 1]
+        return np.where(i > 0, prices, np.nan)
+
+
+class PriceHistory:
+    """
+    Time series of coin quotes sampled by the price feed.
+
+    Samples are appended to the ``coin_prices`` table and to an in-memory
+    ring per coin. Sample times are rounded down to ``interval`` seconds,
+    so every worker writes the same key for the same refresh and only one
+    of them gets stored. Lookups older than the rings go to the table.
+    """
+
+    def __init__(self, interval: float = 60, capacity: int = 10_080):
+        self.interval = interval
+        self.capacity = capacity
+        self._rings: Dict[str, PriceRing] = {}
+
+    def _ring(self, coin: str) -> PriceRing:
+        ring = self._rings.get(coin)
+        if ring is None:
+            ring = self._rings[coin] = PriceRing(self.capacity)
+        return ring
+
+    async def record(self, quotes: List[Quote]) -> None:
+        """
+        Append quotes of one refresh of the price feed
+
+        Args:
+            quotes (List[Quote]): Quotes
+        """
+        if not quotes:
+            return
+        sampled_at = quotes[0].updated_at // self.interval * self.interval
+        for quote in quotes:
+            self._ring(quote.name).append(sampled_at, quote.price)
+        async with async_session_maker() as session:
+            await session.execute(
+                insert(CoinPrices)
+                .values(
+                    [
+                        {
+                            "coin": quote.name,
+                            "sampled_at": to_datetime(sampled_at),
+                            "price": quote.price,
+                        }
+                        for quote in quotes
+                    ]
+                )
+                .on_conflict_do_nothing()
+            )
+            await session.commit()
+
+    async def load(self) -> None:
+        """
+        Fill the rings with samples of the last ``capacity`` intervals
+        """
+        since = datetime.now(UTC) - timedelta(seconds=self.interval * self.capacity)
+        try:
+            async with async_session_maker() as session:
+                result = await session.execute(
+                    select(CoinPrices.coin, CoinPrices.sampled_at, CoinPrices.price)
+                    .where(CoinPrices.sampled_at >= since.replace(tzinfo=None))
+                    .order_by(CoinPrices.sampled_at)
+                )
+                rows = result.all()
+        except Exception as e:
+            # Bets fall back to the table until the rings fill up
+            logger.error(
+                f"Не удалось загрузить историю курсов: {e.__class__.__name__}: {e}"
+            )
+            return
+        for coin, sampled_at, price in rows:
+            self._ring(coin).append(to_timestamp(sampled_at), price)
+
+    def latest(self, coin: str) -> Optional[float]:
+        ring = self._rings.get(coin)
+        return ring.latest() if ring else None
+
+    def prices_at(self, coin: str, timestamps: np.ndarray) -> np.ndarray:
+        """
+        Get prices of the coin at many moments from the ring
+
+        Args:
+            coin (str): Coin name
+            timestamps (np.ndarray): Moments as UNIX timestamps
+
+        Returns:
+            np.ndarray: Prices, NaN for moments before the ring
+        """
+        ring = self._rings.get(coin)
+        if ring is None or not ring.size:
+            return np.full(len(timestamps), np.nan)
+        return ring.prices_at(timestamps)
+
+    async def price_at(
+        self, session: AsyncSession, coin: str, moment: datetime
+    ) -> Optional[float]:
+        """
+        Get price of the coin at the moment
+
+        Args:
+            session (AsyncSession): Session used for samples older than the ring
+            coin (str): Coin name
+            moment (datetime): Moment, naive datetimes are UTC
+
+        Returns:
+            Optional[float]: Price of the last sample at or before the moment,
+                None if there is none
+        """
+        timestamp = to_timestamp(moment)
+        ring = self._rings.get(coin)
+        if ring is not None and ring.size and ring.oldest() <= timestamp:
+            return ring.price_at(timestamp)
+        result = await session.execute(
+            select(CoinPrices.price)
+            .where(
+                CoinPrices.coin == coin,
+                CoinPrices.sampled_at <= to_datetime(timestamp),
+            )
+            .order_by(CoinPrices.sampled_at.desc())
+            .limit(1)
+        )
+        return result.scalar()
+
+
+price_history = PriceHistory(
+    settings.price_refresh_interval, settings.price_history_size
+)
@@ -0,0 +1,140 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import asyncpg
+from loguru import logger
+
+from backend.config import settings
+
+Callback = Callable[[str], None]
+
+
+class LocalPubSub:
+    """
+    In-process stand-in of Postgres LISTEN/NOTIFY for a single worker
+    """
+
+    def __init__(self):
+        self._callbacks: Dict[str, List[Callback]] = {}
+        self._reconnect_callbacks: List[Callable[[], Awaitable[None]]] = []
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    def subscribe(self, channel: str, callback: Callback) -> None:
+        self._callbacks.setdefault(channel, []).append(callback)
+
+    def unsubscribe(self, channel: str, callback: Callback) -> None:
+        callbacks = self._callbacks.get(channel, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+
+    def on_reconnect(self, callback: Callable[[], Awaitable[None]]) -> None:
+        self._reconnect_callbacks.append(callback)
+
+    async def publish(self, channel: str, payload: str) -> None:
+        self._dispatch(channel, payload)
+
+    def _dispatch(self, channel: str, payload: str) -> None:
+        for callback in list(self._callbacks.get(channel, [])):
+            try:
+                callback(payload)
+            except Exception as e:
+                logger.error(
+                    f"Ошибка обработчика канала {channel}: {e.__class__.__name__}: {e}"
+                )
+
+
+class PostgresPubSub(LocalPubSub):
+    """
+    Fan-out between workers and nodes over Postgres LISTEN/NOTIFY.
+
+    Uses one dedicated connection outside of the pool. When the connection
+    is lost it reconnects, listens again and runs ``on_reconnect`` callbacks
+    so subscribers can reload whatever they missed.
+    """
+
+    def __init__(self, dsn: str, reconnect_delay: float = 1):
+        super().__init__()
+        self.dsn = dsn
+        self.reconnect_delay = reconnect_delay
+        self._connection: Optional[asyncpg.Connection] = None
+        self._lock = asyncio.Lock()
+        self._reconnecting: Optional[asyncio.Task] = None
+        self._stopped = False
+
+    async def start(self) -> None:
+        self._stopped = False
+        await self._connect()
+
+    async def stop(self) -> None:
+        self._stopped = True
+        if self._reconnecting is not None:
+            self._reconnecting.cancel()
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+
+    def subscribe(self, channel: str, callback: Callback) -> None:
+        first = channel not in self._callbacks
+        super().subscribe(channel, callback)
+        if first and self._connection is not None:
+            asyncio.get_running_loop().create_task(self._listen(channel))
+
+    async def publish(self, channel: str, payload: str) -> None:
+        if self._connection is None:
+            await self._connect()
+        assert self._connection is not None
+        async with self._lock:
+            await self._connection.execute("SELECT pg_notify($1, $2)", channel, payload)
+
+    async def _connect(self) -> None:
+        async with self._lock:
+            if self._connection is not None and not self._connection.is_closed():
+                return
+            self._connection = await asyncpg.connect(self.dsn)
+            self._connection.add_termination_listener(self._on_termination)
+            for channel in self._callbacks:
+                await self._connection.add_listener(channel, self._on_notification)
+
+    async def _listen(self, channel: str) -> None:
+        if self._connection is None:
+            return
+        async with self._lock:
+            await self._connection.add_listener(channel, self._on_notification)
+
+    def _on_notification(self, connection, pid: int, channel: str, payload: str):
+        self._dispatch(channel, payload)
+
+    def _on_termination(self, connection) -> None:
+        self._connection = None
+        if self._stopped:
+            return
+        logger.error("Соединение LISTEN/NOTIFY потеряно, переподключение")
+        self._reconnecting = asyncio.get_running_loop().create_task(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        while not self._stopped:
+            try:
+                await self._connect()
+            except (OSError, asyncpg.PostgresError) as e:
+                logger.error(
+                    f"Не удалось переподключиться: {e.__class__.__name__}: {e}"
+                )
+                await asyncio.sleep(self.reconnect_delay)
+                continue
+            for callback in self._reconnect_callbacks:
+                await callback()
+            return
+
+
+def create_pubsub() -> LocalPubSub:
+    if settings.state_backend == "postgres":
+        return PostgresPubSub(settings.db_url.replace("+asyncpg", "", 1))
+    return LocalPubSub()
+
+
+pubsub = create_pubsub()
@@ -0,0 +1,179 @@
+from datetime import timedelta
+from typing import Callable, List, Optional, Tuple, Type, TypeVar
+
+from fastapi import HTTPException, status
+from loguru import logger
+from sqlalchemy import delete, func, insert, select, update
+
+from backend.config import settings
+from backend.core.rooms import (
+    R,
+    MemoryRoomStore,
+    RoomManager,
+    RoomStore,
+    room_not_found,
+)
+from backend.db.models import Rooms
+from backend.db.session import async_session_maker
+
+T = TypeVar("T")
+
+
+class PostgresRoomStore(RoomStore[R]):
+    """
+    Rooms in the ``rooms`` table, shared by all workers.
+
+    Rooms are kept as ``to_state`` JSON. ``update`` reads the room with its
+    version and writes it back with ``WHERE version = :version``; if another
+    worker got there first no row is updated and the change is retried on
+    the fresh room. Last use is ``updated_at``, the cap on the number of
+    rooms is enforced by ``reap``.
+    """
+
+    def __init__(self, room_type: Type[R], game: str, attempts: int = 10):
+        super().__init__(room_type)
+        self.game = game
+        self.attempts = attempts
+
+    async def create(self, room_id: str, room: R) -> None:
+        async with async_session_maker() as session:
+            await session.execute(
+                insert(Rooms).values(
+                    room_id=room_id,
+                    game=self.game,
+                    state=room.to_state(),
+                    going=room.going,
+                    finished=room.finished,
+                    version=1,
+                )
+            )
+            await session.commit()
+        await self._changed(room_id, 1, room)
+
+    async def get(self, room_id: str) -> Optional[R]:
+        async with async_session_maker() as session:
+            result = await session.execute(
+                select(Rooms.state).where(
+                    Rooms.room_id == room_id, Rooms.game == self.game
+                )
+            )
+            state = result.scalar()
+        return self.room_type.from_state(state) if state is not None else None
+
+    async def update(
+        self,
+        room_id: str,
+        mutate: Callable[[R], T],
+        discard: Optional[Callable[[R], bool]] = None,
+    ) -> T:
+        for _ in range(self.attempts):
+            async with async_session_maker() as session:
+                result = await session.execute(
+                    select(Rooms.state, Rooms.version).where(
+                        Rooms.room_id == room_id, Rooms.game == self.game
+                    )
+                )
+                row = result.first()
+                if row is None:
+                    raise room_not_found(room_id)
+                state, version = row
+                room = self.room_type.from_state(state)
+                mutated = mutate(room)
+                current = (Rooms.room_id == room_id) & (Rooms.version == version)
+                if discard is not None and discard(room):
+                    result = await session.execute(delete(Rooms).where(current))
+                    await session.commit()
+                    if result.rowcount:
+                        await self._changed(room_id, 0, None)
+                        return mutated
+                    continue
+                result = await session.execute(
+                    update(Rooms)
+                    .where(current)
+                    .values(
+                        state=room.to_state(),
+                        going=room.going,
+                        finished=room.finished,
+                        version=version + 1,
+                        updated_at=func.current_timestamp(),
+                    )
+                )
+                await session.commit()
+                if result.rowcount:
+                    await self._changed(room_id, version + 1, room)
+                    return mutated
+        logger.error(f"Не удалось изменить комнату {room_id}: слишком много конфликтов")
+        raise HTTPException(
+            status.HTTP_409_CONFLICT, detail="Комната занята, попробуйте ещё раз."
+        )
+
+    async def delete(self, room_id: str) -> None:
+        async with async_session_maker() as session:
+            result = await session.execute(
+                delete(Rooms).where(Rooms.room_id == room_id)
+            )
+            await session.commit()
+        if result.rowcount:
+            await self._changed(room_id, 0, None)
+
+    async def open_rooms(self) -> List[Tuple[str, R]]:
+        async with async_session_maker() as session:
+            result = await session.execute(
+                select(Rooms.room_id, Rooms.state).where(
+                    Rooms.game == self.game, Rooms.going.is_(False)
+                )
+            )
+            rows = result.all()
+        return [(room_id, self.room_type.from_state(state)) for room_id, state in rows]
+
+    async def finished_rooms(self) -> List[Tuple[str, R]]:
+        async with async_session_maker() as session:
+            result = await session.execute(
+                select(Rooms.room_id, Rooms.state).where(
+                    Rooms.game == self.game, Rooms.finished
+                )
+            )
+            rows = result.all()
+        return [(room_id, self.room_type.from_state(state)) for room_id, state in rows]
+
+    async def reap(self, idle_ttl: float) -> int:
+        idle = delete(Rooms).where(
+            Rooms.game == self.game,
+            Rooms.updated_at < func.current_timestamp() - timedelta(seconds=idle_ttl),
+        )
+        statements = [idle.returning(Rooms.room_id)]
+        if self.max_rooms is not None:
+            recent = (
+                select(Rooms.room_id)
+                .where(Rooms.game == self.game)
+                .order_by(Rooms.updated_at.desc())
+                .offset(self.max_rooms)
+            )
+            statements.append(
+                delete(Rooms)
+                .where(Rooms.room_id.in_(recent.scalar_subquery()))
+                .returning(Rooms.room_id)
+            )
+        reaped: List[str] = []
+        async with async_session_maker() as session:
+            for statement in statements:
+                result = await session.execute(statement)
+                reaped.extend(result.scalars().all())
+            await session.commit()
+        for room_id in reaped:
+            await self._changed(room_id, 0, None)
+        return len(reaped)
+
+
+room_manager = RoomManager(
+    settings.room_idle_ttl, settings.room_max_count, settings.room_reap_interval
+)
+
+
+def create_room_store(room_type: Type[R], game: str) -> RoomStore[R]:
+    if settings.room_backend == "postgres":
+        store: RoomStore[R] = PostgresRoomStore(room_type, game)
+    else:
+        store = MemoryRoomStore(room_type)
+    room_manager.register(store)
+    return store
@@ -0,0 +1,248 @@
+import asyncio
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from loguru import logger
+from sqlalchemy import BIGINT, Float, column, update, values
+from sqlalchemy.dialects.postgresql import insert
+
+from backend.core.rooms import GameRoom, RoomStore
+from backend.db.models import FinishedGame, Users
+from backend.db.rooms import room_manager
+from backend.db.session import async_session_maker
+
+# Game types of finished games played in rooms
+BLACKJACK_GAME_TYPE = 1
+DICE_GAME_TYPE = 2
+
+WINS = 3
+
+
+class Settlement:
+    __slots__ = ("room_id", "game_type", "amount", "winner", "loser", "game_hash")
+
+    def __init__(
+        self,
+        room_id: str,
+        game_type: int,
+        amount: int,
+        winner: int,
+        loser: int,
+        game_hash: str,
+    ):
+        self.room_id = room_id
+        self.game_type = game_type
+        self.amount = amount
+        self.winner = winner
+        self.loser = loser
+        self.game_hash = game_hash
+
+
+class SettlementEngine:
+    """
+    Pays out rooms that reached ``WINS`` wins.
+
+    Stores registered with ``register`` report every stored change; once a
+    room is won its settlement is queued and written by a background task,
+    so the move that won the room is answered without waiting for it. The
+    task waits ``interval`` seconds for other rooms finishing in the same
+    tick and keeps writing batches while rooms are queued; a failed batch
+    is queued again and retried with exponential backoff.
+
+    A batch is one transaction: the ``finished_games`` rows are inserted
+    with ``ON CONFLICT (room_id) DO NOTHING`` and only rooms actually
+    inserted move money, in a single ``UPDATE users ... FROM (VALUES ...)``,
+    so a room is paid exactly once however many times or by however many
+    workers it is reported. That makes it safe for ``sweep`` to report
+    every won room of the stores again: it runs on startup, covering
+    settlements lost with a stopped worker, and before rooms are reaped,
+    which is skipped until the sweep succeeds.
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.05,
+        retry_delay: float = 1,
+        max_retry_delay: float = 60,
+        chunk_size: int = 500,
+    ):
+        self.interval = interval
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.chunk_size = chunk_size
+        self._stores: List[Tuple[RoomStore, int]] = []
+        self._pending: Dict[str, Settlement] = {}
+        # Rooms known to be settled, skipped by sweeps while they exist
+        self._settled: Set[str] = set()
+        self._flushing: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._retrying = False
+
+    def register(self, store: RoomStore, game_type: int) -> None:
+        async def listener(
+            room_id: str, version: int, room: Optional[GameRoom]
+        ) -> None:
+            if room is None:
+                self._settled.discard(room_id)
+            elif max(room.results) >= WINS:
+                self.settle(room_id, game_type, room)
+
+        self._stores.append((store, game_type))
+        store.on_change(listener)
+
+    def settle(self, room_id: str, game_type: int, room: GameRoom) -> None:
+        """
+        Queue won room for the next batch
+
+        Args:
+            room_id (str): Room id
+            game_type (int): Game type of the finished game
+            room (GameRoom): Won room
+        """
+        if room_id in self._pending or room_id in self._settled:
+            return
+        self._pending[room_id] = self.settlement(room_id, game_type, room)
+        if self._flushing is None:
+            self._flushing = asyncio.get_running_loop().create_task(self._flush())
+
+    def settlement(self, room_id: str, game_type: int, room: GameRoom) -> Settlement:
+        winner_idx = room.results.index(max(room.results))
+        # Commitment of the shoe for blackjack, the room id otherwise
+        shoe = getattr(room, "shoe", None)
+        return Settlement(
+            room_id,
+            game_type,
+            room.reward,
+            room.players[winner_idx],
+            room.players[int(not winner_idx)],
+            shoe.commitment if shoe is not None else room_id,
+        )
+
+    async def sweep(self) -> int:
+        """
+        Settle won rooms of every registered store not known to be settled
+
+        Raises:
+            Exception: Write error, the rooms are left for the next sweep
+
+        Returns:
+            int: Number of rooms settled by this call
+        """
+        batch: List[Settlement] = []
+        won: Set[str] = set()
+        for store, game_type in self._stores:
+            for room_id, room in await store.finished_rooms():
+                if max(room.results) < WINS:
+                    continue
+                won.add(room_id)
+                if room_id not in self._settled:
+                    batch.append(self.settlement(room_id, game_type, room))
+        # Forget rooms deleted by other workers
+        self._settled &= won
+        settled = 0
+        for i in range(0, len(batch), self.chunk_size):
+            chunk = batch[i : i + self.chunk_size]
+            settled += len(await self.write(chunk))
+            self._settled.update(settlement.room_id for settlement in chunk)
+        if settled:
+            logger.info(f"Рассчитано пропущенных комнат: {settled}")
+        return settled
+
+    async def stop(self) -> None:
+        self._stopping = True
+        task = self._flushing
+        if task is not None:
+            if self._retrying:
+                task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        self._stopping = False
+
+    async def _flush(self) -> None:
+        try:
+            await asyncio.sleep(self.interval)
+            delay = self.retry_delay
+            while self._pending:
+                batch, self._pending = self._pending, {}
+                try:
+                    settled = await self.write(list(batch.values()))
+                except Exception as e:
+                    # Newer reports of the same rooms are identical
+                    self._pending = {**batch, **self._pending}
+                    if self._stopping:
+                        logger.error(
+                            f"Комнаты {', '.join(batch)} будут рассчитаны при запуске: {e.__class__.__name__}: {e}"
+                        )
+                        return
+                    logger.error(
+                        f"Не удалось рассчитать комнаты {', '.join(batch)}, "
+                        f"повтор через {delay} с: {e.__class__.__name__}: {e}"
+                    )
+                    self._retrying = True
+                    try:
+                        await asyncio.sleep(delay)
+                    finally:
+                        self._retrying = False
+                    delay = min(delay * 2, self.max_retry_delay)
+                    continue
+                delay = self.retry_delay
+                self._settled.update(batch)
+                for room_id in settled:
+                    settlement = batch[room_id]
+                    logger.info(
+                        f"Игра в комнате {room_id} завершена: {settlement.winner} выиграл у {settlement.loser} {settlement.amount}$"
+                    )
+        finally:
+            self._flushing = None
+
+    async def write(self, batch: List[Settlement]) -> List[str]:
+        """
+        Record finished games and move money of the batch in one transaction
+
+        Args:
+            batch (List[Settlement]): Settlements of different rooms
+
+        Returns:
+            List[str]: Ids of rooms settled by this call
+        """
+        async with async_session_maker() as session:
+            result = await session.execute(
+                insert(FinishedGame)
+                .values(
+                    [
+                        {
+                            "room_id": settlement.room_id,
+                            "game_type": settlement.game_type,
+                            "amount": settlement.amount,
+                            "first_user_id": settlement.winner,
+                            "second_user_id": settlement.loser,
+                            "game_hash": settlement.game_hash,
+                        }
+                        for settlement in batch
+                    ]
+                )
+                .on_conflict_do_nothing(index_elements=[FinishedGame.room_id])
+                .returning(FinishedGame.room_id)
+            )
+            settled = list(result.scalars())
+            deltas: Dict[int, float] = defaultdict(float)
+            for settlement in batch:
+                if settlement.room_id in settled:
+                    deltas[settlement.winner] += settlement.amount
+                    deltas[settlement.loser] -= settlement.amount
+            if deltas:
+                changes = values(
+                    column("telegram_id", BIGINT),
+                    column("delta", Float),
+                    name="deltas",
+                ).data(list(deltas.items()))
+                await session.execute(
+                    update(Users)
+                    .where(Users.telegram_id == changes.c.telegram_id)
+                    .values(money_balance=Users.money_balance + changes.c.delta)
+                )
+            await session.commit()
+        return settled
+
+
+settlement_engine = SettlementEngine()
+room_manager.on_reap(settlement_engine.sweep)
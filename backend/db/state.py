@@ -0,0 +1,209 @@
+import json
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from loguru import logger
+from sqlalchemy import delete, func, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+
+from backend.config import settings
+from backend.db.models import AppState
+from backend.db.pubsub import LocalPubSub, pubsub
+from backend.db.session import async_session_maker
+
+CHANNEL = "app_state"
+# Deleted keys announced in a single notification, under its 8000 bytes limit
+DELETE_BATCH = 50
+
+
+class StateStore:
+    """
+    Small versioned key-value store of state shared by all workers.
+
+    Every value lives in the ``app_state`` table together with a version.
+    Writes bump the version and NOTIFY the other workers in the same
+    transaction; each worker keeps the latest version of every key in memory,
+    so reads never leave the process. With ``persist=False`` it is a local
+    in-memory stand-in for a single process.
+    """
+
+    def __init__(self, pubsub: LocalPubSub, persist: bool = True):
+        self.pubsub = pubsub
+        self.persist = persist
+        self._values: Dict[str, Tuple[int, Any]] = {}
+        self._watchers: Dict[str, List[Callable[[Any], None]]] = {}
+        self._prefix_watchers: List[Tuple[str, Callable[[str, Any], None]]] = []
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key not in self._values:
+            return default
+        return self._values[key][1]
+
+    def items(self, prefix: str = "") -> Iterator[Tuple[str, Any]]:
+        """
+        Iterate over keys starting with ``prefix`` and their values
+
+        Args:
+            prefix (str): Key prefix
+
+        Returns:
+            Iterator[Tuple[str, Any]]: Keys and values
+        """
+        return (
+            (key, value)
+            for key, (_, value) in list(self._values.items())
+            if key.startswith(prefix)
+        )
+
+    def watch(self, key: str, callback: Callable[[Any], None]) -> None:
+        """
+        Call ``callback`` with the new value every time the key changes
+
+        Args:
+            key (str): Key
+            callback (Callable[[Any], None]): Called with the new value
+        """
+        self._watchers.setdefault(key, []).append(callback)
+        if key in self._values:
+            callback(self._values[key][1])
+
+    def watch_prefix(self, prefix: str, callback: Callable[[str, Any], None]) -> None:
+        """
+        Call ``callback`` with the key and the new value every time a key
+        starting with ``prefix`` changes
+
+        Args:
+            prefix (str): Key prefix
+            callback (Callable[[str, Any], None]): Called with the key and value
+        """
+        self._prefix_watchers.append((prefix, callback))
+        for key, (_, value) in self._values.items():
+            if key.startswith(prefix):
+                callback(key, value)
+
+    async def set(self, key: str, value: Any) -> int:
+        """
+        Persist new value of the key and fan it out to all workers
+
+        Args:
+            key (str): Key
+            value (Any): JSON-serializable value
+
+        Returns:
+            int: New version of the key
+        """
+        if not self.persist:
+            version = self._values.get(key, (0, None))[0] + 1
+            self._apply(key, version, value)
+            return version
+
+        serialized = json.dumps(value)
+        statement = insert(AppState).values(key=key, value=serialized, version=1)
+        statement = statement.on_conflict_do_update(
+            index_elements=[AppState.key],
+            set_={
+                "value": statement.excluded.value,
+                "version": AppState.version + 1,
+                "updated_at": func.current_timestamp(),
+            },
+        ).returning(AppState.version)
+        async with async_session_maker() as session:
+            version = (await session.execute(statement)).scalar_one()
+            payload = json.dumps({"key": key, "version": version, "value": value})
+            await session.execute(select(func.pg_notify(CHANNEL, payload)))
+            await session.commit()
+        self._apply(key, version, value)
+        return version
+
+    async def delete(self, keys: List[str]) -> int:
+        """
+        Delete keys on all workers, unless they were changed meanwhile
+
+        Only the versions known to this worker are deleted, so a key set again
+        by another worker is kept. Watchers are not called.
+
+        Args:
+            keys (List[str]): Keys
+
+        Returns:
+            int: Number of deleted keys
+        """
+        versions = {key: self._values[key][0] for key in keys if key in self._values}
+        if not versions:
+            return 0
+        if not self.persist:
+            self._forget(versions)
+            return len(versions)
+
+        statement = (
+            delete(AppState)
+            .where(tuple_(AppState.key, AppState.version).in_(list(versions.items())))
+            .returning(AppState.key, AppState.version)
+        )
+        async with async_session_maker() as session:
+            deleted = dict((await session.execute(statement)).all())
+            batch = list(deleted.items())
+            for start in range(0, len(batch), DELETE_BATCH):
+                payload = json.dumps(
+                    {"deleted": dict(batch[start : start + DELETE_BATCH])}
+                )
+                await session.execute(select(func.pg_notify(CHANNEL, payload)))
+            await session.commit()
+        self._forget(deleted)
+        return len(deleted)
+
+    async def load(self) -> None:
+        """
+        Load every key from the database, e.g. after notifications could be missed
+        """
+        if not self.persist:
+            return
+        async with async_session_maker() as session:
+            result = await session.execute(
+                select(AppState.key, AppState.version, AppState.value)
+            )
+            rows = result.all()
+        for key, version, value in rows:
+            self._apply(key, version, json.loads(value))
+
+    async def start(self) -> None:
+        self.pubsub.subscribe(CHANNEL, self._on_notification)
+        self.pubsub.on_reconnect(self.load)
+        await self.load()
+
+    def _on_notification(self, payload: str) -> None:
+        message = json.loads(payload)
+        if "deleted" in message:
+            self._forget(message["deleted"])
+            return
+        self._apply(message["key"], message["version"], message["value"])
+
+    def _forget(self, versions: Dict[str, int]) -> None:
+        for key, version in versions.items():
+            current = self._values.get(key)
+            if current is not None and current[0] <= version:
+                del self._values[key]
+
+    def _apply(self, key: str, version: int, value: Any) -> None:
+        current = self._values.get(key)
+        if current is not None and current[0] >= version:
+            return
+        self._values[key] = (version, value)
+        callbacks = [
+            partial(callback, value) for callback in self._watchers.get(key, [])
+        ]
+        callbacks.extend(
+            partial(callback, key, value)
+            for prefix, callback in self._prefix_watchers
+            if key.startswith(prefix)
+        )
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(
+                    f"Ошибка применения состояния {key}: {e.__class__.__name__}: {e}"
+                )
+
+
+state_store = StateStore(pubsub, persist=settings.state_backend == "postgres")
@@ -20,6 +20,10 @@ class CreateRoomRequest(BaseModel):
     reward: int
 
 
+class MatchRequest(BaseModel):
+    stake: int
+
+
 class RoomRequest(BaseModel):
     room_id: str
 
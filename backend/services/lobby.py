@@ -0,0 +1,141 @@
+import json
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from backend.core.rooms import RoomStore
+from backend.db.pubsub import LocalPubSub, pubsub
+from backend.services.room_hub import CHANNEL
+
+# (reward, created_at, room_id)
+LobbyKey = Tuple[int, float, str]
+
+
+class Lobby:
+    """
+    Open rooms of one game sorted by reward and creation time.
+
+    Rooms are kept in a sorted list of keys and each one is serialized once
+    when it opens, so a page is a bisect plus a join of ready JSON
+    fragments. The unfiltered first page, which most clients ask for, is
+    cached until a room opens or closes. The lobby follows room changes of
+    all workers over pub/sub.
+    """
+
+    def __init__(
+        self,
+        store: RoomStore,
+        pubsub: LocalPubSub,
+        page_size: int = 20,
+        max_closed: int = 10_000,
+    ):
+        self.store = store
+        self.pubsub = pubsub
+        self.game = store.room_type.__name__
+        self.page_size = page_size
+        self.max_closed = max_closed
+        self._keys: List[LobbyKey] = []
+        # room_id -> (key, serialized room)
+        self._rooms: Dict[str, Tuple[LobbyKey, str]] = {}
+        # Recently closed rooms, their creation may be announced after
+        # joining when the two happened on different workers
+        self._closed: OrderedDict[str, None] = OrderedDict()
+        self._first_page: Optional[bytes] = None
+
+    async def start(self) -> None:
+        self.pubsub.subscribe(CHANNEL, self._on_message)
+        for room_id, room in await self.store.open_rooms():
+            self.open(room_id, room.name, room.reward, room.created_at)
+        logger.info(f"Лобби {self.game}: открытых комнат {len(self._keys)}")
+
+    def open(self, room_id: str, name: str, reward: int, created_at: float) -> None:
+        if room_id in self._rooms or room_id in self._closed:
+            return
+        key = (reward, created_at, room_id)
+        insort(self._keys, key)
+        self._rooms[room_id] = (
+            key,
+            json.dumps(
+                {"room_id": room_id, "name": name, "reward": reward},
+                ensure_ascii=False,
+            ),
+        )
+        self._first_page = None
+
+    def close(self, room_id: str) -> None:
+        self._closed[room_id] = None
+        if len(self._closed) > self.max_closed:
+            self._closed.popitem(last=False)
+        entry = self._rooms.pop(room_id, None)
+        if entry is None:
+            return
+        del self._keys[bisect_left(self._keys, entry[0])]
+        self._first_page = None
+
+    def page(
+        self,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None,
+        min_reward: Optional[int] = None,
+        max_reward: Optional[int] = None,
+    ) -> bytes:
+        """
+        Get page of open rooms as a ready JSON response body
+
+        Args:
+            cursor (Optional[str]): ``next_cursor`` of the previous page
+            limit (Optional[int]): Page size, ``page_size`` by default
+            min_reward (Optional[int]): Lowest reward, inclusive
+            max_reward (Optional[int]): Highest reward, inclusive
+
+        Raises:
+            ValueError: If the cursor is malformed
+
+        Returns:
+            bytes: ``{"rooms": [...], "next_cursor": ...}``
+        """
+        limit = min(limit or self.page_size, self.page_size)
+        first_page = cursor is None and min_reward is None and max_reward is None
+        if first_page and limit == self.page_size and self._first_page is not None:
+            return self._first_page
+
+        if cursor is not None:
+            reward, created_at, room_id = cursor.split(":", 2)
+            start = bisect_right(self._keys, (int(reward), float(created_at), room_id))
+        else:
+            start = 0
+        if min_reward is not None:
+            start = max(start, bisect_left(self._keys, (min_reward,)))
+        end = len(self._keys)
+        if max_reward is not None:
+            end = bisect_left(self._keys, (max_reward + 1,))
+        keys = self._keys[start : min(start + limit, end)]
+
+        next_cursor = None
+        if keys and start + limit < end:
+            reward, created_at, room_id = keys[-1]
+            next_cursor = f"{reward}:{created_at!r}:{room_id}"
+        body = (
+            '{"rooms": ['
+            + ", ".join(self._rooms[key[2]][1] for key in keys)
+            + '], "next_cursor": '
+            + json.dumps(next_cursor)
+            + "}"
+        ).encode()
+        if first_page and limit == self.page_size:
+            self._first_page = body
+        return body
+
+    def _on_message(self, payload: str) -> None:
+        message = json.loads(payload)
+        room_id, entry = message["room_id"], message["lobby"]
+        if entry is None:
+            self.close(room_id)
+        elif message["game"] == self.game and message["version"] == 1:
+            self.open(room_id, entry["name"], entry["reward"], entry["created_at"])
+
+
+def create_lobby(store: RoomStore) -> Lobby:
+    return Lobby(store, pubsub)
@@ -0,0 +1,201 @@
+import asyncio
+import time
+from typing import Callable, Dict, List, Optional, Protocol, Sequence, Tuple, TypeVar
+from uuid import uuid4
+
+from loguru import logger
+
+from backend.core.blackjack import generate_room_id
+from backend.core.rooms import GameRoom, RoomStore
+
+
+class Ticket:
+    __slots__ = ("user_id", "stake", "enqueued_at", "token", "future")
+
+    def __init__(self, user_id: int, stake: int):
+        self.user_id = user_id
+        self.stake = stake
+        self.enqueued_at = time.monotonic()
+        # Tells this request apart from a newer one of the same player
+        self.token = uuid4().hex
+        self.future: asyncio.Future[Optional[str]] = (
+            asyncio.get_running_loop().create_future()
+        )
+
+
+class Queued(Protocol):
+    # A Ticket or a row of the shared queue
+    @property
+    def user_id(self) -> int: ...
+
+    @property
+    def stake(self) -> int: ...
+
+
+S = TypeVar("S", bound=Queued)
+
+
+def pair_stakes(tickets: Sequence[S], tolerance: float) -> List[Tuple[S, S]]:
+    """
+    Pair neighbours whose stakes differ by at most ``tolerance``
+
+    Args:
+        tickets (Sequence[S]): Tickets in stake order, oldest first on ties
+        tolerance (float): Allowed difference as a share of the lower stake
+
+    Returns:
+        List[Tuple[S, S]]: Pairs, lower stake first
+    """
+    pairs = []
+    i = 0
+    while i < len(tickets) - 1:
+        first, second = tickets[i], tickets[i + 1]
+        if second.stake <= first.stake * (1 + tolerance):
+            pairs.append((first, second))
+            i += 2
+        else:
+            i += 1
+    return pairs
+
+
+class Matchmaker:
+    """
+    Queue of players looking for an opponent in one game.
+
+    Players wait on their ticket while a background task wakes up on new
+    tickets, waits ``interval`` seconds to collect a batch and pairs
+    neighbours in stake order whose stakes differ by at most ``tolerance``.
+    Every pair gets a room created with both players already in it, so
+    there is nothing to race for, and both waiting requests get its id.
+    Tickets live in the memory of this process, so it only pairs players of
+    a single worker; ``PostgresMatchmaker`` shares them between workers.
+    """
+
+    def __init__(
+        self,
+        store: RoomStore,
+        make_room: Callable[[int, int, int], GameRoom],
+        tolerance: float = 0.1,
+        interval: float = 0.2,
+    ):
+        self.store = store
+        self.make_room = make_room
+        self.tolerance = tolerance
+        self.interval = interval
+        self._tickets: Dict[int, Ticket] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for ticket in self._tickets.values():
+            if not ticket.future.done():
+                ticket.future.set_result(None)
+        self._tickets.clear()
+
+    async def match(self, user_id: int, stake: int, timeout: float) -> Optional[str]:
+        """
+        Wait for an opponent
+
+        Args:
+            user_id (int): Telegram id of the player
+            stake (int): Reward the player plays for
+            timeout (float): Seconds to wait
+
+        Returns:
+            Optional[str]: Id of the created room or None if nobody was
+                found or the search was cancelled
+        """
+        await self.cancel(user_id)
+        ticket = Ticket(user_id, stake)
+        self._tickets[user_id] = ticket
+        try:
+            await self._enqueue(ticket)
+            return await asyncio.wait_for(asyncio.shield(ticket.future), timeout)
+        except asyncio.TimeoutError:
+            # The ticket could be matched right at the timeout
+            if ticket.future.done():
+                return ticket.future.result()
+            return None
+        finally:
+            # Also on cancellation, e.g. when the client disconnects
+            if self._tickets.get(user_id) is ticket:
+                del self._tickets[user_id]
+            if not ticket.future.done():
+                ticket.future.set_result(None)
+            await asyncio.shield(self._dequeue(ticket))
+
+    async def cancel(self, user_id: int) -> bool:
+        """
+        Stop the search of the player
+
+        Args:
+            user_id (int): Telegram id of the player
+
+        Returns:
+            bool: False if the player was not searching
+        """
+        ticket = self._tickets.pop(user_id, None)
+        if ticket is None:
+            return False
+        if not ticket.future.done():
+            ticket.future.set_result(None)
+        return True
+
+    def pair(self) -> List[Tuple[Ticket, Ticket]]:
+        """
+        Take pairs of compatible tickets out of the queue
+
+        Returns:
+            List[Tuple[Ticket, Ticket]]: Pairs, lower stake first
+        """
+        tickets = sorted(
+            self._tickets.values(),
+            key=lambda ticket: (ticket.stake, ticket.enqueued_at),
+        )
+        pairs = pair_stakes(tickets, self.tolerance)
+        for first, second in pairs:
+            del self._tickets[first.user_id], self._tickets[second.user_id]
+        return pairs
+
+    async def _enqueue(self, ticket: Ticket) -> None:
+        self._wakeup.set()
+
+    async def _dequeue(self, ticket: Ticket) -> None:
+        pass
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            await asyncio.sleep(self.interval)
+            self._wakeup.clear()
+            try:
+                await self._round()
+            except Exception as e:
+                logger.error(f"Ошибка подбора соперников: {e.__class__.__name__}: {e}")
+
+    async def _round(self) -> None:
+        for first, second in self.pair():
+            room_id = await self._create_room(first, second)
+            for ticket in (first, second):
+                if not ticket.future.done():
+                    ticket.future.set_result(room_id)
+
+    async def _create_room(self, first: Queued, second: Queued) -> Optional[str]:
+        room_id = generate_room_id()
+        try:
+            await self.store.create(
+                room_id, self.make_room(first.stake, first.user_id, second.user_id)
+            )
+        except Exception as e:
+            logger.error(
+                f"Не удалось создать комнату для {first.user_id} и {second.user_id}: {e.__class__.__name__}: {e}"
+            )
+            return None
+        return room_id
@@ -0,0 +1,266 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import aiohttp
+from bs4 import BeautifulSoup
+from loguru import logger
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+from backend.config import settings
+
+COINMARKETCAP_URL = "https://coinmarketcap.com"
+HEADERS = {
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.9"
+}
+
+
+class Quote:
+    __slots__ = ("name", "symbol", "price", "text", "updated_at")
+
+    def __init__(
+        self, name: str, symbol: str, price: float, text: str, updated_at: float
+    ):
+        self.name = name
+        self.symbol = symbol
+        self.price = price
+        # Price as shown by the source, e.g. "$1,234.56"
+        self.text = text
+        self.updated_at = updated_at
+
+    def to_dict(self) -> Dict[str, str]:
+        return {"name": self.name, "symbol": self.symbol, "price": self.text}
+
+
+def parse_price(text: str) -> float:
+    return float(text.replace("$", "").replace(",", "").strip())
+
+
+# Rows of the coins table of the coinmarketcap.com main page as
+# ("Name SYMBOL", "$price") pairs, one function per HTML parser
+RowParser = Callable[[str, int], List[Tuple[str, str]]]
+
+
+def rows_selectolax(html: str, limit: int) -> List[Tuple[str, str]]:
+    table = LexborHTMLParser(html).css_first("tbody")
+    rows = []
+    for tr in table.css("tr")[:limit]:
+        tds = tr.css("td")
+        rows.append((tds[2].text(separator=" ", strip=True), tds[3].text()))
+    return rows
+
+
+def rows_lxml(html: str, limit: int) -> List[Tuple[str, str]]:
+    table = lxml.html.fromstring(html).find(".//tbody")
+    rows = []
+    for tr in table.iter("tr"):
+        if len(rows) == limit:
+            break
+        tds = list(tr.iter("td"))
+        name = " ".join(text.strip() for text in tds[2].itertext() if text.strip())
+        rows.append((name, "".join(tds[3].itertext())))
+    return rows
+
+
+def rows_html_parser(html: str, limit: int) -> List[Tuple[str, str]]:
+    table = BeautifulSoup(html, "html.parser").find("tbody")
+    rows = []
+    for tr in table.find_all("tr", limit=limit):
+        tds = tr.find_all("td")
+        rows.append((tds[2].get_text(" ", strip=True), tds[3].get_text()))
+    return rows
+
+
+ROW_PARSERS: Dict[str, RowParser] = {"html.parser": rows_html_parser}
+if lxml is not None:
+    ROW_PARSERS["lxml"] = rows_lxml
+if LexborHTMLParser is not None:
+    ROW_PARSERS["selectolax"] = rows_selectolax
+
+
+def get_row_parser(name: str = "auto") -> RowParser:
+    """
+    Get HTML parser by name, "auto" picks the fastest installed one.
+
+    selectolax is a dependency; html.parser is only a last resort, as it
+    holds the GIL long enough to stall the event loop even in a thread.
+
+    Args:
+        name (str): "auto", "selectolax", "lxml" or "html.parser"
+
+    Returns:
+        RowParser: Parser of rows of the coins table
+    """
+    if name == "auto":
+        for name in ("selectolax", "lxml", "html.parser"):
+            if name in ROW_PARSERS:
+                break
+    if name not in ROW_PARSERS:
+        raise ValueError(f"HTML parser {name} is not installed")
+    if name == "html.parser":
+        logger.warning(
+            "Курсы разбираются html.parser: разбор блокирует event loop, "
+            "установите selectolax или lxml"
+        )
+    return ROW_PARSERS[name]
+
+
+def parse_quotes(
+    html: str, limit: int = 20, parser: RowParser = rows_html_parser
+) -> List[Quote]:
+    """
+    Parse quotes from the table of the coinmarketcap.com main page
+
+    Args:
+        html (str): Page
+        limit (int): Number of top coins
+        parser (RowParser): HTML parser
+
+    Returns:
+        List[Quote]: Quotes in the order of the table
+    """
+    now = time.time()
+    quotes = []
+    for name_symbol, text in parser(html, limit):
+        name, symbol = name_symbol.rsplit(" ", maxsplit=1)
+        quotes.append(Quote(name, symbol, parse_price(text), text, now))
+    return quotes
+
+
+class PriceSource(ABC):
+    @abstractmethod
+    async def fetch(self) -> str:
+        """
+        Get the page with quotes
+        """
+
+    async def close(self) -> None:
+        pass
+
+
+class CoinMarketCapSource(PriceSource):
+    """
+    Top coins scraped from the coinmarketcap.com main page over one
+    long-lived HTTP session
+    """
+
+    def __init__(self, url: str = COINMARKETCAP_URL):
+        self.url = url
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def fetch(self) -> str:
+        if self._session is None:
+            self._session = aiohttp.ClientSession(headers=HEADERS)
+        async with self._session.get(self.url) as response:
+            return await response.text()
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class FixtureSource(PriceSource):
+    """
+    Quotes from a saved coinmarketcap.com page, for tests and local runs
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    async def fetch(self) -> str:
+        with open(self.path, encoding="utf-8") as file:
+            return file.read()
+
+
+# Called with quotes of every successful refresh
+RefreshListener = Callable[[List[Quote]], Awaitable[None]]
+
+
+class PriceFeed:
+    """
+    Snapshot of quotes refreshed by a background task every ``interval``
+    seconds. Readers never touch the network; a failed refresh keeps the
+    previous snapshot. The page is parsed in a worker thread, so parsing
+    never blocks the event loop shared with the bot.
+    """
+
+    def __init__(
+        self,
+        source: PriceSource,
+        parser: RowParser = rows_html_parser,
+        interval: float = 60,
+        limit: int = 20,
+    ):
+        self.source = source
+        self.parser = parser
+        self.interval = interval
+        self.limit = limit
+        self._quotes: Dict[str, Quote] = {}
+        self.updated_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self._listeners: List[RefreshListener] = []
+
+    def on_refresh(self, listener: RefreshListener) -> None:
+        self._listeners.append(listener)
+
+    def quotes(self) -> List[Quote]:
+        return list(self._quotes.values())
+
+    def get(self, name: str) -> Optional[Quote]:
+        return self._quotes.get(name)
+
+    async def refresh(self) -> None:
+        try:
+            html = await self.source.fetch()
+            quotes = await asyncio.get_running_loop().run_in_executor(
+                None, parse_quotes, html, self.limit, self.parser
+            )
+        except Exception as e:
+            logger.error(f"Не удалось обновить курсы: {e.__class__.__name__}: {e}")
+            return
+        self._quotes = {quote.name: quote for quote in quotes}
+        self.updated_at = time.time()
+        for listener in self._listeners:
+            try:
+                await listener(quotes)
+            except Exception as e:
+                logger.error(f"Ошибка обработки курсов: {e.__class__.__name__}: {e}")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.source.close()
+
+    async def _run(self) -> None:
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.interval)
+
+
+def create_price_source() -> PriceSource:
+    if settings.price_source == "fixture":
+        return FixtureSource(settings.price_fixture_path)
+    return CoinMarketCapSource()
+
+
+price_feed = PriceFeed(
+    create_price_source(),
+    get_row_parser(settings.price_parser),
+    settings.price_refresh_interval,
+)
@@ -0,0 +1,211 @@
+import asyncio
+import json
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Set, Tuple
+
+from fastapi import WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from loguru import logger
+
+from backend.core.rooms import GameRoom, RoomStore, room_not_found
+from backend.db.pubsub import LocalPubSub, pubsub
+
+CHANNEL = "rooms"
+
+# WebSocket close codes
+ROOM_CLOSED = 1000
+ROOM_NOT_FOUND = 4404
+
+Render = Callable[[Any], Dict[str, Any]]
+# Version of the room and whether it is deleted
+Update = Tuple[int, bool]
+
+
+class RoomHub:
+    """
+    Fan-out of room changes to subscribed connections of all workers.
+
+    Every stored change is published over pub/sub as the room version only,
+    the state holds the undealt cards of the shoe and must not leave the
+    database. Rooms still waiting for a player also carry their public lobby
+    entry. A subscriber only keeps the latest version it has not sent yet, so
+    a slow client never makes updates pile up, re-reads the room once per
+    version and worker, and renders it into the changes of its own view
+    since the last message.
+    """
+
+    def __init__(self, pubsub: LocalPubSub, keepalive: float = 15):
+        self.pubsub = pubsub
+        self.keepalive = keepalive
+        self._queues: Dict[str, Set[asyncio.Queue[Update]]] = {}
+        # room_id -> (version, read of the room), shared by its subscribers
+        self._reads: Dict[str, Tuple[int, asyncio.Task]] = {}
+
+    def start(self) -> None:
+        self.pubsub.subscribe(CHANNEL, self._on_message)
+
+    async def publish(
+        self, room_id: str, version: int, room: Optional[GameRoom]
+    ) -> None:
+        message = {
+            "room_id": room_id,
+            "version": version,
+            "deleted": room is None,
+            "lobby": None,
+        }
+        if room is not None:
+            message["game"] = type(room).__name__
+            if not room.going:
+                message["lobby"] = {
+                    "name": room.name,
+                    "reward": room.reward,
+                    "created_at": room.created_at,
+                }
+        await self.pubsub.publish(CHANNEL, json.dumps(message))
+
+    def subscribe(self, room_id: str) -> asyncio.Queue[Update]:
+        queue: asyncio.Queue[Update] = asyncio.Queue(maxsize=1)
+        self._queues.setdefault(room_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, room_id: str, queue: asyncio.Queue[Update]) -> None:
+        queues = self._queues.get(room_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._queues[room_id]
+            self._reads.pop(room_id, None)
+
+    def _on_message(self, payload: str) -> None:
+        message = json.loads(payload)
+        for queue in self._queues.get(message["room_id"], ()):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait((message["version"], message["deleted"]))
+
+    async def read(
+        self, store: RoomStore, room_id: str, version: int
+    ) -> Optional[GameRoom]:
+        """
+        Read the room at least as new as ``version``, once for all subscribers
+
+        Args:
+            store (RoomStore): Store of the room
+            room_id (str): Room id
+            version (int): Announced version
+
+        Returns:
+            Optional[GameRoom]: Room or None if it was deleted
+        """
+        cached = self._reads.get(room_id)
+        if cached is None or cached[0] < version:
+            cached = version, asyncio.ensure_future(store.get(room_id))
+            if room_id in self._queues:
+                self._reads[room_id] = cached
+        return await asyncio.shield(cached[1])
+
+    async def stream(
+        self, store: RoomStore, room_id: str, render: Render
+    ) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Stream view of the room: whole view first, then only changed keys
+
+        Args:
+            store (RoomStore): Store of the room
+            room_id (str): Room id
+            render (Render): Renders room as seen by the subscriber
+
+        Yields:
+            Optional[Dict[str, Any]]: Changes of the view, None when nothing
+                changed for ``keepalive`` seconds
+        """
+        queue = self.subscribe(room_id)
+        try:
+            room = await store.get(room_id)
+            if room is None:
+                yield {"msg": "Комната закрыта."}
+                return
+            last = render(room)
+            yield last
+            seen = 0
+            while True:
+                try:
+                    version, deleted = await asyncio.wait_for(
+                        queue.get(), self.keepalive
+                    )
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                # Notifications of different workers may come out of order
+                if version <= seen and not deleted:
+                    continue
+                seen = version
+                room = None if deleted else await self.read(store, room_id, version)
+                if room is None:
+                    yield {"msg": "Комната закрыта."}
+                    return
+                view = render(room)
+                changes = {
+                    key: value for key, value in view.items() if last.get(key) != value
+                }
+                last = view
+                if changes:
+                    yield changes
+        finally:
+            self.unsubscribe(room_id, queue)
+
+
+room_hub = RoomHub(pubsub)
+
+
+async def serve_websocket(
+    websocket: WebSocket, store: RoomStore, room_id: str, render: Render
+) -> None:
+    """
+    Push changes of the room to the WebSocket until either side closes it
+    """
+    if await store.get(room_id) is None:
+        await websocket.close(ROOM_NOT_FOUND)
+        return
+    await websocket.accept()
+
+    async def forward() -> None:
+        try:
+            async for changes in room_hub.stream(store, room_id, render):
+                if changes is not None:
+                    await websocket.send_json(changes)
+            await websocket.close(ROOM_CLOSED)
+        except (WebSocketDisconnect, RuntimeError):
+            # The client is gone, the receiving loop notices it
+            pass
+
+    forwarding = asyncio.create_task(forward())
+    try:
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    finally:
+        forwarding.cancel()
+    logger.info(f"Подписка на комнату {room_id} закрыта")
+
+
+async def serve_events(
+    store: RoomStore, room_id: str, render: Render
+) -> StreamingResponse:
+    """
+    Push changes of the room as server-sent events, fallback for WebSocket
+    """
+    if await store.get(room_id) is None:
+        raise room_not_found(room_id)
+
+    async def events() -> AsyncIterator[str]:
+        async for changes in room_hub.stream(store, room_id, render):
+            if changes is None:
+                yield ": keepalive\n\n"
+            else:
+                yield f"data: {json.dumps(changes, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
@@ -0,0 +1,248 @@
+import asyncio
+import time
+from datetime import UTC, datetime, timedelta
+from random import uniform
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from loguru import logger
+
+from backend.db.leases import LocalLease, create_lease
+
+# Ranges of minute, hour, day of month, month and day of week (0 is Sunday)
+CRON_FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+
+def parse_cron_field(field: str, low: int, high: int) -> Set[int]:
+    values: Set[int] = set()
+    for part in field.split(","):
+        part, _, step = part.partition("/")
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = map(int, part.split("-"))
+        else:
+            start = end = int(part)
+        if not low <= start <= end <= high:
+            raise ValueError(f"Cron field {field} is out of {low}-{high}")
+        values.update(range(start, end + 1, int(step) if step else 1))
+    return values
+
+
+class Cron:
+    """
+    Trigger of a standard five-field cron expression
+    ("minute hour day-of-month month day-of-week"), evaluated in UTC
+    """
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression {expression} must have 5 fields")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            parse_cron_field(field, low, high)
+            for field, (low, high) in zip(fields, CRON_FIELDS)
+        )
+        # 7 is Sunday as well
+        self.weekdays = {day % 7 for day in weekdays}
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    def matches_day(self, moment: datetime) -> bool:
+        day = moment.day in self.days
+        weekday = (moment.weekday() + 1) % 7 in self.weekdays
+        # Like cron, a restricted day of month and day of week are ORed
+        if self.any_day or self.any_weekday:
+            return day and weekday
+        return day or weekday
+
+    def next_after(self, moment: datetime) -> datetime:
+        """
+        Get the first time after the moment matching the expression
+
+        Args:
+            moment (datetime): Aware moment
+
+        Returns:
+            datetime: Next fire time, aware UTC
+        """
+        current = moment.astimezone(UTC).replace(second=0, microsecond=0)
+        current += timedelta(minutes=1)
+        limit = current + timedelta(days=366 * 5)
+        while current < limit:
+            if current.month not in self.months:
+                month = current.month % 12 + 1
+                current = current.replace(
+                    year=current.year + (month == 1),
+                    month=month,
+                    day=1,
+                    hour=0,
+                    minute=0,
+                )
+            elif not self.matches_day(current):
+                current = current.replace(hour=0, minute=0) + timedelta(days=1)
+            elif current.hour not in self.hours:
+                current = current.replace(minute=0) + timedelta(hours=1)
+            elif current.minute not in self.minutes:
+                current += timedelta(minutes=1)
+            else:
+                return current
+        raise ValueError(f"Cron expression {self.expression} never fires")
+
+
+class Job:
+    __slots__ = (
+        "name",
+        "func",
+        "trigger",
+        "jitter",
+        "lease_ttl",
+        "runs",
+        "failures",
+        "skipped",
+        "last_run_at",
+        "last_duration",
+        "max_duration",
+        "last_lag",
+        "max_lag",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[], Awaitable[None]],
+        trigger: Cron,
+        jitter: float,
+        lease_ttl: float,
+    ):
+        self.name = name
+        self.func = func
+        self.trigger = trigger
+        self.jitter = jitter
+        self.lease_ttl = lease_ttl
+        self.runs = 0
+        self.failures = 0
+        # Runs claimed by another owner or overlapping a running one
+        self.skipped = 0
+        self.last_run_at: Optional[datetime] = None
+        self.last_duration = 0.0
+        self.max_duration = 0.0
+        # Seconds between the scheduled time and the actual start
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+
+class Scheduler:
+    """
+    Runs coroutine jobs on cron triggers inside the running event loop.
+
+    Every job has its own task that sleeps until the next fire time plus a
+    random jitter of up to ``jitter`` seconds, so nodes do not hit the
+    database at the same instant. Before running, the job claims a lease for
+    that fire time: only one worker or node runs it, and a run is skipped
+    while the previous one still holds its lease, so runs never overlap.
+    """
+
+    def __init__(self, lease: LocalLease):
+        self.lease = lease
+        self._jobs: Dict[str, Job] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    def add(
+        self,
+        name: str,
+        func: Callable[[], Awaitable[None]],
+        trigger: Cron,
+        jitter: float = 0,
+        lease_ttl: float = 3600,
+    ) -> None:
+        """
+        Register job
+
+        Args:
+            name (str): Unique job name, also the key of its lease
+            func (Callable[[], Awaitable[None]]): Job
+            trigger (Cron): When to run it
+            jitter (float): Maximum random delay in seconds
+            lease_ttl (float): Seconds after which a run that never finished
+                stops blocking the next ones
+        """
+        self._jobs[name] = Job(name, func, trigger, jitter, lease_ttl)
+
+    def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        for job in self._jobs.values():
+            self._tasks.append(loop.create_task(self._run(job)))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        self._tasks.clear()
+
+    def stats(self) -> Dict[str, dict]:
+        """
+        Get run counts, durations and lags of every job
+
+        Returns:
+            Dict[str, dict]: Stats by job name
+        """
+        return {
+            job.name: {
+                "trigger": job.trigger.expression,
+                "runs": job.runs,
+                "failures": job.failures,
+                "skipped": job.skipped,
+                "last_run_at": job.last_run_at.isoformat() if job.last_run_at else None,
+                "last_duration_s": job.last_duration,
+                "max_duration_s": job.max_duration,
+                "last_lag_s": job.last_lag,
+                "max_lag_s": job.max_lag,
+            }
+            for job in self._jobs.values()
+        }
+
+    async def _run(self, job: Job) -> None:
+        while True:
+            fire_at = job.trigger.next_after(datetime.now(UTC))
+            delay = (fire_at - datetime.now(UTC)).total_seconds()
+            await asyncio.sleep(max(delay, 0) + uniform(0, job.jitter))
+            try:
+                claimed = await self.lease.acquire(
+                    job.name, fire_at.replace(tzinfo=None), job.lease_ttl
+                )
+            except Exception as e:
+                logger.error(
+                    f"Не удалось получить аренду задачи {job.name}: {e.__class__.__name__}: {e}"
+                )
+                continue
+            if not claimed:
+                job.skipped += 1
+                continue
+            await self._execute(job, fire_at)
+
+    async def _execute(self, job: Job, fire_at: datetime) -> None:
+        job.last_run_at = datetime.now(UTC)
+        job.last_lag = (job.last_run_at - fire_at).total_seconds()
+        job.max_lag = max(job.max_lag, job.last_lag)
+        started = time.monotonic()
+        try:
+            await job.func()
+        except Exception as e:
+            job.failures += 1
+            logger.error(f"Ошибка задачи {job.name}: {e.__class__.__name__}: {e}")
+        finally:
+            job.runs += 1
+            job.last_duration = time.monotonic() - started
+            job.max_duration = max(job.max_duration, job.last_duration)
+            try:
+                await self.lease.release(job.name)
+            except Exception as e:
+                logger.error(
+                    f"Не удалось освободить аренду задачи {job.name}: {e.__class__.__name__}: {e}"
+                )
+        logger.info(
+            f"Задача {job.name} выполнена за {job.last_duration:.3f} с, задержка {job.last_lag:.3f} с"
+        )
+
+
+scheduler = Scheduler(create_lease())
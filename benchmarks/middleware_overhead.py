@@ -0,0 +1,102 @@
+"""
+Per-request overhead of the middleware chain of ``backend.api.app``.
+
+Drives the ASGI application in-process (no sockets, no database) with and
+without the user middlewares and prints requests/sec of both runs.
+
+Usage:
+    python -m benchmarks.middleware_overhead [--requests 20000]
+"""
+
+import argparse
+import asyncio
+import copy
+import os
+import time
+from datetime import timedelta
+
+for key, value in {
+    "BOT_TOKEN": "0:benchmark",
+    "BOT_USERNAME": "benchmark_bot",
+    "DB_USER": "benchmark",
+    "DB_PASSWORD": "benchmark",
+    "DB_NAME": "benchmark",
+    "JWT_SECRET": "benchmark-secret-benchmark-secret-0",
+}.items():
+    os.environ.setdefault(key, value)
+
+from backend.api import app  # noqa: E402
+from backend.api.jwt import create_access_token  # noqa: E402
+
+USER_ID = 1
+PATH = "/invite/link"
+
+
+def make_scope(cookie: bytes | None, state: dict | None) -> dict:
+    headers = [(b"host", b"benchmark")]
+    if cookie:
+        headers.append((b"cookie", cookie))
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": PATH,
+        "raw_path": PATH.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": headers,
+        "client": ("127.0.0.1", 1),
+        "server": ("benchmark", 80),
+    }
+    if state is not None:
+        scope["state"] = dict(state)
+    return scope
+
+
+async def receive() -> dict:
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def run(asgi_app, requests: int, cookie: bytes | None, state: dict | None):
+    statuses = []
+
+    async def send(message: dict) -> None:
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        await asgi_app(make_scope(cookie, state), receive, send)
+    elapsed = time.perf_counter() - started
+    assert all(code == 200 for code in statuses), set(statuses)
+    return requests / elapsed
+
+
+async def main(requests: int) -> None:
+    token = await create_access_token(USER_ID, timedelta(days=1))
+    cookie = f"access_token={token}".encode()
+
+    bare = copy.copy(app)
+    bare.user_middleware = []
+    bare.middleware_stack = None
+
+    # Warm up both stacks and the verified token cache
+    await run(app, 100, cookie, None)
+    await run(bare, 100, None, {"user_id": USER_ID})
+
+    without = await run(bare, requests, None, {"user_id": USER_ID})
+    with_chain = await run(app, requests, cookie, None)
+
+    overhead = (1 / with_chain - 1 / without) * 1_000_000
+    print(f"without middlewares: {without:10.0f} req/s")
+    print(f"with middlewares:    {with_chain:10.0f} req/s")
+    print(f"overhead per request: {overhead:8.1f} µs")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
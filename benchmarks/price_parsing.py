@@ -0,0 +1,96 @@
+"""
+Parse time of the coinmarketcap.com page and how long it blocks the event loop.
+
+Parses the saved page ``benchmarks/fixtures/coinmarketcap.html`` with every
+installed HTML parser, first inline in the event loop (as requests used to)
+and then in a worker thread (as ``PriceFeed`` does), while a ticker task
+measures the longest stall of the loop.
+
+Usage:
+    python -m benchmarks.price_parsing [--runs 50]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from pathlib import Path
+
+for key, value in {
+    "BOT_TOKEN": "0:benchmark",
+    "BOT_USERNAME": "benchmark_bot",
+    "DB_USER": "benchmark",
+    "DB_PASSWORD": "benchmark",
+    "DB_NAME": "benchmark",
+}.items():
+    os.environ.setdefault(key, value)
+
+from backend.services.prices import ROW_PARSERS, RowParser, parse_quotes  # noqa: E402
+
+FIXTURE = Path(__file__).parent / "fixtures" / "coinmarketcap.html"
+TICK = 0.001
+
+
+async def longest_stall(parse, runs: int) -> float:
+    """
+    Run ``parse`` ``runs`` times while measuring the longest time the loop
+    did not get to a task sleeping for ``TICK`` seconds
+    """
+    stall = 0.0
+    done = False
+
+    async def ticker() -> None:
+        nonlocal stall
+        while not done:
+            started = time.perf_counter()
+            await asyncio.sleep(TICK)
+            stall = max(stall, time.perf_counter() - started - TICK)
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(TICK * 2)
+    for _ in range(runs):
+        await parse()
+        await asyncio.sleep(TICK * 2)
+    done = True
+    await task
+    return stall
+
+
+async def measure(html: str, parser: RowParser, runs: int) -> tuple:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        parse_quotes(html, 20, parser)
+        timings.append(time.perf_counter() - started)
+
+    async def inline() -> None:
+        parse_quotes(html, 20, parser)
+
+    async def in_thread() -> None:
+        await asyncio.get_running_loop().run_in_executor(
+            None, parse_quotes, html, 20, parser
+        )
+
+    blocked_inline = await longest_stall(inline, runs)
+    blocked_thread = await longest_stall(in_thread, runs)
+    return statistics.median(timings), blocked_inline, blocked_thread
+
+
+async def main(runs: int) -> None:
+    html = FIXTURE.read_text(encoding="utf-8")
+    print(f"page: {len(html) / 1024:.0f} KiB, {runs} runs per parser")
+    print(f"{'parser':<12} {'parse':>10} {'loop blocked':>14} {'in thread':>11}")
+    for name, parser in ROW_PARSERS.items():
+        parse, inline, thread = await measure(html, parser, runs)
+        print(
+            f"{name:<12} {parse * 1000:8.2f}ms {inline * 1000:12.2f}ms"
+            f" {thread * 1000:9.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.runs))
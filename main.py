@@ -1,23 +1,12 @@
 import asyncio
 
-import schedule
 import uvicorn
 
 import tgbot
 from backend.api import app
+from backend.api.jwt import prune_revocations
 from backend.db.actions import clear_game_sessions, mark_guess_games
-
-
-def task_mark_guess_games():
-    asyncio.run_coroutine_threadsafe(
-        coro=mark_guess_games(), loop=asyncio.get_running_loop()
-    )
-
-
-def task_clear_game_sessions():
-    asyncio.run_coroutine_threadsafe(
-        coro=clear_game_sessions(), loop=asyncio.get_running_loop()
-    )
+from backend.services.scheduler import Cron, scheduler
 
 
 async def start_uvicorn() -> None:
@@ -32,10 +21,15 @@ async def start_bot() -> None:
 
 
 async def main() -> None:
-    await asyncio.gather(start_bot(), start_uvicorn())
+    scheduler.add("clear_game_sessions", clear_game_sessions, Cron("0 0 * * *"))
+    scheduler.add("mark_guess_games", mark_guess_games, Cron("0 * * * *"), jitter=30)
+    scheduler.add("prune_revocations", prune_revocations, Cron("30 3 * * *"))
+    scheduler.start()
+    try:
+        await asyncio.gather(start_bot(), start_uvicorn())
+    finally:
+        await scheduler.stop()
 
 
 if __name__ == "__main__":
-    schedule.every().day.at("00:00").do(clear_game_sessions)
-    schedule.every().hour.at(":00").do(task_mark_guess_games)
     asyncio.run(main())
@@ -0,0 +1,29 @@
+"""rooms updated_at index
+
+Revision ID: 1f6c2d8e4a57
+Revises: e3a9b6d15c02
+Create Date: 2026-10-17 15:21:47.902113
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "1f6c2d8e4a57"
+down_revision: Union[str, Sequence[str], None] = "e3a9b6d15c02"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_rooms_updated_at", "rooms", ["game", "updated_at"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_rooms_updated_at", table_name="rooms")
@@ -0,0 +1,59 @@
+"""referral closure
+
+Revision ID: 3e8a5c1f0b62
+Revises: 9c6e2b5f7d18
+Create Date: 2026-10-17 21:05:42.318906
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "3e8a5c1f0b62"
+down_revision: Union[str, Sequence[str], None] = "9c6e2b5f7d18"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "referral_closure",
+        sa.Column("descendant_id", sa.BIGINT(), nullable=False),
+        sa.Column("ancestor_id", sa.BIGINT(), nullable=False),
+        sa.Column("depth", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("descendant_id", "ancestor_id"),
+    )
+    op.create_index(
+        "ix_referral_closure_ancestor",
+        "referral_closure",
+        ["ancestor_id"],
+        unique=False,
+    )
+    # Every referrer above every referred user, cycles cut by the depth limit
+    op.execute(
+        """
+        INSERT INTO referral_closure (descendant_id, ancestor_id, depth)
+        WITH RECURSIVE chain (descendant_id, ancestor_id, depth) AS (
+            SELECT referred_id, referrer_id, 1 FROM referrals
+            UNION ALL
+            SELECT chain.descendant_id, referrals.referrer_id, chain.depth + 1
+            FROM chain
+            JOIN referrals ON referrals.referred_id = chain.ancestor_id
+            WHERE chain.depth < 100
+        )
+        SELECT descendant_id, ancestor_id, min(depth)
+        FROM chain
+        WHERE descendant_id <> ancestor_id
+        GROUP BY descendant_id, ancestor_id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_referral_closure_ancestor", table_name="referral_closure")
+    op.drop_table("referral_closure")
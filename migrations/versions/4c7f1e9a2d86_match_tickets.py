@@ -0,0 +1,36 @@
+"""match tickets
+
+Revision ID: 4c7f1e9a2d86
+Revises: 6b0d4e7a2f93
+Create Date: 2026-10-17 23:38:12.507264
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "4c7f1e9a2d86"
+down_revision: Union[str, Sequence[str], None] = "6b0d4e7a2f93"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "match_tickets",
+        sa.Column("game", sa.String(length=16), nullable=False),
+        sa.Column("user_id", sa.BIGINT(), nullable=False),
+        sa.Column("stake", sa.Integer(), nullable=False),
+        sa.Column("token", sa.String(length=32), nullable=False),
+        sa.Column("enqueued_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("game", "user_id"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("match_tickets")
@@ -0,0 +1,46 @@
+"""lottery pots
+
+Revision ID: 5b7e2f4a9c31
+Revises: c859c56012aa
+Create Date: 2026-10-17 13:10:12.204518
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "5b7e2f4a9c31"
+down_revision: Union[str, Sequence[str], None] = "c859c56012aa"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "lottery_pots",
+        sa.Column("round_id", sa.BIGINT(), nullable=False),
+        sa.Column("pot", sa.Float(), nullable=False),
+        sa.Column("deposited", sa.Float(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("round_id"),
+    )
+    op.add_column(
+        "lottery_transactions",
+        sa.Column("round_id", sa.BIGINT(), server_default="0", nullable=False),
+    )
+    # Existing lottery history becomes round 0
+    op.execute(
+        "INSERT INTO lottery_pots (round_id, pot, deposited, updated_at) "
+        "SELECT 0, coalesce(sum(amount * multiplier - amount), 0), "
+        "coalesce(sum(amount), 0), now() FROM lottery_transactions"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("lottery_transactions", "round_id")
+    op.drop_table("lottery_pots")
@@ -0,0 +1,49 @@
+"""referral stats
+
+Revision ID: 6b0d4e7a2f93
+Revises: 3e8a5c1f0b62
+Create Date: 2026-10-17 22:14:09.641275
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "6b0d4e7a2f93"
+down_revision: Union[str, Sequence[str], None] = "3e8a5c1f0b62"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "referral_stats",
+        sa.Column("referrer_id", sa.BIGINT(), nullable=False),
+        sa.Column("referrals", sa.Integer(), nullable=False),
+        sa.Column("pending_bonus", sa.Float(), nullable=False),
+        sa.Column("lifetime_bonus", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("referrer_id"),
+    )
+    op.create_index(
+        "ix_referrals_referrer_id", "referrals", ["referrer_id"], unique=False
+    )
+    # Bonus taken before this revision is unknown, so it starts as pending
+    op.execute(
+        """
+        INSERT INTO referral_stats
+            (referrer_id, referrals, pending_bonus, lifetime_bonus)
+        SELECT referrer_id, count(*), sum(bonus), sum(bonus)
+        FROM referrals
+        GROUP BY referrer_id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_referrals_referrer_id", table_name="referrals")
+    op.drop_table("referral_stats")
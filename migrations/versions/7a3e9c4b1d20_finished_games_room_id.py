@@ -0,0 +1,34 @@
+"""finished games room_id
+
+Revision ID: 7a3e9c4b1d20
+Revises: 1f6c2d8e4a57
+Create Date: 2026-10-17 16:02:13.417520
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "7a3e9c4b1d20"
+down_revision: Union[str, Sequence[str], None] = "1f6c2d8e4a57"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "finished_games", sa.Column("room_id", sa.String(length=36), nullable=True)
+    )
+    op.create_unique_constraint(
+        "finished_games_room_id_key", "finished_games", ["room_id"]
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint("finished_games_room_id_key", "finished_games", type_="unique")
+    op.drop_column("finished_games", "room_id")
@@ -0,0 +1,35 @@
+"""app state
+
+Revision ID: 8d41c0e6f2b7
+Revises: 5b7e2f4a9c31
+Create Date: 2026-10-17 14:02:41.530117
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "8d41c0e6f2b7"
+down_revision: Union[str, Sequence[str], None] = "5b7e2f4a9c31"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "app_state",
+        sa.Column("key", sa.String(length=64), nullable=False),
+        sa.Column("value", sa.String(), nullable=False),
+        sa.Column("version", sa.BIGINT(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("key"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("app_state")
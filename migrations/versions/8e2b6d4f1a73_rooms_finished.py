@@ -0,0 +1,47 @@
+"""rooms finished
+
+Revision ID: 8e2b6d4f1a73
+Revises: 4c7f1e9a2d86
+Create Date: 2026-10-18 10:12:36.284519
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "8e2b6d4f1a73"
+down_revision: Union[str, Sequence[str], None] = "4c7f1e9a2d86"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "rooms",
+        sa.Column("finished", sa.Boolean(), server_default="false", nullable=False),
+    )
+    # Same as GameRoom.finished for the rooms already stored
+    op.execute(
+        """
+        UPDATE rooms
+        SET finished = (state::jsonb -> 'results') @> '[3]'::jsonb
+            OR (going AND jsonb_array_length(state::jsonb -> 'players') < 2)
+        """
+    )
+    op.create_index(
+        "ix_rooms_finished",
+        "rooms",
+        ["game"],
+        unique=False,
+        postgresql_where=sa.text("finished"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_rooms_finished", table_name="rooms")
+    op.drop_column("rooms", "finished")
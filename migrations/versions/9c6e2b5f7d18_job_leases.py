@@ -0,0 +1,35 @@
+"""job leases
+
+Revision ID: 9c6e2b5f7d18
+Revises: d4f81a6c3e95
+Create Date: 2026-10-17 18:47:20.554183
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "9c6e2b5f7d18"
+down_revision: Union[str, Sequence[str], None] = "d4f81a6c3e95"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "job_leases",
+        sa.Column("name", sa.String(length=64), nullable=False),
+        sa.Column("fire_at", sa.DateTime(), nullable=False),
+        sa.Column("owner", sa.String(length=128), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("job_leases")
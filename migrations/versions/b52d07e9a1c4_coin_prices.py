@@ -0,0 +1,34 @@
+"""coin prices
+
+Revision ID: b52d07e9a1c4
+Revises: 7a3e9c4b1d20
+Create Date: 2026-10-17 17:24:51.630918
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "b52d07e9a1c4"
+down_revision: Union[str, Sequence[str], None] = "7a3e9c4b1d20"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "coin_prices",
+        sa.Column("coin", sa.String(length=64), nullable=False),
+        sa.Column("sampled_at", sa.DateTime(), nullable=False),
+        sa.Column("price", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("coin", "sampled_at"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("coin_prices")
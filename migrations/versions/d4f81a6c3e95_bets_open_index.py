@@ -0,0 +1,34 @@
+"""bets open index
+
+Revision ID: d4f81a6c3e95
+Revises: b52d07e9a1c4
+Create Date: 2026-10-17 18:05:33.271604
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "d4f81a6c3e95"
+down_revision: Union[str, Sequence[str], None] = "b52d07e9a1c4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_bets_open",
+        "bets",
+        ["supposed_at", "bet_id"],
+        unique=False,
+        postgresql_where=sa.text("status IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_bets_open", table_name="bets")
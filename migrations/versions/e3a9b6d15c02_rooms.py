@@ -0,0 +1,45 @@
+"""rooms
+
+Revision ID: e3a9b6d15c02
+Revises: 8d41c0e6f2b7
+Create Date: 2026-10-17 14:37:05.118342
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "e3a9b6d15c02"
+down_revision: Union[str, Sequence[str], None] = "8d41c0e6f2b7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "rooms",
+        sa.Column("room_id", sa.String(length=36), nullable=False),
+        sa.Column("game", sa.String(length=16), nullable=False),
+        sa.Column("state", sa.JSON(), nullable=False),
+        sa.Column("going", sa.Boolean(), nullable=False),
+        sa.Column("version", sa.BIGINT(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("room_id"),
+    )
+    op.create_index(
+        "ix_rooms_open",
+        "rooms",
+        ["game"],
+        unique=False,
+        postgresql_where=sa.text("NOT going"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_rooms_open", table_name="rooms")
+    op.drop_table("rooms")
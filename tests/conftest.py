@@ -0,0 +1,11 @@
+import os
+
+# Settings are read on import of backend modules
+for key, value in {
+    "BOT_TOKEN": "0:test",
+    "BOT_USERNAME": "test_bot",
+    "DB_USER": "test",
+    "DB_PASSWORD": "test",
+    "DB_NAME": "test",
+}.items():
+    os.environ.setdefault(key, value)
@@ -0,0 +1,154 @@
+import asyncio
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from backend.config import settings
+from backend.db import bets
+from backend.db.prices import PriceHistory, to_timestamp
+
+Row = namedtuple(
+    "Row", "bet_id user_id amount way coin start_value supposed_at", defaults=[None]
+)
+BASE = datetime(2026, 3, 1)
+
+
+@pytest.mark.parametrize(
+    ("price", "way", "won"),
+    [
+        (110, 1, True),
+        (90, 1, False),
+        (100, 1, True),  # up wins unless the price fell
+        (90, -1, True),
+        (110, -1, False),
+        (100, -1, False),
+    ],
+)
+def test_resolve_bets(price, way, won):
+    assert bets.resolve_bets(
+        np.array([price], dtype=float), np.array([100.0]), np.array([way])
+    ).tolist() == [won]
+
+
+def test_tally_nets_players_and_skips_unpriced_bets():
+    rows = [
+        Row(1, 10, 5.0, 1, "BTC", 100),
+        Row(2, 10, 7.0, -1, "BTC", 100),
+        Row(3, 11, 3.0, 1, "BTC", 100),
+        Row(4, 12, 9.0, 1, "ETH", 100),
+    ]
+    prices = np.array([99, 99, 102, np.nan])
+
+    bet_ids, won, users, deltas = bets.tally_bets(rows, prices)
+
+    assert bet_ids.tolist() == [1, 2, 3]
+    assert won.tolist() == [False, True, True]
+    assert dict(zip(users.tolist(), deltas.tolist())) == {10: 2.0, 11: 3.0}
+
+
+def test_tally_without_priced_bets():
+    rows = [Row(1, 10, 5.0, 1, "ETH", 100)]
+
+    bet_ids, won, users, deltas = bets.tally_bets(rows, np.array([np.nan]))
+
+    assert (len(bet_ids), len(won), len(users), len(deltas)) == (0, 0, 0, 0)
+
+
+class Result:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def all(self):
+        return self.rows
+
+    def scalar(self):
+        return None
+
+
+class Session:
+    def __init__(self, rows):
+        self.rows = rows
+        self.statements = []
+        self.committed = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return Result(self.rows if len(self.statements) == 1 else [])
+
+    async def commit(self):
+        self.committed = True
+
+
+@pytest.fixture
+def history(monkeypatch):
+    history = PriceHistory(interval=3600, capacity=24)
+    for hour in range(10):
+        history._ring("BTC").append(
+            to_timestamp(BASE + timedelta(hours=hour)), 100.0 + hour
+        )
+    monkeypatch.setattr(bets, "price_history", history)
+    return history
+
+
+def test_chunk_settles_priced_bets_and_returns_cursor(monkeypatch, history):
+    rows = [
+        Row(1, 10, 5.0, -1, "BTC", 103.0, BASE + timedelta(hours=2, minutes=5)),
+        Row(2, 11, 3.0, 1, "ETH", 100.0, BASE + timedelta(hours=3)),
+        Row(3, 10, 4.0, 1, "BTC", 103.0, BASE + timedelta(hours=5)),
+    ]
+    session = Session(rows)
+    monkeypatch.setattr(bets, "async_session_maker", lambda: session)
+    cursor = (BASE, 7)
+    since = BASE - timedelta(days=1)
+
+    settled, next_cursor = asyncio.run(
+        bets.settle_bets_chunk(BASE + timedelta(hours=6), cursor, 3, since)
+    )
+
+    # ETH has no samples in the ring and none in the table
+    assert settled == 2
+    assert next_cursor == (rows[-1].supposed_at, 3)
+    assert session.committed
+    query = session.statements[0].compile(dialect=postgresql.dialect())
+    assert "FOR UPDATE SKIP LOCKED" in str(query)
+    assert set(query.params.values()) >= {cursor[0], cursor[1], since, 3}
+    balances, results = session.statements[-2:]
+    deltas = balances.compile(dialect=postgresql.dialect()).params
+    assert dict(zip(*[iter(deltas.values())] * 2)) == {10: 9.0}
+    outcomes = results.compile(dialect=postgresql.dialect()).params
+    assert dict(zip(*[iter(outcomes.values())] * 2)) == {1: True, 3: True}
+
+
+def test_empty_chunk_ends_the_run(monkeypatch):
+    monkeypatch.setattr(bets, "async_session_maker", lambda: Session([]))
+
+    assert asyncio.run(bets.settle_bets_chunk(BASE, None, 10)) == (0, None)
+
+
+def test_due_bets_are_settled_chunk_by_chunk(monkeypatch):
+    chunks = [(2, (BASE, 2)), (0, (BASE, 4)), (1, (BASE, 5)), (0, None)]
+    calls = []
+
+    async def settle_bets_chunk(now, cursor, size, since):
+        calls.append((cursor, size, now - since))
+        return chunks[len(calls) - 1]
+
+    monkeypatch.setattr(bets, "settle_bets_chunk", settle_bets_chunk)
+
+    assert asyncio.run(bets.settle_due_bets(2)) == 3
+    grace = timedelta(seconds=settings.bet_price_grace)
+    assert calls == [
+        (None, 2, grace),
+        ((BASE, 2), 2, grace),
+        ((BASE, 4), 2, grace),
+        ((BASE, 5), 2, grace),
+    ]
@@ -0,0 +1,95 @@
+import asyncio
+import json
+
+from backend.core.dice import DiceRoom
+from backend.core.rooms import MemoryRoomStore
+from backend.db.matchmaking import PostgresMatchmaker
+from backend.db.pubsub import LocalPubSub
+from backend.services.matchmaking import Matchmaker, Ticket, pair_stakes
+
+
+def make_room(stake: int, user_id: int, opponent_id: int) -> DiceRoom:
+    room = DiceRoom("match", stake, user_id)
+    room.join(opponent_id)
+    return room
+
+
+def run(scenario):
+    async def main():
+        matchmaker = Matchmaker(MemoryRoomStore(DiceRoom), make_room, interval=0.01)
+        matchmaker.start()
+        try:
+            return await scenario(matchmaker)
+        finally:
+            await matchmaker.stop()
+
+    return asyncio.run(main())
+
+
+def test_pair_stakes_within_tolerance():
+    tickets = [Ticket.__new__(Ticket) for _ in range(5)]
+    for ticket, stake in zip(tickets, [10, 11, 50, 100, 105]):
+        ticket.stake = stake
+
+    pairs = pair_stakes(tickets, 0.1)
+
+    assert [(a.stake, b.stake) for a, b in pairs] == [(10, 11), (100, 105)]
+
+
+def test_players_get_the_same_room():
+    async def scenario(matchmaker):
+        return await asyncio.gather(
+            matchmaker.match(1, 100, 1), matchmaker.match(2, 105, 1)
+        )
+
+    first, second = run(scenario)
+    assert first is not None and first == second
+
+
+def test_cancelled_request_leaves_the_queue():
+    async def scenario(matchmaker):
+        task = asyncio.create_task(matchmaker.match(1, 100, 10))
+        await asyncio.sleep(0)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        queued = dict(matchmaker._tickets)
+        # Nobody is left to be paired with
+        return queued, await matchmaker.match(2, 100, 0.1)
+
+    queued, room_id = run(scenario)
+    assert queued == {}
+    assert room_id is None
+
+
+def test_cancel_stops_the_search():
+    async def scenario(matchmaker):
+        task = asyncio.create_task(matchmaker.match(1, 100, 10))
+        await asyncio.sleep(0)
+        return await matchmaker.cancel(1), await task, await matchmaker.cancel(1)
+
+    assert run(scenario) == (True, None, False)
+
+
+def test_shared_queue_announcement_reaches_only_its_request():
+    async def scenario():
+        pubsub = LocalPubSub()
+        matchmaker = PostgresMatchmaker(
+            MemoryRoomStore(DiceRoom), make_room, "dice", pubsub
+        )
+        matchmaker.start()
+        ticket = Ticket(1, 100)
+        matchmaker._tickets[1] = ticket
+        stale = {"event": "matched", "room_id": "old", "tickets": [[1, "other"]]}
+        await pubsub.publish(matchmaker.channel, json.dumps(stale))
+        resolved = ticket.future.done()
+        matched = {
+            "event": "matched",
+            "room_id": "room",
+            "tickets": [[1, ticket.token]],
+        }
+        await pubsub.publish(matchmaker.channel, json.dumps(matched))
+        del matchmaker._tickets[1]
+        await matchmaker.stop()
+        return resolved, ticket.future.result()
+
+    assert asyncio.run(scenario()) == (False, "room")
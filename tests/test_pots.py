@@ -0,0 +1,67 @@
+import asyncio
+
+from backend.db.pots import PotCache
+
+
+class Result:
+    def __init__(self, row):
+        self.row = row
+
+    def first(self):
+        return self.row
+
+
+class Session:
+    """
+    Serves the pot row, ``during_read`` runs while the query is in flight
+    """
+
+    def __init__(self, row, during_read=None):
+        self.row = row
+        self.during_read = during_read
+        self.reads = 0
+
+    async def execute(self, statement):
+        self.reads += 1
+        row = self.row
+        if self.during_read is not None:
+            self.during_read()
+        return Result(row)
+
+
+def test_pot_is_cached():
+    cache = PotCache()
+    session = Session((10.0, 4.0))
+
+    async def scenario():
+        return await cache.get(session, 1), await cache.get(session, 1)
+
+    assert asyncio.run(scenario()) == ((10.0, 4.0), (10.0, 4.0))
+    assert session.reads == 1
+
+
+def test_invalidate_after_commit_drops_the_pot():
+    cache = PotCache()
+    session = Session((10.0, 4.0))
+
+    async def scenario():
+        await cache.get(session, 1)
+        session.row = (15.0, 6.0)
+        cache.invalidate(1)
+        return await cache.get(session, 1)
+
+    assert asyncio.run(scenario()) == (15.0, 6.0)
+
+
+def test_read_racing_a_commit_is_not_cached():
+    cache = PotCache()
+    # The read sees the pot from before a deposit committed meanwhile
+    session = Session((10.0, 4.0), during_read=lambda: cache.invalidate(1))
+
+    async def scenario():
+        stale = await cache.get(session, 1)
+        session.row, session.during_read = (15.0, 6.0), None
+        return stale, await cache.get(session, 1)
+
+    assert asyncio.run(scenario()) == ((10.0, 4.0), (15.0, 6.0))
+    assert session.reads == 2
@@ -0,0 +1,123 @@
+import asyncio
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from backend.db.prices import PriceHistory, PriceRing, to_datetime, to_timestamp
+
+
+def ring_of(capacity: int, samples) -> PriceRing:
+    ring = PriceRing(capacity)
+    for timestamp, price in samples:
+        ring.append(timestamp, price)
+    return ring
+
+
+@pytest.mark.parametrize(
+    ("timestamp", "price"),
+    [
+        (5, None),  # before the first sample
+        (10, 1.0),  # at a sample
+        (15, 1.0),  # between samples
+        (20, 2.0),
+        (29.9, 2.0),
+        (30, 3.0),
+        (1000, 3.0),  # after the last sample
+    ],
+)
+def test_price_at(timestamp, price):
+    ring = ring_of(4, [(10, 1.0), (20, 2.0), (30, 3.0)])
+
+    assert ring.price_at(timestamp) == price
+
+
+def test_wrap_keeps_last_samples_in_order():
+    # Capacity 3, samples 10..70: 50, 60 and 70 are left
+    ring = ring_of(3, [(t, t / 10) for t in range(10, 80, 10)])
+
+    assert ring.size == 3
+    assert ring.oldest() == 50
+    assert ring.latest() == 7.0
+    assert list(ring.times[ring.start : ring.start + ring.size]) == [50, 60, 70]
+    assert ring.price_at(45) is None
+    assert ring.price_at(50) == 5.0
+    assert ring.price_at(65) == 6.0
+    assert ring.price_at(100) == 7.0
+
+
+@pytest.mark.parametrize("count", range(1, 9))
+def test_lookups_across_every_wrap_position(count):
+    samples = [(t, float(t)) for t in range(10, 10 * (count + 1), 10)]
+    ring = ring_of(3, samples)
+    kept = samples[-3:]
+
+    for timestamp, price in kept:
+        assert ring.price_at(timestamp) == price
+        assert ring.price_at(timestamp + 5) == price
+    assert ring.price_at(kept[0][0] - 1) is None
+
+
+def test_stale_samples_are_ignored():
+    ring = ring_of(3, [(10, 1.0), (20, 2.0), (20, 9.0), (15, 9.0)])
+
+    assert ring.size == 2
+    assert ring.price_at(25) == 2.0
+
+
+def test_prices_at_matches_price_at():
+    ring = ring_of(3, [(t, t / 10) for t in range(10, 60, 10)])
+    timestamps = np.array([0, 25, 30, 35, 45, 50, 99], dtype=float)
+
+    prices = ring.prices_at(timestamps)
+
+    expected = [ring.price_at(t) for t in timestamps]
+    assert [None if np.isnan(p) else p for p in prices] == expected
+
+
+def test_naive_moments_are_utc():
+    moment = datetime(2026, 3, 1, 12, 0)
+
+    assert to_datetime(to_timestamp(moment)) == moment
+
+
+class Session:
+    def __init__(self, price):
+        self.price = price
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return self
+
+    def scalar(self):
+        return self.price
+
+
+def test_history_reads_the_table_only_before_the_ring():
+    history = PriceHistory(interval=60, capacity=3)
+    start = to_timestamp(datetime(2026, 3, 1, 12, 0))
+    for i in range(5):
+        history._ring("Bitcoin").append(start + 60 * i, 100.0 + i)
+    session = Session(42.0)
+
+    async def scenario():
+        in_ring = await history.price_at(
+            session, "Bitcoin", datetime(2026, 3, 1, 12, 3, 30)
+        )
+        before_ring = await history.price_at(
+            session, "Bitcoin", datetime(2026, 3, 1, 12, 1)
+        )
+        unknown = await history.price_at(
+            session, "Ethereum", datetime(2026, 3, 1, 12, 3)
+        )
+        return in_ring, before_ring, unknown
+
+    assert asyncio.run(scenario()) == (103.0, 42.0, 42.0)
+    assert len(session.statements) == 2
+
+
+def test_history_prices_at_without_samples():
+    history = PriceHistory()
+
+    assert np.isnan(history.prices_at("Bitcoin", np.array([1.0, 2.0]))).all()
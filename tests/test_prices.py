@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from backend.services.prices import (
+    ROW_PARSERS,
+    FixtureSource,
+    PriceFeed,
+    PriceSource,
+)
+
+ROW = (
+    "<tr><td>{rank}</td><td></td>"
+    "<td><div><p>{name}</p><p>{symbol}</p></div></td>"
+    "<td><span>{price}</span></td><td>0.5%</td></tr>"
+)
+COINS = [
+    ("Bitcoin", "BTC", "$67,123.45"),
+    ("Ethereum", "ETH", "$3,210.00"),
+    ("Bitcoin Cash", "BCH", "$412.70"),
+]
+
+
+@pytest.fixture
+def page(tmp_path):
+    rows = "".join(
+        ROW.format(rank=rank, name=name, symbol=symbol, price=price)
+        for rank, (name, symbol, price) in enumerate(COINS, start=1)
+    )
+    path = tmp_path / "coinmarketcap.html"
+    path.write_text(
+        f"<html><body><table><thead><tr><th>#</th></tr></thead>"
+        f"<tbody>{rows}</tbody></table></body></html>",
+        encoding="utf-8",
+    )
+    return path
+
+
+def test_price_source_is_abstract():
+    with pytest.raises(TypeError):
+        PriceSource()
+
+
+def test_fixture_source_reads_saved_page(page):
+    assert asyncio.run(FixtureSource(str(page)).fetch()) == page.read_text()
+
+
+@pytest.mark.parametrize("parser", sorted(ROW_PARSERS))
+def test_feed_refreshes_from_fixture(page, parser):
+    feed = PriceFeed(FixtureSource(str(page)), ROW_PARSERS[parser], limit=2)
+    received = []
+
+    async def listener(quotes):
+        received.append(quotes)
+
+    feed.on_refresh(listener)
+    asyncio.run(feed.refresh())
+
+    assert [quote.to_dict() for quote in feed.quotes()] == [
+        {"name": "Bitcoin", "symbol": "BTC", "price": "$67,123.45"},
+        {"name": "Ethereum", "symbol": "ETH", "price": "$3,210.00"},
+    ]
+    assert feed.get("Bitcoin").price == 67123.45
+    assert feed.get("Bitcoin Cash") is None
+    assert feed.updated_at is not None
+    assert received == [feed.quotes()]
+
+
+def test_failed_refresh_keeps_snapshot(page):
+    feed = PriceFeed(FixtureSource(str(page)))
+    asyncio.run(feed.refresh())
+    updated_at = feed.updated_at
+
+    page.unlink()
+    asyncio.run(feed.refresh())
+
+    assert feed.get("Bitcoin Cash").symbol == "BCH"
+    assert feed.updated_at == updated_at
@@ -0,0 +1,115 @@
+import asyncio
+import json
+from random import Random
+from typing import List
+
+from backend.core.blackjack import BlackjackRoom
+from backend.core.rooms import MemoryRoomStore
+from backend.core.shoe import Shoe
+from backend.db.pubsub import LocalPubSub
+from backend.services.lobby import Lobby
+from backend.services.room_hub import RoomHub
+
+
+class RecordingPubSub(LocalPubSub):
+    def __init__(self):
+        super().__init__()
+        self.messages: List[dict] = []
+
+    async def publish(self, channel: str, payload: str) -> None:
+        self.messages.append(json.loads(payload))
+        await super().publish(channel, payload)
+
+
+class CountingStore(MemoryRoomStore):
+    def __init__(self):
+        super().__init__(BlackjackRoom)
+        self.reads = 0
+
+    async def get(self, room_id):
+        self.reads += 1
+        await asyncio.sleep(0)
+        return await super().get(room_id)
+
+
+def render(room: BlackjackRoom) -> dict:
+    return {"going": room.going, "hands": room.hands}
+
+
+def test_published_changes_hold_no_room_state():
+    async def scenario():
+        pubsub = RecordingPubSub()
+        hub = RoomHub(pubsub)
+        store = MemoryRoomStore(BlackjackRoom)
+        store.on_change(hub.publish)
+        room = BlackjackRoom("room", 10, 1, Shoe(1, Random(1)))
+        await store.create("room", room)
+        await store.update("room", lambda room: room.join(2))
+        await store.delete("room")
+        return pubsub.messages, room
+
+    messages, room = asyncio.run(scenario())
+    assert messages == [
+        {
+            "room_id": "room",
+            "version": 1,
+            "deleted": False,
+            "game": "BlackjackRoom",
+            "lobby": {"name": "room", "reward": 10, "created_at": room.created_at},
+        },
+        {
+            "room_id": "room",
+            "version": 2,
+            "deleted": False,
+            "game": "BlackjackRoom",
+            "lobby": None,
+        },
+        {"room_id": "room", "version": 0, "deleted": True, "lobby": None},
+    ]
+
+
+def test_lobby_follows_published_changes():
+    async def scenario():
+        pubsub = LocalPubSub()
+        hub = RoomHub(pubsub)
+        store = MemoryRoomStore(BlackjackRoom)
+        store.on_change(hub.publish)
+        lobby = Lobby(store, pubsub)
+        await lobby.start()
+        await store.create("room", BlackjackRoom("room", 10, 1, Shoe(1, Random(1))))
+        opened = json.loads(lobby.page())["rooms"]
+        await store.update("room", lambda room: room.join(2))
+        return opened, json.loads(lobby.page())["rooms"]
+
+    opened, joined = asyncio.run(scenario())
+    assert opened == [{"room_id": "room", "name": "room", "reward": 10}]
+    assert joined == []
+
+
+def test_subscribers_share_one_read_per_version():
+    async def scenario():
+        pubsub = LocalPubSub()
+        hub = RoomHub(pubsub)
+        hub.start()
+        store = CountingStore()
+        store.on_change(hub.publish)
+        await store.create("room", BlackjackRoom("room", 10, 1, Shoe(1, Random(1))))
+        streams = [hub.stream(store, "room", render) for _ in range(3)]
+        first = [await stream.__anext__() for stream in streams]
+        reads = store.reads
+        await store.update("room", lambda room: room.join(2))
+        changes = [await stream.__anext__() for stream in streams]
+        shared = store.reads - reads
+        await store.delete("room")
+        closed = [await stream.__anext__() for stream in streams]
+        for stream in streams:
+            await stream.aclose()
+        return first, changes, shared, closed, hub._reads
+
+    first, changes, shared, closed, reads = asyncio.run(scenario())
+    assert first == [first[0]] * 3
+    assert not first[0]["going"]
+    assert all(change["going"] for change in changes)
+    assert shared == 1
+    assert closed == [{"msg": "Комната закрыта."}] * 3
+    assert reads == {}
@@ -0,0 +1,117 @@
+import asyncio
+from datetime import UTC, datetime, timedelta, timezone
+
+import pytest
+
+from backend.db.leases import LocalLease
+from backend.services.scheduler import Cron, parse_cron_field
+
+
+def at(*args: int) -> datetime:
+    return datetime(*args, tzinfo=UTC)
+
+
+@pytest.mark.parametrize(
+    ("field", "low", "high", "values"),
+    [
+        ("*", 0, 5, {0, 1, 2, 3, 4, 5}),
+        ("7", 0, 59, {7}),
+        ("10-13", 0, 59, {10, 11, 12, 13}),
+        ("*/15", 0, 59, {0, 15, 30, 45}),
+        ("10-30/10", 0, 59, {10, 20, 30}),
+        ("1,5,9-10", 0, 59, {1, 5, 9, 10}),
+        ("0-6/3,7", 0, 7, {0, 3, 6, 7}),
+    ],
+)
+def test_parse_cron_field(field, low, high, values):
+    assert parse_cron_field(field, low, high) == values
+
+
+@pytest.mark.parametrize("field", ["60", "5-3", "0-60/5", "1,99"])
+def test_parse_cron_field_out_of_range(field):
+    with pytest.raises(ValueError):
+        parse_cron_field(field, 0, 59)
+
+
+def test_cron_needs_five_fields():
+    with pytest.raises(ValueError):
+        Cron("0 * * *")
+
+
+@pytest.mark.parametrize(
+    ("expression", "moment", "fire_at"),
+    [
+        # Strictly after the moment, seconds dropped
+        ("* * * * *", at(2026, 3, 1, 10, 0, 30), at(2026, 3, 1, 10, 1)),
+        ("0 * * * *", at(2026, 3, 1, 10, 0), at(2026, 3, 1, 11, 0)),
+        ("0 0 * * *", at(2026, 12, 31, 23, 59), at(2027, 1, 1, 0, 0)),
+        ("*/20 9-10 * * *", at(2026, 3, 1, 10, 45), at(2026, 3, 2, 9, 0)),
+        ("30 12 1,15 * *", at(2026, 3, 2, 0, 0), at(2026, 3, 15, 12, 30)),
+        ("0 0 1 1 *", at(2026, 6, 1, 0, 0), at(2027, 1, 1, 0, 0)),
+        ("0 0 29 2 *", at(2026, 1, 1, 0, 0), at(2028, 2, 29, 0, 0)),
+        # 2026-03-01 is a Sunday, both 0 and 7 mean Sunday
+        ("0 8 * * 1-5", at(2026, 2, 27, 9, 0), at(2026, 3, 2, 8, 0)),
+        ("0 8 * * 0", at(2026, 2, 27, 9, 0), at(2026, 3, 1, 8, 0)),
+        ("0 8 * * 7", at(2026, 2, 27, 9, 0), at(2026, 3, 1, 8, 0)),
+        # Restricted day of month and day of week are ORed: the 13th or a Friday
+        ("0 0 13 * 5", at(2026, 3, 1, 0, 0), at(2026, 3, 6, 0, 0)),
+        ("0 0 13 * 5", at(2026, 3, 10, 0, 0), at(2026, 3, 13, 0, 0)),
+        # A restricted day of month with any day of week is not ORed
+        ("0 0 13 * *", at(2026, 3, 6, 0, 0), at(2026, 3, 13, 0, 0)),
+    ],
+)
+def test_cron_next_after(expression, moment, fire_at):
+    assert Cron(expression).next_after(moment) == fire_at
+
+
+def test_cron_next_after_converts_to_utc():
+    moment = at(2026, 3, 1, 12, 30).astimezone(timezone(timedelta(hours=3)))
+    assert Cron("0 * * * *").next_after(moment) == at(2026, 3, 1, 13, 0)
+
+
+def test_cron_that_never_fires():
+    with pytest.raises(ValueError):
+        Cron("0 0 31 2 *").next_after(at(2026, 1, 1))
+
+
+def naive(*args: int) -> datetime:
+    return datetime(*args)
+
+
+def test_lease_is_granted_once_per_run():
+    lease = LocalLease()
+
+    async def scenario():
+        fire_at = naive(2026, 3, 1, 10, 0)
+        # Workers of one process racing for the same run
+        return await asyncio.gather(
+            *(lease.acquire("job", fire_at, 60) for _ in range(5))
+        )
+
+    assert sorted(asyncio.run(scenario())) == [False] * 4 + [True]
+
+
+def test_held_lease_blocks_the_next_run():
+    lease = LocalLease()
+
+    async def scenario():
+        first = await lease.acquire("job", naive(2026, 3, 1, 10, 0), 3600)
+        overlapping = await lease.acquire("job", naive(2026, 3, 1, 10, 1), 3600)
+        await lease.release("job")
+        again = await lease.acquire("job", naive(2026, 3, 1, 10, 0), 3600)
+        released = await lease.acquire("job", naive(2026, 3, 1, 10, 2), 3600)
+        other = await lease.acquire("other", naive(2026, 3, 1, 10, 2), 3600)
+        return first, overlapping, again, released, other
+
+    assert asyncio.run(scenario()) == (True, False, False, True, True)
+
+
+def test_expired_lease_frees_the_next_run():
+    lease = LocalLease()
+
+    async def scenario():
+        await lease.acquire("job", naive(2026, 3, 1, 10, 0), 0)
+        # Never released, e.g. the owner crashed mid-run
+        return await lease.acquire("job", naive(2026, 3, 1, 10, 1), 0)
+
+    assert asyncio.run(scenario()) is True
@@ -0,0 +1,120 @@
+import asyncio
+from typing import List
+
+from backend.core.dice import DiceRoom
+from backend.core.rooms import MemoryRoomStore, RoomManager
+from backend.db.settlement import DICE_GAME_TYPE, WINS, Settlement, SettlementEngine
+
+
+class RecordingEngine(SettlementEngine):
+    """
+    Settles rooms without a database, the first ``failures`` writes fail
+    """
+
+    def __init__(self, failures: int = 0):
+        super().__init__(interval=0.01, retry_delay=0.01, max_retry_delay=0.02)
+        self.failures = failures
+        self.batches: List[List[str]] = []
+        self.paid: List[str] = []
+
+    async def write(self, batch: List[Settlement]) -> List[str]:
+        self.batches.append([settlement.room_id for settlement in batch])
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("database is down")
+        # ON CONFLICT (room_id) DO NOTHING
+        settled = [room_id for room_id in self.batches[-1] if room_id not in self.paid]
+        self.paid.extend(settled)
+        return settled
+
+
+async def win(store: MemoryRoomStore, room_id: str) -> None:
+    room = DiceRoom("room", 10, 1)
+    room.join(2)
+    await store.create(room_id, room)
+
+    def finish(room: DiceRoom) -> None:
+        room.results[0] = WINS
+
+    await store.update(room_id, finish)
+
+
+def test_winning_move_does_not_wait_for_settlement():
+    async def scenario():
+        engine = RecordingEngine()
+        store = MemoryRoomStore(DiceRoom)
+        engine.register(store, DICE_GAME_TYPE)
+        await win(store, "first")
+        await win(store, "second")
+        written = list(engine.batches)
+        await engine.stop()
+        return written, engine.batches
+
+    written, batches = asyncio.run(scenario())
+    assert written == []
+    assert batches == [["first", "second"]]
+
+
+def test_failed_batch_is_retried():
+    async def scenario():
+        engine = RecordingEngine(failures=2)
+        store = MemoryRoomStore(DiceRoom)
+        engine.register(store, DICE_GAME_TYPE)
+        await win(store, "room")
+        while engine._flushing is not None:
+            await asyncio.sleep(0.01)
+        return engine
+
+    engine = asyncio.run(scenario())
+    assert engine.batches == [["room"]] * 3
+    assert engine.paid == ["room"]
+
+
+def test_stop_leaves_failing_batch_to_the_sweep():
+    async def scenario():
+        engine = RecordingEngine(failures=100)
+        store = MemoryRoomStore(DiceRoom)
+        engine.register(store, DICE_GAME_TYPE)
+        await win(store, "room")
+        await asyncio.sleep(0.05)
+        await asyncio.wait_for(engine.stop(), 1)
+        engine.failures = 0
+        return engine, await engine.sweep()
+
+    engine, swept = asyncio.run(scenario())
+    assert swept == 1
+    assert engine.paid == ["room"]
+
+
+def test_sweep_settles_rooms_won_before_start():
+    async def scenario():
+        store = MemoryRoomStore(DiceRoom)
+        await win(store, "won")
+        # Left by the opponent, nobody reached WINS
+        await store.create("left", DiceRoom("room", 10, 1))
+        await store.update("left", lambda room: room.join(2))
+        await store.update("left", lambda room: room.players.pop())
+        # A restarted worker knows nothing about either room
+        engine = RecordingEngine()
+        engine.register(store, DICE_GAME_TYPE)
+        return engine, await engine.sweep(), await engine.sweep()
+
+    engine, first, second = asyncio.run(scenario())
+    assert (first, second) == (1, 0)
+    assert engine.batches == [["won"]]
+
+
+def test_reap_waits_for_settlement():
+    async def scenario():
+        engine = RecordingEngine(failures=1)
+        store = MemoryRoomStore(DiceRoom)
+        await win(store, "room")
+        engine.register(store, DICE_GAME_TYPE)
+        manager = RoomManager(idle_ttl=0, max_rooms=10)
+        manager.register(store)
+        manager.on_reap(engine.sweep)
+        return engine, await manager.reap(), await manager.reap()
+
+    engine, deferred, reaped = asyncio.run(scenario())
+    assert (deferred, reaped) == (0, 1)
+    assert engine.paid == ["room"]
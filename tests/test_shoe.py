@@ -0,0 +1,90 @@
+from hashlib import sha256
+from random import Random
+
+import pytest
+
+from backend.core import shoe as shoe_module
+from backend.core.blackjack import MAX_GAME_CARDS, BlackjackRoom
+from backend.core.shoe import Shoe, set_default_rng
+
+
+def verify(commitment: str, revealed: dict) -> bool:
+    # What a player does with /blackjack/verify
+    digest = sha256(revealed["salt"].encode() + bytes(revealed["cards"]))
+    return digest.hexdigest() == commitment
+
+
+def test_seeded_shoes_are_reproducible():
+    first, second = Shoe(2, Random(42)), Shoe(2, Random(42))
+
+    assert first.cards == second.cards
+    assert first.salt == second.salt
+    assert first.commitment == second.commitment
+    assert Shoe(2, Random(43)).commitment != first.commitment
+
+
+def test_shoe_holds_every_card_of_every_deck():
+    shoe = Shoe(3, Random(1))
+
+    assert sorted(shoe.cards) == sorted(list(range(52)) * 3)
+
+
+def test_reveal_matches_commitment_and_dealt_cards():
+    shoe = Shoe(1, Random(7))
+    commitment = shoe.commitment
+
+    dealt = [shoe.draw() for _ in range(10)]
+    revealed = shoe.reveal()
+
+    assert verify(commitment, revealed)
+    assert revealed["cards"][:10] == dealt
+
+
+def test_exhausted_shoe_keeps_its_commitment():
+    shoe = Shoe(1, Random(3))
+    commitment = shoe.commitment
+    for _ in range(52):
+        shoe.draw()
+
+    with pytest.raises(IndexError):
+        shoe.draw()
+    assert shoe.commitment == commitment
+    assert verify(commitment, shoe.reveal())
+
+
+def test_state_round_trip_continues_the_same_order():
+    shoe = Shoe(1, Random(5))
+    shoe.draw()
+
+    restored = Shoe.from_state(shoe.to_state())
+
+    assert restored.commitment == shoe.commitment
+    assert [restored.draw() for _ in range(5)] == [shoe.draw() for _ in range(5)]
+
+
+def test_default_rng_can_be_seeded(monkeypatch):
+    monkeypatch.setattr(shoe_module, "default_rng", shoe_module.default_rng)
+    set_default_rng(Random(11))
+    first = Shoe(1)
+    set_default_rng(Random(11))
+
+    assert Shoe(1).commitment == first.commitment
+
+
+def test_room_deals_from_committed_order():
+    shoe = Shoe(1, Random(9))
+    commitment = shoe.commitment
+    room = BlackjackRoom("room", 10, 1, shoe)
+    room.join(2)
+    room.draw(0)
+
+    revealed = room.shoe.reveal()
+    order = revealed["cards"]
+    assert verify(commitment, revealed)
+    assert room.hands == [[order[0], order[1], order[4]], [order[2], order[3]]]
+
+
+def test_room_rejects_shoe_too_small_for_a_game():
+    assert MAX_GAME_CARDS <= 52
+    with pytest.raises(ValueError):
+        BlackjackRoom("room", 10, 1, Shoe(0, Random(1)))
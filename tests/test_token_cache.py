@@ -0,0 +1,78 @@
+import asyncio
+import time
+
+from backend.api import jwt
+from backend.config import settings
+from backend.core.token_cache import VerifiedTokenCache
+from backend.db.pubsub import LocalPubSub
+from backend.db.state import StateStore
+
+
+def test_revoked_tokens_are_rejected():
+    cache = VerifiedTokenCache()
+    now = time.time()
+    cache.put("old", 1, now - 10, now + 60)
+    cache.revoke(1, now - 5)
+    cache.put("new", 1, now, now + 60)
+
+    assert cache.get("old") is None
+    assert cache.get("new") == 1
+    assert cache.is_revoked(1, now - 10)
+    assert not cache.is_revoked(2, now - 10)
+
+
+def test_expired_revocations_are_forgotten():
+    cache = VerifiedTokenCache(revocation_ttl=100)
+    now = time.time()
+    cache.revoke(1, now - 150)
+    cache.revoke(2, now - 50)
+    # Revoked again, no longer in front of the expired epochs
+    cache.revoke(3, now - 120)
+    cache.revoke(3, now - 10)
+    cache.revoke(4, now - 200)
+
+    assert cache.stats()["revocations"] == 2
+    assert not cache.is_revoked(1, now - 200)
+    assert cache.is_revoked(2, now - 60)
+    assert cache.is_revoked(3, now - 20)
+
+
+def test_prune_revocations_deletes_expired_epochs(monkeypatch):
+    store = StateStore(LocalPubSub(), persist=False)
+    cache = VerifiedTokenCache(revocation_ttl=settings.refresh_token_ttl)
+    store.watch_prefix(
+        jwt.REVOCATION_PREFIX,
+        lambda key, at: cache.revoke(int(key.removeprefix(jwt.REVOCATION_PREFIX)), at),
+    )
+    monkeypatch.setattr(jwt, "state_store", store)
+    monkeypatch.setattr(jwt, "token_cache", cache)
+    now = time.time()
+    expired = now - settings.refresh_token_ttl - 1
+
+    async def scenario():
+        await store.set(f"{jwt.REVOCATION_PREFIX}1", expired)
+        await store.set(f"{jwt.REVOCATION_PREFIX}2", now)
+        await store.set("bonus_reset", expired)
+        return await jwt.prune_revocations(), await jwt.prune_revocations()
+
+    assert asyncio.run(scenario()) == (1, 0)
+    assert [key for key, _ in store.items()] == [
+        f"{jwt.REVOCATION_PREFIX}2",
+        "bonus_reset",
+    ]
+    assert cache.stats()["revocations"] == 1
+
+
+def test_delete_keeps_keys_set_again_by_another_worker():
+    store = StateStore(LocalPubSub(), persist=False)
+
+    async def scenario():
+        await store.set("key", 1)
+        # Deletion of version 1 announced after this worker saw version 2
+        store._apply("key", 2, 2)
+        store._on_notification('{"deleted": {"key": 1}}')
+        kept = store.get("key")
+        store._on_notification('{"deleted": {"key": 2}}')
+        return kept, store.get("key")
+
+    assert asyncio.run(scenario()) == (2, None)
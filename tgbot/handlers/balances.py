@@ -4,10 +4,11 @@ from aiogram.types import CallbackQuery, Message
 from aiogram.fsm.context import FSMContext
 from aiogram3_di import Depends
 from backend.db.actions import Actions
-from backend.db.session import get_session, AsyncSession
+from backend.db.session import get_read_session, get_session, AsyncSession
 from tgbot.states import States
 from tgbot.keyboards import (
     get_nav_keyboard,
+    parse_nav_callback,
     get_balance_keyboard,
     get_home_keyboard,
     get_money_keyboard,
@@ -23,24 +24,27 @@ async def balances(
     callback: CallbackQuery,
     state: FSMContext,
     bot: Bot,
-    session: Annotated[AsyncSession, Depends(get_session, use_cache=False)],
+    session: Annotated[AsyncSession, Depends(get_read_session, use_cache=False)],
 ):
     assert callback.data and callback.message, "Пустое сообщение"
-    _, page_str = callback.data.split("_")
-    page = int(page_str)
-    actions = Actions(session)
-    count_balances = await actions.get_count_users()
-    if page < 0:
+    cursor, position = parse_nav_callback(callback.data)
+    if cursor == "-":
         await bot.answer_callback_query(callback.id, "Назад некуда")
         return
-    if (start := page * batch_size + 1) > count_balances:
+    if cursor == "+":
+        await bot.answer_callback_query(callback.id, "Дальше некуда")
+        return
+    actions = Actions(session)
+    count_balances = await actions.get_count_users()
+    page = await actions.get_users(cursor, position)
+    if not page.items:
         await bot.answer_callback_query(callback.id, "Дальше некуда")
         return
-    balances = await actions.get_users(page)
-    end = min(start + 9, count_balances)
+    start = page.position + 1
+    end = page.position + len(page.items)
     answer = f"Балансы {start}-{end} из {count_balances}\n\n"
     data = list()
-    for idx, balance in enumerate(balances, start=1):
+    for idx, balance in enumerate(page.items, start=1):
         data.append(balance.telegram_id)
         answer += f"{idx}.ID Владельца:{balance.telegram_id}. Монет:{balance.money_balance}.\n"
     answer += (
@@ -48,7 +52,7 @@ async def balances(
     )
     await state.set_state(States.Balances)
     await callback.message.edit_text(
-        answer, reply_markup=get_nav_keyboard("Balances", page, count_balances, data)
+        answer, reply_markup=get_nav_keyboard("Balances", page, data)
     )
 
 
@@ -56,12 +60,12 @@ async def balances(
 async def search_balances(
     message: Message,
     state: FSMContext,
-    session: Annotated[AsyncSession, Depends(get_session, use_cache=False)],
+    session: Annotated[AsyncSession, Depends(get_read_session, use_cache=False)],
 ):
     assert message.text, "Пустое сообщение"
     if message.text.isdigit():
-        page = int(message.text)
-        if page < 0:
+        number = int(message.text)
+        if number < 0:
             await message.answer(text="Номер баланса не может быть ниже нуля.")
             return
     else:
@@ -69,12 +73,13 @@ async def search_balances(
         return
     actions = Actions(session)
     count_balances = await actions.get_count_users()
-    balances = await actions.get_users(page := page // 10)
-    start = page * batch_size + 1
-    end = min(start + 9, count_balances)
+    position = max(number - 1, 0) // batch_size * batch_size
+    page = await actions.get_users(position=position)
+    start = page.position + 1
+    end = page.position + len(page.items)
     answer = f"Балансы {start}-{end} из {count_balances}\n\n"
     data = list()
-    for idx, balance in enumerate(balances, start=1):
+    for idx, balance in enumerate(page.items, start=1):
         data.append(balance.telegram_id)
         answer += (
             f"ID ТГ Владельца:{balance.telegram_id}. Монет:{balance.money_balance}.\n"
@@ -83,9 +88,7 @@ async def search_balances(
         "\n(если вам нужна конкретная страница, введите номер баланса на этой странице)"
     )
     await state.set_state(States.Balances)
-    await message.answer(
-        answer, reply_markup=get_nav_keyboard("Balances", page, count_balances, data)
-    )
+    await message.answer(answer, reply_markup=get_nav_keyboard("Balances", page, data))
 
 
 @router.callback_query(F.data.startswith("Balance_"))
@@ -4,10 +4,11 @@ from aiogram.types import CallbackQuery, Message
 from aiogram.fsm.context import FSMContext
 from aiogram3_di import Depends
 from backend.db.actions import Actions
-from backend.db.session import get_session, AsyncSession
+from backend.db.session import get_read_session, get_session, AsyncSession
 from tgbot.states import States
 from tgbot.keyboards import (
     get_nav_keyboard,
+    parse_nav_callback,
     get_history_keyboard,
     get_home_keyboard,
 )
@@ -22,30 +23,33 @@ async def history(
     callback: CallbackQuery,
     state: FSMContext,
     bot: Bot,
-    session: Annotated[AsyncSession, Depends(get_session, use_cache=False)],
+    session: Annotated[AsyncSession, Depends(get_read_session, use_cache=False)],
 ):
     assert callback.data and callback.message, "Пустое сообщение"
-    _, page_str = callback.data.split("_")
-    page = int(page_str)
-    actions = Actions(session)
-    count_transactions = await actions.get_count_transactions()
-    if page < 0:
+    cursor, position = parse_nav_callback(callback.data)
+    if cursor == "-":
         await bot.answer_callback_query(callback.id, "Назад некуда")
         return
-    if (start := page * batch_size + 1) > count_transactions:
+    if cursor == "+":
         await bot.answer_callback_query(callback.id, "Дальше некуда")
         return
-    transactions = await actions.get_transactions(page)
-    end = min(start + 9, count_transactions)
+    actions = Actions(session)
+    count_transactions = await actions.get_count_transactions()
+    page = await actions.get_transactions(cursor, position)
+    if not page.items:
+        await bot.answer_callback_query(callback.id, "Дальше некуда")
+        return
+    start = page.position + 1
+    end = page.position + len(page.items)
     answer = f"Транзакции {start}-{end} из {count_transactions}\n\n"
     data = list()
-    for idx, transaction in enumerate(transactions, start=1):
+    for idx, transaction in enumerate(page.items, start=1):
         data.append(transaction.transaction_id)
         answer += f"{idx}.{'Подтверждено' if transaction.confirmed_at else 'Не подтверждено'}.[{transaction.created_at}:{'Вывод' if transaction.transaction_type else 'Депозит'}].Пользователь ID:{transaction.telegram_id}.{transaction.amount}\n"
     answer += "\n(если вам нужна конкретная страница, введите номер транзакции на этой странице)"
     await state.set_state(States.History)
     await callback.message.edit_text(
-        answer, reply_markup=get_nav_keyboard("History", page, count_transactions, data)
+        answer, reply_markup=get_nav_keyboard("History", page, data)
     )
 
 
@@ -53,12 +57,12 @@ async def history(
 async def search_history(
     message: Message,
     state: FSMContext,
-    session: Annotated[AsyncSession, Depends(get_session, use_cache=False)],
+    session: Annotated[AsyncSession, Depends(get_read_session, use_cache=False)],
 ):
     assert message.text, "Пустое сообщение"
     if message.text.isdigit():
-        page = int(message.text)
-        if page < 0:
+        number = int(message.text)
+        if number < 0:
             await message.answer("Номер транзакции не может быть ниже нуля.")
             return
     else:
@@ -66,19 +70,18 @@ async def search_history(
         return
     actions = Actions(session)
     count_transactions = await actions.get_count_transactions()
-    transactions = await actions.get_transactions(page := page // 10)
-    start = page * batch_size + 1
-    end = min(start + 9, count_transactions)
+    position = max(number - 1, 0) // batch_size * batch_size
+    page = await actions.get_transactions(position=position)
+    start = page.position + 1
+    end = page.position + len(page.items)
     answer = f"Транзакции {start}-{end} из {count_transactions}\n\n"
     data = list()
-    for idx, transaction in enumerate(transactions, start=1):
+    for idx, transaction in enumerate(page.items, start=1):
         data.append(transaction.transaction_id)
         answer += f"{idx}.{'Подтверждено' if transaction.confirmed_at else 'Не подтверждено'}.[{transaction.created_at}:{'Вывод' if transaction.transaction_type else 'Депозит'}].Пользователь ID:{transaction.telegram_id}.{transaction.amount}\n"
     answer += "\n(если вам нужна конкретная страница, введите номер транзакции на этой странице)"
     await state.set_state(States.History)
-    await message.answer(
-        answer, reply_markup=get_nav_keyboard("History", page, count_transactions, data)
-    )
+    await message.answer(answer, reply_markup=get_nav_keyboard("History", page, data))
 
 
 @router.callback_query(F.data.startswith("Histor_"))
@@ -7,7 +7,7 @@ from aiogram.types import CallbackQuery, Message
 from aiogram3_di import Depends
 
 from backend.db.actions import Actions
-from backend.db.session import AsyncSession, get_session
+from backend.db.session import AsyncSession, get_read_session
 from backend.db.actions import LotteryActions
 from tgbot.keyboards import (
     get_create_lottery_keyboard,
@@ -15,6 +15,7 @@ from tgbot.keyboards import (
     get_lottery_keyboard,
     get_manage_lottery_keyboard,
     get_nav_keyboard,
+    parse_nav_callback,
     get_sure_close_keyboard,
 )
 from tgbot.states import States
@@ -33,7 +34,7 @@ batch_size = 10
 @router.callback_query(F.data == "Lottery")
 async def history_main(
     callback: CallbackQuery,
-    session: Annotated[AsyncSession, Depends(get_session, use_cache=False)],
+    session: Annotated[AsyncSession, Depends(get_read_session, use_cache=False)],
 ):
     assert callback.data and callback.message, "Пустое сообщение"
     await callback.message.edit_text(
@@ -101,7 +102,7 @@ async def create_lottery_check(message: Message, state: FSMContext):
 async def create_lottery_bot(callback: CallbackQuery, state: FSMContext):
     assert callback.data and callback.message, "Пустое сообщение"
     _, date = callback.data.split("_")
-    if LotteryActions().create_lottery(date):
+    if await LotteryActions().create_lottery(date):
         await callback.message.edit_text(
             text="Вы успешно изменили дату розыгрыша.", reply_markup=get_home_keyboard()
         )
@@ -157,7 +158,7 @@ async def change_lottery_date_check(message: Message, state: FSMContext):
 async def move_lottery(callback: CallbackQuery, state: FSMContext):
     assert callback.data and callback.message, "Пустое сообщение"
     _, date = callback.data.split("_")
-    if LotteryActions().change_date_lottery(date):
+    if await LotteryActions().change_date_lottery(date):
         await callback.message.edit_text(
             text="Вы успешно изменили дату розыгрыша.", reply_markup=get_home_keyboard()
         )
@@ -182,7 +183,7 @@ async def sure_close_lottery(
     state: FSMContext,
 ):
     assert callback.data and callback.message, "Пустое сообщение"
-    if LotteryActions().close_lottery():
+    if await LotteryActions().close_lottery():
         await callback.message.edit_text(
             text="Вы успешно завершили розыгрыш. Награды начислены.",
             reply_markup=get_home_keyboard(),
@@ -198,30 +199,33 @@ async def history(
     callback: CallbackQuery,
     state: FSMContext,
     bot: Bot,
-    session: Annotated[AsyncSession, Depends(get_session, use_cache=False)],
+    session: Annotated[AsyncSession, Depends(get_read_session, use_cache=False)],
 ):
     assert callback.data and callback.message, "Пустое сообщение"
-    actions = Actions(session)
-    _, page_str = callback.data.split("_")
-    page = int(page_str)
-    count_transactions = await actions.get_count_lottery_transactions()
-    if page < 0:
+    cursor, position = parse_nav_callback(callback.data)
+    if cursor == "-":
         await bot.answer_callback_query(callback.id, "Назад некуда")
         return
-    if (start := page * batch_size + 1) > count_transactions:
+    if cursor == "+":
+        await bot.answer_callback_query(callback.id, "Дальше некуда")
+        return
+    actions = Actions(session)
+    count_transactions = await actions.get_count_lottery_transactions()
+    page = await actions.get_lottery_transactions(cursor, position)
+    if not page.items:
         await bot.answer_callback_query(callback.id, "Дальше некуда")
         return
-    transactions = await actions.get_lottery_transactions(page)
-    end = min(start + 9, count_transactions)
+    start = page.position + 1
+    end = page.position + len(page.items)
     answer = f"Транзакции {start}-{end} из {count_transactions}\n\n"
     data = list()
-    for idx, transaction in enumerate(transactions, start=1):
+    for idx, transaction in enumerate(page.items, start=1):
         data.append(transaction.id)
         answer += f"{idx}.{'Подтверждено' if transaction.confirmed_at else 'Не подтверждено'}.[{transaction.created_at}].Пользователь ID:{transaction.telegram_id}.{transaction.amount}\n"
     answer += "\n(если вам нужна конкретная страница, введите номер транзакции на этой странице)"
     await state.set_state(States.LotteryHistory)
     await callback.message.edit_text(
-        answer, reply_markup=get_nav_keyboard("Lottery", page, count_transactions, data)
+        answer, reply_markup=get_nav_keyboard("Lottery", page, data)
     )
 
 
@@ -229,12 +233,12 @@ async def history(
 async def search_history(
     message: Message,
     state: FSMContext,
-    session: Annotated[AsyncSession, Depends(get_session, use_cache=False)],
+    session: Annotated[AsyncSession, Depends(get_read_session, use_cache=False)],
 ):
     assert message.text, "Пустое сообщение"
     if message.text.isdigit():
-        page = int(message.text)
-        if page < 0:
+        number = int(message.text)
+        if number < 0:
             await message.answer("Номер транзакции не может быть ниже нуля.")
             return
     else:
@@ -242,19 +246,18 @@ async def search_history(
         return
     actions = Actions(session)
     count_transactions = await actions.get_count_lottery_transactions()
-    transactions = await actions.get_lottery_transactions(page := page // 10)
-    start = page * batch_size + 1
-    end = min(start + 9, count_transactions)
+    position = max(number - 1, 0) // batch_size * batch_size
+    page = await actions.get_lottery_transactions(position=position)
+    start = page.position + 1
+    end = page.position + len(page.items)
     answer = f"Транзакции {start}-{end} из {count_transactions}\n\n"
     data = list()
-    for idx, transaction in enumerate(transactions, start=1):
+    for idx, transaction in enumerate(page.items, start=1):
         data.append(transaction.id)
         answer += f"{idx}.{'Подтверждено' if transaction.confirmed_at else 'Не подтверждено'}.[{transaction.created_at}].Пользователь ID:{transaction.telegram_id}.{transaction.amount}\n"
     answer += "\n(если вам нужна конкретная страница, введите номер транзакции на этой странице)"
     await state.set_state(States.LotteryHistory)
-    await message.answer(
-        answer, reply_markup=get_nav_keyboard("Lottery", page, count_transactions, data)
-    )
+    await message.answer(answer, reply_markup=get_nav_keyboard("Lottery", page, data))
 
 
 @router.message()
@@ -3,11 +3,12 @@ from aiogram import Bot, F, Router
 from aiogram.types import CallbackQuery, Message
 from aiogram.fsm.context import FSMContext
 from aiogram3_di import Depends
-from backend.db.session import get_session, AsyncSession
+from backend.db.session import get_read_session, get_session, AsyncSession
 from tgbot.states import States
 from backend.db.actions import Actions
 from tgbot.keyboards import (
     get_nav_keyboard,
+    parse_nav_callback,
     get_ref_keyboard,
     get_home_keyboard,
     get_ref_sure_keyboard,
@@ -23,30 +24,33 @@ async def referrals(
     callback: CallbackQuery,
     state: FSMContext,
     bot: Bot,
-    session: Annotated[AsyncSession, Depends(get_session, use_cache=False)],
+    session: Annotated[AsyncSession, Depends(get_read_session, use_cache=False)],
 ):
     assert callback.data and callback.message, "Пустое сообщение"
-    _, page_str = callback.data.split("_")
-    page = int(page_str)
-    actions = Actions(session)
-    count_referrals = await actions.get_count_referrals()
-    if page < 0:
+    cursor, position = parse_nav_callback(callback.data)
+    if cursor == "-":
         await bot.answer_callback_query(callback.id, "Назад некуда")
         return
-    if (start := page * batch_size + 1) > count_referrals:
+    if cursor == "+":
         await bot.answer_callback_query(callback.id, "Дальше некуда")
         return
-    referrals = await actions.get_referrals(page)
-    end = min(start + 9, count_referrals)
+    actions = Actions(session)
+    count_referrals = await actions.get_count_referrals()
+    page = await actions.get_referrals(cursor, position)
+    if not page.items:
+        await bot.answer_callback_query(callback.id, "Дальше некуда")
+        return
+    start = page.position + 1
+    end = page.position + len(page.items)
     answer = f"Рефери {start}-{end} из {count_referrals}\n\n"
     data = list()
-    for idx, referral in enumerate(referrals, start=1):
+    for idx, referral in enumerate(page.items, start=1):
         data.append(referral.referral_id)
         answer += f"{idx}.[{referral.referrer_id}-{referral.referred_id}]: Бонус:{referral.bonus}\n"
     answer += "\n(если вам нужна конкретная страница, введите номер реферала на этой странице)"
     await state.set_state(States.Referrals)
     await callback.message.edit_text(
-        answer, reply_markup=get_nav_keyboard("Referrals", page, count_referrals, data)
+        answer, reply_markup=get_nav_keyboard("Referrals", page, data)
     )
 
 
@@ -54,29 +58,28 @@ async def referrals(
 async def search_referrals(
     message: Message,
     state: FSMContext,
-    session: Annotated[AsyncSession, Depends(get_session, use_cache=False)],
+    session: Annotated[AsyncSession, Depends(get_read_session, use_cache=False)],
 ):
     assert message.text, "Пустое сообщение"
     if message.text.isdigit():
-        page = int(message.text)
+        number = int(message.text)
     else:
         await message.answer(text="Сообщение состоит не только из цифр. Введите число")
         return
     actions = Actions(session)
     count_referrals = await actions.get_count_referrals()
-    referrals = await actions.get_referrals(page := page // 10)
-    start = page * batch_size + 1
-    end = min(start + 9, count_referrals)
+    position = max(number - 1, 0) // batch_size * batch_size
+    page = await actions.get_referrals(position=position)
+    start = page.position + 1
+    end = page.position + len(page.items)
     answer = f"Рефералы {start}-{end} из {count_referrals}\n\n"
     data = list()
-    for idx, referral in enumerate(referrals, start=1):
+    for idx, referral in enumerate(page.items, start=1):
         data.append(referral.referral_id)
         answer += f"{idx}.[{referral.referrer_id}-{referral.referred_id}]: Бонус:{referral.bonus}\n"
     answer += "\n(если вам нужна конкретная страница, введите номер реферала на этой странице)"
     await state.set_state(States.Referrals)
-    await message.answer(
-        answer, reply_markup=get_nav_keyboard("Referrals", page, count_referrals, data)
-    )
+    await message.answer(answer, reply_markup=get_nav_keyboard("Referrals", page, data))
 
 
 @router.callback_query(F.data.startswith("Referral_"))
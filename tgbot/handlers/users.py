@@ -3,11 +3,13 @@ from aiogram import Router, F, Bot
 from aiogram.types import CallbackQuery, Message
 from aiogram.fsm.context import FSMContext
 from aiogram3_di import Depends
+from backend.api.jwt import revoke_tokens
 from backend.db.actions import Actions
-from backend.db.session import get_session, AsyncSession
+from backend.db.session import get_read_session, get_session, AsyncSession
 from ..states import States
 from ..keyboards import (
     get_nav_keyboard,
+    parse_nav_callback,
     get_sure_clear_keyboard,
     get_user_keyboard,
     get_user_money_keyboard,
@@ -24,30 +26,33 @@ async def users(
     callback: CallbackQuery,
     state: FSMContext,
     bot: Bot,
-    session: Annotated[AsyncSession, Depends(get_session, use_cache=False)],
+    session: Annotated[AsyncSession, Depends(get_read_session, use_cache=False)],
 ):
     assert callback.data and callback.message, "Пустое сообщение"
-    _, page_str = callback.data.split("_")
-    page = int(page_str)
-    actions = Actions(session)
-    count_users = await actions.get_count_users()
-    if page < 0:
+    cursor, position = parse_nav_callback(callback.data)
+    if cursor == "-":
         await bot.answer_callback_query(callback.id, "Назад некуда")
         return
-    if (start := page * batch_size + 1) > count_users:
+    if cursor == "+":
         await bot.answer_callback_query(callback.id, "Дальше некуда")
         return
-    users = await actions.get_users(page)
-    end = min(start + 9, count_users)
+    actions = Actions(session)
+    count_users = await actions.get_count_users()
+    page = await actions.get_users(cursor, position)
+    if not page.items:
+        await bot.answer_callback_query(callback.id, "Дальше некуда")
+        return
+    start = page.position + 1
+    end = page.position + len(page.items)
     answer = f"Пользователи {start}-{end} из {count_users}\n\n"
     data = list()
-    for idx, user in enumerate(users, start=1):
+    for idx, user in enumerate(page.items, start=1):
         data.append(user.telegram_id)
         answer += f"{idx}. [{user.telegram_id}] @{user.username}. Монеты: {user.money_balance}. Присоединился {user.joined_at.strftime('%d:%m:%Y.%H:%M:%S')}\n"
     answer += "\n(если вам нужна конкретная страница, введите номер пользователя на этой странице)"
     await state.set_state(States.Users)
     await callback.message.edit_text(
-        answer, reply_markup=get_nav_keyboard("Users", page, count_users, data)
+        answer, reply_markup=get_nav_keyboard("Users", page, data)
     )
 
 
@@ -55,29 +60,28 @@ async def users(
 async def search_users(
     message: Message,
     state: FSMContext,
-    session: Annotated[AsyncSession, Depends(get_session, use_cache=False)],
+    session: Annotated[AsyncSession, Depends(get_read_session, use_cache=False)],
 ):
     assert message.text, "Пустое сообщение"
     if message.text.isdigit():
-        page = int(message.text)
+        number = int(message.text)
     else:
         await message.answer(text="Сообщение состоит не только из цифр. Введите число")
         return
     actions = Actions(session)
     count_users = await actions.get_count_users()
-    users = await actions.get_users(page := page // 10)
-    start = page * batch_size + 1
-    end = min(start + 9, count_users)
+    position = max(number - 1, 0) // batch_size * batch_size
+    page = await actions.get_users(position=position)
+    start = page.position + 1
+    end = page.position + len(page.items)
     answer = f"Пользователи {start}-{end} из {count_users}\n\n"
     data = list()
-    for idx, user in enumerate(users, start=1):
+    for idx, user in enumerate(page.items, start=1):
         data.append(user.telegram_id)
         answer += f"{idx}. [{user.telegram_id}] @{user.username}. Монеты: {user.money_balance}. Присоединился {user.joined_at.strftime('%d:%m:%Y.%H:%M:%S')}\n"
     answer += "\n(если вам нужна конкретная страница, введите номер пользователя на этой странице)"
     await state.set_state(States.Users)
-    await message.answer(
-        answer, reply_markup=get_nav_keyboard("Users", page, count_users, data)
-    )
+    await message.answer(answer, reply_markup=get_nav_keyboard("Users", page, data))
 
 
 @router.callback_query(F.data.startswith("User_"))
@@ -137,6 +141,7 @@ async def sure_clear_user(
         )
         return
     id = int(id)
+    await revoke_tokens(session, id)
     await Actions(session).clear_user(id)
     await callback.message.edit_text(
         text=(f"Пользователь с ID {id} очищен"), reply_markup=get_home_keyboard()
@@ -1,5 +1,9 @@
 from .main import get_keyboard as get_main_keyboard
-from .nav import get_keyboard as get_nav_keyboard, home_keyboard as get_home_keyboard
+from .nav import (
+    get_keyboard as get_nav_keyboard,
+    home_keyboard as get_home_keyboard,
+    parse_callback as parse_nav_callback,
+)
 from .lottery import (
     get_keyboard as get_lottery_keyboard,
     create_keyboard as get_create_lottery_keyboard,
@@ -32,6 +36,7 @@ from .user import (
 __all__ = [
     "get_main_keyboard",
     "get_nav_keyboard",
+    "parse_nav_callback",
     "get_lottery_keyboard",
     "get_create_lottery_keyboard",
     "get_manage_lottery_keyboard",
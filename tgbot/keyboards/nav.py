@@ -1,21 +1,27 @@
-from typing import List
+from typing import List, Optional, Tuple
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 
+from backend.db.pagination import PAGE_SIZE, Page
 
-def get_keyboard(element: str, page: int, count: int,
+
+def get_keyboard(element: str, page: Page,
                  data: List[int]) -> InlineKeyboardMarkup:
     keyboard = InlineKeyboardBuilder()
     for idx, datum in enumerate(data, start=1):
         keyboard.add(
             InlineKeyboardButton(text=str(idx),
                                  callback_data=f"{element[:-1]}_{datum}"))
+    prev_position = max(page.position - PAGE_SIZE, 0)
+    next_position = page.position + len(page.items)
     keyboard.add(
         InlineKeyboardButton(
-            text="⬅️", callback_data=f"{element}_{0 if page < 1 else page-1}"),
+            text="⬅️",
+            callback_data=f"{element}_{page.prev_cursor()}_{prev_position}"),
         InlineKeyboardButton(text="🏠", callback_data="Main"),
         InlineKeyboardButton(
-            text="➡️", callback_data=f"{element}_{min(page+1, count//10)}"))
+            text="➡️",
+            callback_data=f"{element}_{page.next_cursor()}_{next_position}"))
     datalen = len(data)
     if datalen > 5:
         adjustination = datalen//2, datalen//2
@@ -25,6 +31,23 @@ def get_keyboard(element: str, page: int, count: int,
     return keyboard.as_markup()
 
 
+def parse_callback(data: str) -> Tuple[Optional[str], int]:
+    """
+    Parse navigation callback data built by ``get_keyboard``
+
+    "Users_0" opens the first page, "Users_a42_10" the page after key 42
+    starting at position 10, "Users_-_0" and "Users_+_10" mean there is no
+    previous or next page.
+
+    Returns:
+        Tuple[Optional[str], int]: Keyset cursor and position of the page
+    """
+    _, cursor, *position = data.split("_")
+    if not position:
+        return None, 0
+    return cursor, int(position[0])
+
+
 def home_keyboard() -> InlineKeyboardMarkup:
     keyboard = InlineKeyboardBuilder()
     keyboard.add(InlineKeyboardButton(text="🏠", callback_data="Main"))